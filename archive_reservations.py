@@ -0,0 +1,41 @@
+"""
+Reservation archival job for Café Fausse
+Run periodically (e.g. nightly from cron) to move old completed/cancelled
+reservations to reservation_archive and, on PostgreSQL, to create the
+upcoming monthly partitions of the reservation table
+
+Usage:
+    python archive_reservations.py
+    python archive_reservations.py --older-than-days 365 --months-ahead 6
+"""
+
+import argparse
+
+from app import app, db
+from services.archive import ensure_reservation_partitions, archive_reservations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Archive old reservations and maintain partitions')
+    parser.add_argument('--older-than-days', type=int, help='Archive rows older than this (default: ARCHIVE_AFTER_DAYS)')
+    parser.add_argument('--months-ahead', type=int, help='Partitions to keep ahead (default: PARTITION_MONTHS_AHEAD)')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--skip-partitions', action='store_true')
+    args = parser.parse_args(argv)
+
+    with app.app_context():
+        try:
+            if not args.skip_partitions:
+                created = ensure_reservation_partitions(args.months_ahead)
+                print(f"Created {len(created)} reservation partitions{': ' + ', '.join(created) if created else ''}")
+
+            archived = archive_reservations(args.older_than_days, args.batch_size)
+            print(f"Archived {archived} reservations")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error archiving reservations: {str(e)}")
+            raise
+
+
+if __name__ == '__main__':
+    main()
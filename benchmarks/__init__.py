@@ -0,0 +1 @@
+# Benchmarks package for Café Fausse API
@@ -0,0 +1,153 @@
+"""
+Pure-Python reference for services/analytics.py
+Builds the same occupancy report by loading Reservation ORM objects and
+looping over them. Used by run_benchmarks.py as the baseline for the
+vectorized version and to check that both produce the same numbers.
+"""
+
+import math
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from models import Reservation, ReservationArchive, Table
+from services.analytics import (LEAD_TIME_BUCKETS_HOURS, LEAD_TIME_PERCENTILES, WEEKDAY_NAMES,
+                                open_hours, rate)
+
+
+def percentile(sorted_values, pct):
+    """Linear interpolation percentile, matching numpy.percentile's default"""
+    position = (len(sorted_values) - 1) * pct / 100.0
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def occupancy_report_loop(start, end, include_archive=True, now=None, location_id=None):
+    now = now or datetime.now()
+    models = [Reservation, ReservationArchive] if include_archive else [Reservation]
+    reservations = [
+        reservation
+        for model in models
+        for reservation in model.query.filter(
+            model.reservation_datetime >= start,
+            model.reservation_datetime < end
+        ).all()
+        if location_id is None or reservation.location_id == location_id
+    ]
+
+    hours_by_location = {}
+    bookings = Counter()
+    booked_minutes = Counter()
+    table_covers = Counter()
+    slot_reservations = Counter()
+    slot_covers = defaultdict(Counter)
+    nights = set()
+    totals = Counter()
+    cancellations = Counter()
+    past_seated = Counter()
+    no_shows = Counter()
+    lead_hours = []
+
+    for reservation in reservations:
+        start_at = reservation.reservation_datetime
+        weekday = start_at.weekday()
+        totals[weekday] += 1
+        if reservation.status == 'cancelled':
+            cancellations[weekday] += 1
+        else:
+            bookings[reservation.table_id] += 1
+            booked_minutes[reservation.table_id] += reservation.duration_minutes
+            table_covers[reservation.table_id] += reservation.num_of_guests
+            slot = start_at.strftime('%H:%M')
+            slot_reservations[slot] += 1
+            slot_covers[slot][weekday] += reservation.num_of_guests
+            nights.add(start_at.date())
+            if start_at < now:
+                past_seated[weekday] += 1
+                if reservation.status == 'confirmed':
+                    no_shows[weekday] += 1
+        if reservation.created_at is not None:
+            lead = (start_at - reservation.created_at).total_seconds() / 3600
+            if lead >= 0:
+                lead_hours.append(lead)
+
+    tables = [
+        table for table in Table.query.order_by(Table.table_number).all()
+        if location_id is None or table.location_id == location_id
+    ]
+    for table in tables:
+        if table.location_id not in hours_by_location:
+            hours_by_location[table.location_id] = open_hours(start, end, table.location_id)
+    lead_hours.sort()
+    histogram = Counter()
+    for lead in lead_hours:
+        bucket = 0
+        while bucket + 1 < len(LEAD_TIME_BUCKETS_HOURS) and lead >= LEAD_TIME_BUCKETS_HOURS[bucket + 1]:
+            bucket += 1
+        histogram[bucket] += 1
+
+    return {
+        'location_id': location_id,
+        'date_from': start.isoformat(),
+        'date_to': end.isoformat(),
+        'reservations': len(reservations),
+        'utilization_by_table': {
+            'open_hours': round(open_hours(start, end, location_id), 2) if location_id is not None else None,
+            'tables': [
+                {
+                    'table_id': table.table_id,
+                    'table_number': table.table_number,
+                    'capacity': table.capacity,
+                    'reservations': bookings[table.table_id],
+                    'covers': table_covers[table.table_id],
+                    'booked_hours': round(booked_minutes[table.table_id] / 60, 2),
+                    'utilization': rate(booked_minutes[table.table_id] / 60, hours_by_location[table.location_id]),
+                    'seat_fill': rate(table_covers[table.table_id], bookings[table.table_id] * table.capacity)
+                }
+                for table in tables
+            ]
+        },
+        'covers_per_slot': {
+            'nights': len(nights),
+            'slots': [
+                {
+                    'time': slot,
+                    'reservations': slot_reservations[slot],
+                    'covers': sum(slot_covers[slot].values()),
+                    'average_covers_per_night': round(sum(slot_covers[slot].values()) / len(nights), 2),
+                    'covers_by_weekday': {WEEKDAY_NAMES[day]: slot_covers[slot][day] for day in range(7)}
+                }
+                for slot in sorted(slot_reservations)
+            ]
+        },
+        'outcome_rates': {
+            'reservations': len(reservations),
+            'cancelled': sum(cancellations.values()),
+            'no_shows': sum(no_shows.values()),
+            'cancellation_rate': rate(sum(cancellations.values()), len(reservations)),
+            'no_show_rate': rate(sum(no_shows.values()), sum(past_seated.values())),
+            'by_weekday': {
+                WEEKDAY_NAMES[day]: {
+                    'reservations': totals[day],
+                    'cancellation_rate': rate(cancellations[day], totals[day]),
+                    'no_show_rate': rate(no_shows[day], past_seated[day])
+                }
+                for day in range(7)
+            }
+        },
+        'lead_times': {
+            'reservations': len(lead_hours),
+            'mean_hours': round(sum(lead_hours) / len(lead_hours), 2),
+            'percentiles': {
+                f'p{pct}': round(percentile(lead_hours, pct), 2) for pct in LEAD_TIME_PERCENTILES
+            },
+            'histogram': [
+                {
+                    'from_hours': LEAD_TIME_BUCKETS_HOURS[index],
+                    'to_hours': LEAD_TIME_BUCKETS_HOURS[index + 1] if index + 1 < len(LEAD_TIME_BUCKETS_HOURS) else None,
+                    'reservations': histogram[index]
+                }
+                for index in range(len(LEAD_TIME_BUCKETS_HOURS))
+            ]
+        } if lead_hours else {'reservations': 0, 'mean_hours': None, 'percentiles': {}, 'histogram': []}
+    }
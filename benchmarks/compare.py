@@ -0,0 +1,52 @@
+"""
+Compare two benchmark reports produced by benchmarks/run_benchmarks.py
+
+Usage:
+    python -m benchmarks.compare before.json after.json
+"""
+
+import argparse
+import json
+import sys
+
+METRICS = ['p50_ms', 'p95_ms', 'p99_ms', 'queries_per_call']
+
+
+def load_report(path):
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def compare_reports(before, after):
+    """Return rows of (case, metric, before, after, change_pct) for cases present in both reports"""
+    rows = []
+    for name in sorted(set(before['results']) & set(after['results'])):
+        for metric in METRICS:
+            old = before['results'][name].get(metric, 0.0)
+            new = after['results'][name].get(metric, 0.0)
+            change = ((new - old) / old * 100.0) if old else 0.0
+            rows.append((name, metric, old, new, change))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Diff two benchmark reports')
+    parser.add_argument('before')
+    parser.add_argument('after')
+    args = parser.parse_args(argv)
+
+    before = load_report(args.before)
+    after = load_report(args.after)
+
+    print(f"before: {before['meta'].get('git_revision')}  after: {after['meta'].get('git_revision')}")
+    for name, metric, old, new, change in compare_reports(before, after):
+        print(f"{name:<55} {metric:<17} {old:>10.3f} -> {new:>10.3f} ({change:+.1f}%)")
+
+    missing = set(before['results']) ^ set(after['results'])
+    if missing:
+        print(f"\nCases only in one report: {', '.join(sorted(missing))}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Synthetic dataset builder for Café Fausse benchmarks
+Builds on seed_data.py and adds configurable volumes of tables, menu items,
+customers, reservations and newsletter subscribers
+"""
+
+import random
+from dataclasses import dataclass, asdict
+
+from app import app, db
+from models import MenuCategory, MenuItem
+import generate_data
+import seed_data
+
+
+@dataclass
+class DatasetConfig:
+    """Sizes of the generated dataset"""
+    tables: int = 30
+    customers: int = 2000
+    months: int = 6
+    reservations_per_night: int = 40
+    extra_menu_items: int = 0
+    subscribers: int = 5000
+    seed: int = 42
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def build_dataset(config):
+    """
+    Create the schema, run the regular seeds and then bulk load the synthetic
+    rows described by config through generate_data.py. Data is generated from
+    a fixed random seed so two runs with the same config produce the same
+    database.
+    """
+    seed_data.init_database()
+    seed_data.seed_menu_data()
+    seed_data.seed_tables()
+
+    with app.app_context():
+        generate_data.add_tables(config.tables)
+        add_extra_menu_items(config.extra_menu_items, random.Random(config.seed))
+        db.session.commit()
+
+    generate_data.generate(
+        customers=config.customers,
+        days=30 * config.months,
+        future_days=30,
+        avg_per_night=config.reservations_per_night,
+        subscribers=config.subscribers,
+        seed=config.seed,
+        verbose=False
+    )
+
+
+def add_extra_menu_items(count, rng):
+    """Add count generated items spread over the seeded categories"""
+    categories = MenuCategory.query.order_by(MenuCategory.display_order).all()
+    if not categories or count <= 0:
+        return
+
+    for i in range(count):
+        category = categories[i % len(categories)]
+        db.session.add(MenuItem(
+            location_id=category.location_id,
+            category_id=category.category_id,
+            item_name=f'Bench Item {i}',
+            description=f'Generated {category.category_name.lower()} item number {i}',
+            price=round(rng.uniform(3, 40), 2),
+            display_order=100 + i,
+            is_available=True
+        ))
+    db.session.flush()
@@ -0,0 +1,71 @@
+"""
+Memory and speed of the newsletter membership index
+Builds the Bloom filter from services/newsletter_index.py and a plain
+Python set over the same synthetic emails and reports memory, build time,
+lookup latency and the measured false positive rate.
+
+Usage:
+    python -m benchmarks.newsletter_index
+    python -m benchmarks.newsletter_index --emails 1000000 --error-rate 0.001
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+
+
+def synthetic_emails(count, prefix='subscriber'):
+    return [f'{prefix}{index}@example.com' for index in range(count)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the newsletter membership index')
+    parser.add_argument('--emails', type=int, default=1000000)
+    parser.add_argument('--error-rate', type=float, default=0.01)
+    parser.add_argument('--lookups', type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    # services import the app, which must be initialized first
+    from app import app
+    from services.newsletter_index import BloomFilter, WARM_BATCH_SIZE
+
+    emails = synthetic_emails(args.emails)
+    absent = synthetic_emails(args.lookups, prefix='visitor')
+
+    started = time.perf_counter()
+    bloom = BloomFilter(args.emails, args.error_rate)
+    for offset in range(0, len(emails), WARM_BATCH_SIZE):
+        bloom.add_many(emails[offset:offset + WARM_BATCH_SIZE])
+    bloom_build = time.perf_counter() - started
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    members = set(emails)
+    set_build = time.perf_counter() - started
+    # Counts the set's table and nothing else: the strings already exist
+    set_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    string_bytes = sum(sys.getsizeof(email) for email in emails)
+
+    started = time.perf_counter()
+    false_positives = sum(1 for email in absent if email in bloom)
+    bloom_lookup_us = (time.perf_counter() - started) / len(absent) * 1e6
+
+    started = time.perf_counter()
+    for email in absent:
+        email in members
+    set_lookup_us = (time.perf_counter() - started) / len(absent) * 1e6
+
+    print(f"Emails:                 {args.emails:,}")
+    print(f"Bloom filter:           {bloom.bits.nbytes / 1e6:.2f} MB, {bloom.num_hashes} hashes, "
+          f"built in {bloom_build:.2f}s, {bloom_lookup_us:.2f} us/lookup")
+    print(f"False positive rate:    {false_positives / len(absent):.4%} measured, "
+          f"{bloom.expected_error_rate():.4%} expected")
+    print(f"Python set:             {set_bytes / 1e6:.2f} MB table + {string_bytes / 1e6:.2f} MB of strings, "
+          f"built in {set_build:.2f}s, {set_lookup_us:.2f} us/lookup")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,50 @@
+"""
+Hand-written reference for services/schemas.py
+Parses a reservation body the way the views did before the schemas:
+json.loads into a dict, then a pass over required_fields, int() casts and
+fromisoformat. Used by run_benchmarks.py as the baseline for decoding the
+same bytes into a ReservationRequest. Only the structural checks are
+compared; email, calendar and availability checks are the same either way.
+"""
+
+import json
+from datetime import datetime
+
+from services.schemas import ReservationRequest, decode_json
+
+REQUIRED_FIELDS = ['customer_name', 'email', 'reservation_datetime', 'num_of_guests']
+
+
+def parse_reservation_dict(data):
+    """Returns (dict of parsed fields, error message or None)"""
+    try:
+        data = json.loads(data)
+    except ValueError:
+        return None, 'Request body must be valid JSON'
+    if not isinstance(data, dict):
+        return None, 'Request body must be a JSON object'
+    for field in REQUIRED_FIELDS:
+        if field not in data or not data[field]:
+            return None, f'Missing required field: {field}'
+    try:
+        reservation_datetime = datetime.fromisoformat(data['reservation_datetime'].replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None, 'Invalid datetime format. Use ISO format (YYYY-MM-DDTHH:MM:SS)'
+    try:
+        num_guests = int(data['num_of_guests'])
+    except (TypeError, ValueError):
+        return None, 'num_of_guests must be a valid integer'
+    if num_guests < 1 or num_guests > 12:
+        return None, 'Number of guests must be between 1 and 12'
+    return {
+        'customer_name': data['customer_name'],
+        'email': data['email'],
+        'phone_number': data.get('phone_number'),
+        'reservation_datetime': reservation_datetime,
+        'num_of_guests': num_guests
+    }, None
+
+
+def parse_reservation_struct(data):
+    """The same body decoded by the ReservationRequest schema"""
+    return decode_json(data, ReservationRequest)
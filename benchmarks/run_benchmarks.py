@@ -0,0 +1,323 @@
+"""
+Micro and endpoint benchmarks for the Café Fausse API
+
+Builds a synthetic database (see benchmarks/dataset.py), times the
+availability helpers directly and the public endpoints through the Flask
+test client, and writes latency percentiles and SQL query counts to a JSON
+report that can be diffed between commits with benchmarks/compare.py.
+
+Usage:
+    python -m benchmarks.run_benchmarks --output bench_output.json
+    python -m benchmarks.run_benchmarks --database-url postgresql://localhost/fusse_bench --months 12
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def summarize(timings_ms, query_counts, status_codes=None):
+    """Reduce raw per-call measurements to the figures stored in the report"""
+    ordered = sorted(timings_ms)
+    result = {
+        'iterations': len(ordered),
+        'mean_ms': round(sum(ordered) / len(ordered), 4) if ordered else 0.0,
+        'p50_ms': round(percentile(ordered, 50), 4),
+        'p90_ms': round(percentile(ordered, 90), 4),
+        'p95_ms': round(percentile(ordered, 95), 4),
+        'p99_ms': round(percentile(ordered, 99), 4),
+        'max_ms': round(ordered[-1], 4) if ordered else 0.0,
+        'queries_per_call': round(sum(query_counts) / len(query_counts), 2) if query_counts else 0.0,
+    }
+    if status_codes is not None:
+        result['status_codes'] = {str(code): status_codes.count(code) for code in sorted(set(status_codes))}
+    return result
+
+
+class QueryCounter:
+    """
+    Counts SQL statements sent through an engine by the thread that last
+    called reset(). The test client serves requests on the calling thread,
+    so statements from background threads (task pool, availability stream
+    dispatcher, newsletter index sync) are left out.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.thread_id = threading.get_ident()
+
+    def reset(self):
+        self.count = 0
+        self.thread_id = threading.get_ident()
+
+    def __call__(self, *args, **kwargs):
+        if threading.get_ident() == self.thread_id:
+            self.count += 1
+
+
+def run_case(func, iterations, warmup, counter):
+    """Time func() iterations times after warmup calls, returning the summary dict"""
+    for _ in range(warmup):
+        func()
+
+    timings = []
+    queries = []
+    statuses = []
+    for _ in range(iterations):
+        counter.reset()
+        start = time.perf_counter()
+        outcome = func()
+        timings.append((time.perf_counter() - start) * 1000)
+        queries.append(counter.count)
+        if hasattr(outcome, 'status_code'):
+            statuses.append(outcome.status_code)
+
+    return summarize(timings, queries, statuses if statuses else None)
+
+
+def next_weekday(weekday):
+    """Date of the next given weekday (0=Monday) at least one day ahead"""
+    day = datetime.now().date() + timedelta(days=1)
+    while day.weekday() != weekday:
+        day += timedelta(days=1)
+    return day
+
+
+def build_cases(args):
+    """Return an ordered list of (name, callable) benchmark cases"""
+    from app import app, db
+    from models import Customer, Reservation, Newsletter
+    from routes.reservations import get_available_tables, count_available_tables, find_available_table
+    from services.analytics import occupancy_report
+    from benchmarks.analytics_loop import occupancy_report_loop
+    from benchmarks.request_parsing import parse_reservation_dict, parse_reservation_struct
+    from services.locations import ensure_default_location
+
+    client = app.test_client()
+    admin_headers = {'X-Admin-Token': app.config['ADMIN_TOKEN']}
+    rng = random.Random(args.seed)
+
+    friday = next_weekday(4)
+    friday_19 = datetime.combine(friday, datetime.min.time()).replace(hour=19)
+    date_str = friday.isoformat()
+
+    with app.app_context():
+        reservation_ids = [rid for (rid,) in db.session.query(Reservation.reservation_id).limit(500).all()]
+        subscriber_emails = [email for (email,) in db.session.query(Newsletter.email).limit(500).all()]
+        customer_emails = [email for (email,) in db.session.query(Customer.email).limit(500).all()]
+        location_id = ensure_default_location()
+
+    def in_context(func):
+        def wrapper():
+            with app.app_context():
+                return func()
+        return wrapper
+
+    cases = [
+        ('micro.get_available_tables', in_context(lambda: get_available_tables(friday_19, 4, location_id))),
+        ('micro.count_available_tables', in_context(lambda: count_available_tables(friday_19, 2, location_id))),
+        ('micro.find_available_table', in_context(lambda: find_available_table(friday_19, 6, location_id))),
+    ]
+
+    # Decode + validate cost of one reservation body, schema against dict parsing
+    reservation_body = json.dumps({
+        'customer_name': 'Bench Parser',
+        'email': 'bench.parser@example.com',
+        'phone_number': '202-555-0100',
+        'reservation_datetime': friday_19.isoformat(),
+        'num_of_guests': 4
+    }).encode()
+    cases += [
+        ('micro.parse reservation body msgspec', lambda: parse_reservation_struct(reservation_body)),
+        ('micro.parse reservation body dict', lambda: parse_reservation_dict(reservation_body)),
+    ]
+
+    cases += [
+        ('endpoint.GET /api/menu', lambda: client.get('/api/menu')),
+        ('endpoint.GET /api/menu/categories', lambda: client.get('/api/menu/categories')),
+        ('endpoint.GET /api/menu/search', lambda: client.get('/api/menu/search?q=wine')),
+        ('endpoint.GET /api/reservations/slots/available',
+         lambda: client.get(f'/api/reservations/slots/available?date={date_str}&num_of_guests=4')),
+        ('endpoint.POST /api/reservations/check-availability',
+         lambda: client.post('/api/reservations/check-availability', json={
+             'reservation_datetime': friday_19.isoformat(),
+             'num_of_guests': 4
+         })),
+    ]
+
+    cases.append(('endpoint.GET /api/reservations',
+                  lambda: client.get(f'/api/reservations?date_from={date_str}&date_to={date_str}&limit=50',
+                                     headers=admin_headers)))
+
+    # Vectorized analytics against the equivalent ORM loop over the same year
+    report_end = datetime.combine(datetime.now().date(), datetime.min.time()) + timedelta(days=1)
+    report_start = report_end - timedelta(days=365)
+    report_now = datetime.now()
+    with app.app_context():
+        if occupancy_report(report_start, report_end, now=report_now) != \
+                occupancy_report_loop(report_start, report_end, now=report_now):
+            print('WARNING: numpy and pure-Python occupancy reports differ')
+    cases.append(('analytics.occupancy_report numpy',
+                  in_context(lambda: occupancy_report(report_start, report_end))))
+    cases.append(('analytics.occupancy_report python loop',
+                  in_context(lambda: occupancy_report_loop(report_start, report_end))))
+    cases.append(('endpoint.GET /api/admin/reports/occupancy',
+                  lambda: client.get('/api/admin/reports/occupancy', headers=admin_headers)))
+
+    if reservation_ids:
+        cases.append(('endpoint.GET /api/reservations/<id>',
+                      lambda: client.get(f'/api/reservations/{rng.choice(reservation_ids)}')))
+    if subscriber_emails:
+        cases.append(('endpoint.GET /api/newsletter/check/<email>',
+                      lambda: client.get(f'/api/newsletter/check/{rng.choice(subscriber_emails)}')))
+    if customer_emails:
+        cases.append(('endpoint.GET /api/customers/history',
+                      lambda: client.get(f'/api/customers/history?email={rng.choice(customer_emails)}',
+                                         headers=admin_headers)))
+
+    if args.include_writes:
+        # Writes change the dataset, so they always run last
+        counter = {'n': 0}
+
+        def create_reservation():
+            counter['n'] += 1
+            day = datetime.now().date() + timedelta(days=rng.randint(1, 28))
+            slot = datetime.combine(day, datetime.min.time()).replace(hour=17) + timedelta(minutes=30 * rng.randint(0, 4))
+            return client.post('/api/reservations', json={
+                'customer_name': 'Bench Writer',
+                'email': f'bench.writer{counter["n"] % 200}@example.com',
+                'reservation_datetime': slot.isoformat(),
+                'num_of_guests': rng.randint(1, 6)
+            })
+
+        def subscribe():
+            counter['n'] += 1
+            return client.post('/api/newsletter/subscribe', json={
+                'email': f'bench.new{counter["n"]}@example.com'
+            })
+
+        cases.append(('endpoint.POST /api/reservations', create_reservation))
+        cases.append(('endpoint.POST /api/newsletter/subscribe', subscribe))
+
+    return cases
+
+
+def git_revision():
+    """Current commit hash, or None outside a git checkout"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Run Café Fausse API benchmarks')
+    parser.add_argument('--database-url', help='Database to benchmark against (default: fresh SQLite file)')
+    parser.add_argument('--output', default='bench_output.json', help='Where to write the JSON report')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--tables', type=int, default=30)
+    parser.add_argument('--customers', type=int, default=2000)
+    parser.add_argument('--months', type=int, default=6)
+    parser.add_argument('--reservations-per-night', type=int, default=40)
+    parser.add_argument('--extra-menu-items', type=int, default=0)
+    parser.add_argument('--subscribers', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--skip-dataset', action='store_true', help='Reuse an already populated database')
+    parser.add_argument('--include-writes', action='store_true', help='Also benchmark POST endpoints that insert rows')
+    parser.add_argument('--only', action='append', default=[], help='Run only cases whose name contains this text')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.database_url:
+        database_url = args.database_url
+    else:
+        database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='fusse-bench-'), 'bench.db')
+    # app.py reads DATABASE_URL at import time, so it must be set first
+    os.environ['DATABASE_URL'] = database_url
+    # Keep subscribe timings independent of DNS
+    os.environ.setdefault('EMAIL_RESOLVER', 'stub')
+    os.environ.setdefault('ADMIN_TOKEN', 'bench-admin-token')
+    # Run post-commit tasks inline so their work is part of the request, not a
+    # background thread racing the next iteration
+    os.environ.setdefault('TASK_BACKEND', 'sync')
+
+    from sqlalchemy import event
+    from app import app, db
+    from benchmarks.dataset import DatasetConfig, build_dataset
+
+    config = DatasetConfig(
+        tables=args.tables,
+        customers=args.customers,
+        months=args.months,
+        reservations_per_night=args.reservations_per_night,
+        extra_menu_items=args.extra_menu_items,
+        subscribers=args.subscribers,
+        seed=args.seed
+    )
+
+    if not args.skip_dataset:
+        started = time.perf_counter()
+        build_dataset(config)
+        print(f"Dataset built in {time.perf_counter() - started:.1f}s")
+
+    counter = QueryCounter()
+    with app.app_context():
+        engine = db.engine
+        dialect = engine.dialect.name
+    event.listen(engine, 'before_cursor_execute', counter)
+
+    results = {}
+    try:
+        for name, func in build_cases(args):
+            if args.only and not any(fragment in name for fragment in args.only):
+                continue
+            results[name] = run_case(func, args.iterations, args.warmup, counter)
+            print(f"{name:<55} p50={results[name]['p50_ms']:>9.3f}ms "
+                  f"p95={results[name]['p95_ms']:>9.3f}ms queries={results[name]['queries_per_call']}")
+    finally:
+        event.remove(engine, 'before_cursor_execute', counter)
+
+    report = {
+        'meta': {
+            'git_revision': git_revision(),
+            'generated_at': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'database': dialect,
+            'iterations': args.iterations,
+            'warmup': args.warmup,
+            'dataset': config.to_dict(),
+        },
+        'results': results
+    }
+
+    with open(args.output, 'w') as fh:
+        json.dump(report, fh, indent=2, sort_keys=True)
+        fh.write('\n')
+    print(f"\nReport written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,368 @@
+"""
+High-volume synthetic data generator for Café Fausse
+Produces customers, reservations and newsletter subscribers with realistic
+distributions (weekend peaks, peak seatings, party-size mix, cancellations,
+no-shows, booking lead times) and loads them in bulk. Tables and
+reservations belong to DEFAULT_LOCATION (set it to fill another location),
+and bookings fall within that location's operating calendar, date
+exceptions included.
+
+Loading uses PostgreSQL COPY when available and batched executemany
+otherwise, so millions of rows can be generated in minutes rather than hours.
+
+Usage:
+    python generate_data.py --customers 200000 --days 730 --subscribers 1000000
+    python generate_data.py --tables 120 --days 1825 --method values --batch-size 5000
+"""
+
+import argparse
+import bisect
+import csv
+import io
+import math
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select, func
+
+from app import app, db
+from models import Customer, Reservation, Newsletter, Table
+from services.locations import ensure_default_location
+from services.customer_history import refresh_customer_stats
+from services.calendar import MIN_RESERVATION_DURATION, operating_calendar, reservation_minutes
+from services.email_verification import VERIFIED
+import seed_data
+
+# Relative demand per weekday (0=Monday); Friday and Saturday are the peaks
+WEEKDAY_DEMAND = {0: 0.55, 1: 0.6, 2: 0.7, 3: 0.85, 4: 1.3, 5: 1.45, 6: 0.9}
+
+# (party size, weight) - couples and foursomes dominate, large groups are rare
+PARTY_SIZE_WEIGHTS = [(1, 4), (2, 42), (3, 10), (4, 24), (5, 6), (6, 7), (7, 2), (8, 3), (10, 1), (12, 1)]
+
+# Seatings are 30-minute slots from opening (17:00 by default); weights peak
+# around 19:00-19:30 and later slots of longer nights take the last weight
+SLOT_WEIGHTS = [4, 6, 10, 12, 16, 16, 13, 9, 6, 4, 2, 1]
+
+CANCELLATION_RATE = 0.10
+NO_SHOW_RATE = 0.03
+MEAN_LEAD_TIME_HOURS = 7 * 24
+MAX_LEAD_TIME_HOURS = 90 * 24
+
+DEFAULT_BATCH_SIZE = 10000
+LOAD_METHODS = ['auto', 'copy', 'values', 'executemany']
+
+CUSTOMER_COLUMNS = ['name', 'email', 'phone_number', 'created_at']
+RESERVATION_COLUMNS = ['customer_id', 'location_id', 'table_id', 'reservation_datetime', 'num_of_guests',
+                       'duration_minutes', 'status', 'created_at']
+NEWSLETTER_COLUMNS = ['email', 'email_domain', 'date_subscribed', 'is_active', 'verification_status']
+
+
+def night_hours(location_id, start_day, days):
+    """
+    (night, (opening, closing) or None when closed) for every night in
+    [start_day, start_day + days), from the operating calendar the slots
+    endpoint uses, past date exceptions included
+    """
+    nights = [start_day + timedelta(days=day_offset) for day_offset in range(days)]
+    if not nights:
+        return []
+    hours = operating_calendar.hours_between(location_id, nights[0].date(), nights[-1].date())
+    return [(night, hours[night.date()]) for night in nights]
+
+
+def customer_rows(count, offset, rng, now):
+    """Yield customer tuples in CUSTOMER_COLUMNS order"""
+    for i in range(offset, offset + count):
+        yield (
+            f'Guest {i}',
+            f'guest{i}@example.com',
+            f'555-{i % 10000000:07d}',
+            now - timedelta(days=rng.randint(0, 1500))
+        )
+
+
+def subscriber_rows(count, offset, rng, now, unsubscribe_rate=0.08):
+    """
+    Yield newsletter tuples in NEWSLETTER_COLUMNS order. Generated
+    subscribers are loaded verified: their domain is a placeholder, and
+    queueing domain checks would send a welcome mail to every one of them.
+    """
+    for i in range(offset, offset + count):
+        yield (
+            f'subscriber{i}@example.com',
+            'example.com',
+            now - timedelta(days=rng.randint(0, 1500), seconds=rng.randint(0, 86400)),
+            rng.random() >= unsubscribe_rate,
+            VERIFIED
+        )
+
+
+def reservation_rows(rng, customer_ids, location_id, tables, nights, avg_per_night, now):
+    """
+    Yield reservation tuples in RESERVATION_COLUMNS order for every open
+    night in nights (see night_hours). Tables are never double-booked: each night
+    keeps a bitmask of occupied half-hour slots per table and parties get the
+    smallest free table that fits, the way a host would seat them. Each
+    party holds its table for the duration services/calendar.py gives it.
+    """
+    tables = sorted(tables, key=lambda t: (t[1], t[0]))
+    capacities = [capacity for _, capacity in tables]
+    party_sizes = [size for size, _ in PARTY_SIZE_WEIGHTS]
+    party_weights = [weight for _, weight in PARTY_SIZE_WEIGHTS]
+    customer_count = len(customer_ids)
+    if not tables or not customer_count:
+        return
+
+    for night, hours in nights:
+        if hours is None:
+            continue  # Closed that night, by its weekday hours or a date exception
+        opening, closing = hours
+        night_slots = int((closing - opening).total_seconds() // 1800)
+        last_slot = night_slots - math.ceil(MIN_RESERVATION_DURATION.total_seconds() / 1800)
+        if last_slot < 0:
+            continue  # Open too briefly for the shortest booking
+        slot_indices = list(range(last_slot + 1))
+        slot_weights = [SLOT_WEIGHTS[min(slot, len(SLOT_WEIGHTS) - 1)] for slot in slot_indices]
+        occupied = [0] * len(tables)
+        is_past = night < now
+
+        demand = avg_per_night * WEEKDAY_DEMAND[night.weekday()] * rng.uniform(0.8, 1.2)
+        for _ in range(int(round(demand))):
+            guests = rng.choices(party_sizes, party_weights)[0]
+            first_fit = bisect.bisect_left(capacities, guests)
+            if first_fit == len(tables):
+                continue
+
+            slot = rng.choices(slot_indices, slot_weights)[0]
+            reservation_datetime = opening + timedelta(minutes=30 * slot)
+            minutes = reservation_minutes(guests, reservation_datetime)
+            span = math.ceil(minutes / 30)
+            if slot + span > night_slots:
+                continue  # Would run past closing
+            mask = ((1 << span) - 1) << slot
+            for index in range(first_fit, len(tables)):
+                if not occupied[index] & mask:
+                    occupied[index] |= mask
+                    break
+            else:
+                continue  # Fully booked for this seating; the guest goes elsewhere
+
+            roll = rng.random()
+            if roll < CANCELLATION_RATE:
+                status = 'cancelled'
+            elif is_past and roll < CANCELLATION_RATE + NO_SHOW_RATE:
+                status = 'confirmed'  # No-show: never marked completed
+            elif is_past:
+                status = 'completed'
+            else:
+                status = 'confirmed'
+
+            lead_hours = min(MAX_LEAD_TIME_HOURS, max(1.0, rng.expovariate(1.0 / MEAN_LEAD_TIME_HOURS)))
+            # Returning guests book more often: skew towards the lower ids
+            customer_id = customer_ids[int(customer_count * rng.random() ** 2)]
+
+            yield (
+                customer_id,
+                location_id,
+                tables[index][0],
+                reservation_datetime,
+                guests,
+                minutes,
+                status,
+                reservation_datetime - timedelta(hours=lead_hours)
+            )
+
+
+def batched(rows, size):
+    """Group an iterable of rows into lists of at most size rows"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def copy_value(value):
+    """Render a Python value for PostgreSQL CSV COPY"""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    return value
+
+
+def copy_batch(connection, table_name, columns, batch):
+    """Stream one batch through COPY ... FROM STDIN (PostgreSQL only)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in batch:
+        writer.writerow([copy_value(value) for value in row])
+    buffer.seek(0)
+
+    quoted_columns = ', '.join(f'"{column}"' for column in columns)
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(f'COPY "{table_name}" ({quoted_columns}) FROM STDIN WITH (FORMAT csv)', buffer)
+    finally:
+        cursor.close()
+
+
+def resolve_method(method, dialect):
+    """Pick the concrete load method for a dialect"""
+    if method == 'auto':
+        return 'copy' if dialect == 'postgresql' else 'executemany'
+    if method == 'copy' and dialect != 'postgresql':
+        raise ValueError('COPY loading requires PostgreSQL')
+    return method
+
+
+def bulk_load(connection, model, columns, rows, method, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Load rows (tuples in columns order) into model's table and return the row
+    count. method is one of 'copy', 'values' (multi-row INSERT ... VALUES)
+    or 'executemany'.
+    """
+    table = model.__table__
+    if method == 'values':
+        # Stay below SQLite's bound parameter limit
+        batch_size = max(1, min(batch_size, 30000 // len(columns)))
+
+    total = 0
+    for batch in batched(rows, batch_size):
+        if method == 'copy':
+            copy_batch(connection, table.name, columns, batch)
+        elif method == 'values':
+            connection.execute(insert(table).values([dict(zip(columns, row)) for row in batch]))
+        else:
+            connection.execute(insert(table), [dict(zip(columns, row)) for row in batch])
+        total += len(batch)
+    return total
+
+
+def generate(customers=10000, days=365, future_days=60, avg_per_night=None, subscribers=50000,
+             method='auto', batch_size=DEFAULT_BATCH_SIZE, seed=42, verbose=True):
+    """
+    Generate and bulk load a dataset, returning per-table row counts and
+    throughput. Reservations cover the past days nights plus future_days
+    upcoming nights. avg_per_night defaults to about two seatings per table.
+    """
+    rng = random.Random(seed)
+    now = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    stats = {}
+
+    def log(message):
+        if verbose:
+            print(message)
+
+    with app.app_context():
+        location_id = ensure_default_location()
+        # Read before the load transaction starts so generating rows never queries
+        nights = night_hours(location_id, now - timedelta(days=days), days + future_days)
+        engine = db.engine
+        load_method = resolve_method(method, engine.dialect.name)
+        log(f"Loading with {load_method} into {engine.dialect.name}")
+
+        with engine.begin() as connection:
+            if engine.dialect.name == 'sqlite':
+                connection.exec_driver_sql('PRAGMA synchronous = OFF')
+
+            tables = [tuple(row) for row in connection.execute(
+                select(Table.table_id, Table.capacity).where(
+                    Table.location_id == location_id,
+                    Table.is_active == True
+                )
+            )]
+            if avg_per_night is None:
+                avg_per_night = len(tables) * 2
+
+            def timed_load(name, model, columns, rows):
+                started = time.perf_counter()
+                count = bulk_load(connection, model, columns, rows, load_method, batch_size)
+                elapsed = time.perf_counter() - started
+                stats[name] = {
+                    'rows': count,
+                    'seconds': round(elapsed, 3),
+                    'rows_per_minute': int(count / elapsed * 60) if elapsed else count
+                }
+                log(f"{name}: {count} rows in {elapsed:.1f}s ({stats[name]['rows_per_minute']} rows/min)")
+
+            customer_offset = connection.execute(select(func.count()).select_from(Customer)).scalar()
+            timed_load('customer', Customer, CUSTOMER_COLUMNS,
+                       customer_rows(customers, customer_offset, rng, now))
+
+            customer_ids = list(connection.execute(
+                select(Customer.customer_id).order_by(Customer.customer_id)
+            ).scalars())
+
+            timed_load('reservation', Reservation, RESERVATION_COLUMNS,
+                       reservation_rows(rng, customer_ids, location_id, tables, nights, avg_per_night, now))
+
+            # The bulk load bypasses the ORM events that keep these current
+            started = time.perf_counter()
+            refresh_customer_stats(connection)
+            log(f'customer visit stats refreshed in {time.perf_counter() - started:.1f}s')
+
+            subscriber_offset = connection.execute(select(func.count()).select_from(Newsletter)).scalar()
+            timed_load('newsletter', Newsletter, NEWSLETTER_COLUMNS,
+                       subscriber_rows(subscribers, subscriber_offset, rng, now))
+
+    return stats
+
+
+def add_tables(total_tables):
+    """
+    Top up the default location's seeded tables to total_tables, cycling
+    through the usual capacities
+    """
+    location_id = ensure_default_location()
+    existing = Table.query.filter_by(location_id=location_id).count()
+    capacities = [2, 4, 4, 6, 8]
+    for number in range(existing + 1, total_tables + 1):
+        db.session.add(Table(
+            location_id=location_id,
+            table_number=number,
+            capacity=capacities[number % len(capacities)],
+            is_active=True
+        ))
+    db.session.commit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a large synthetic Café Fausse dataset')
+    parser.add_argument('--customers', type=int, default=10000)
+    parser.add_argument('--days', type=int, default=365, help='Nights of history to generate')
+    parser.add_argument('--future-days', type=int, default=60, help='Upcoming nights to generate')
+    parser.add_argument('--avg-per-night', type=float, help='Average bookings per night (default: 2 per table)')
+    parser.add_argument('--subscribers', type=int, default=50000)
+    parser.add_argument('--tables', type=int, help='Top up the restaurant to this many tables first')
+    parser.add_argument('--method', choices=LOAD_METHODS, default='auto')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    seed_data.init_database()
+    seed_data.seed_tables()
+    if args.tables:
+        with app.app_context():
+            add_tables(args.tables)
+
+    generate(
+        customers=args.customers,
+        days=args.days,
+        future_days=args.future_days,
+        avg_per_night=args.avg_per_night,
+        subscribers=args.subscribers,
+        method=args.method,
+        batch_size=args.batch_size,
+        seed=args.seed
+    )
+
+
+if __name__ == '__main__':
+    main()
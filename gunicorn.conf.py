@@ -0,0 +1,53 @@
+"""
+Gunicorn configuration for the Café Fausse API
+
+    gunicorn app:app
+
+With preload_app (GUNICORN_PRELOAD, default true) the master imports the
+app and warms its caches once, then forks, so every worker starts with
+the menu snapshots, calendar and newsletter index already in memory.
+Each worker then drops the database connections it inherited and warms
+up again in post_worker_init (mostly cache hits, plus its own pooled
+connection and near-term booking queries) before it accepts traffic.
+Warm-up time counts against the worker timeout, hence the higher default.
+With TASK_BACKEND=database each worker then starts its job poller (the
+master does not, or it would claim jobs no worker is running).
+
+Workers are threaded (gthread) because the availability stream
+(/api/reservations/slots/stream) holds a request thread for as long as a
+booking page is open. With sync workers four open pages would block the
+whole API and every stream would be killed at the worker timeout; gthread
+workers keep heartbeating while their threads serve long responses. Each
+worker accepts at most AVAILABILITY_STREAM_MAX_PER_WORKER streams (default
+8), leaving the rest of its GUNICORN_THREADS for ordinary requests.
+"""
+
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+
+def when_ready(server):
+    # Runs in the master before the first worker is forked
+    if server.cfg.preload_app:
+        from services.warmup import release_connections, warm_up
+        warm_up()
+        release_connections()
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        from services.warmup import release_connections
+        release_connections(close=False)
+
+
+def post_worker_init(worker):
+    from services.tasks import start_worker
+    from services.warmup import warm_up
+    warm_up()
+    start_worker()
@@ -0,0 +1,111 @@
+"""Add locations
+
+Revision ID: 5aed81cc8356
+Revises: 2ba639d4a69b
+Create Date: 2026-10-19 02:48:25.899350
+
+"""
+import os
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5aed81cc8356'
+down_revision = '2ba639d4a69b'
+branch_labels = None
+depends_on = None
+
+LOCATION_TABLES = ['table', 'reservation', 'reservation_archive', 'waitlist_entry', 'menu_category', 'menu_item']
+NAMING_CONVENTION = {'uq': 'uq_%(table_name)s_%(column_0_name)s'}
+
+
+def upgrade():
+    location = op.create_table('location',
+    sa.Column('location_id', sa.Integer(), nullable=False),
+    sa.Column('slug', sa.String(length=50), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('address', sa.String(length=255), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('location_id'),
+    sa.UniqueConstraint('slug')
+    )
+    # Everything that exists so far belongs to the original restaurant,
+    # which becomes location 1 (the first row of the new table)
+    op.bulk_insert(location, [{
+        'slug': os.environ.get('DEFAULT_LOCATION', 'main'),
+        'name': 'Café Fausse',
+        'address': '1234 Culinary Ave, Suite 100, Washington, DC 20002',
+        'is_active': True,
+        'created_at': datetime.utcnow()
+    }])
+
+    for table_name in LOCATION_TABLES:
+        # The server default fills existing rows and is dropped again below
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('location_id', sa.Integer(), nullable=False, server_default='1'))
+            batch_op.create_foreign_key(f'fk_{table_name}_location_id', 'location', ['location_id'], ['location_id'])
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.alter_column('location_id', existing_type=sa.Integer(), server_default=None)
+
+    with op.batch_alter_table('menu_category', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_menu_category_location_id'), ['location_id'], unique=False)
+
+    with op.batch_alter_table('menu_item', schema=None) as batch_op:
+        batch_op.create_index('ix_menu_item_location_available', ['location_id', 'is_available'], unique=False)
+
+    # On PostgreSQL these are created on the partitioned parent and cascade to every partition
+    with op.batch_alter_table('reservation', schema=None) as batch_op:
+        batch_op.create_index('ix_reservation_location_datetime_id', ['location_id', 'reservation_datetime', 'reservation_id'], unique=False)
+
+    with op.batch_alter_table('reservation_archive', schema=None) as batch_op:
+        batch_op.create_index('ix_reservation_archive_location_datetime', ['location_id', 'reservation_datetime'], unique=False)
+
+    # Table numbers are only unique within a location now. The old
+    # constraint was unnamed; SQLite's batch mode finds it through the
+    # naming convention, PostgreSQL gave it its default name.
+    bind = op.get_bind()
+    old_unique = 'table_table_number_key' if bind.dialect.name == 'postgresql' else 'uq_table_table_number'
+    with op.batch_alter_table('table', schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.drop_constraint(old_unique, type_='unique')
+        batch_op.create_index('ix_table_location_capacity', ['location_id', 'capacity'], unique=False)
+        batch_op.create_unique_constraint('uq_table_location_number', ['location_id', 'table_number'])
+
+    with op.batch_alter_table('waitlist_entry', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_waitlist_entry_match'))
+        batch_op.create_index('ix_waitlist_entry_match', ['location_id', 'waitlist_date', 'status', 'num_of_guests', 'requested_datetime'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('waitlist_entry', schema=None) as batch_op:
+        batch_op.drop_index('ix_waitlist_entry_match')
+        batch_op.create_index(batch_op.f('ix_waitlist_entry_match'), ['waitlist_date', 'status', 'num_of_guests', 'requested_datetime'], unique=False)
+
+    bind = op.get_bind()
+    old_unique = 'table_table_number_key' if bind.dialect.name == 'postgresql' else 'uq_table_table_number'
+    with op.batch_alter_table('table', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_table_location_number', type_='unique')
+        batch_op.drop_index('ix_table_location_capacity')
+        batch_op.create_unique_constraint(old_unique, ['table_number'])
+
+    with op.batch_alter_table('reservation_archive', schema=None) as batch_op:
+        batch_op.drop_index('ix_reservation_archive_location_datetime')
+
+    with op.batch_alter_table('reservation', schema=None) as batch_op:
+        batch_op.drop_index('ix_reservation_location_datetime_id')
+
+    with op.batch_alter_table('menu_item', schema=None) as batch_op:
+        batch_op.drop_index('ix_menu_item_location_available')
+
+    with op.batch_alter_table('menu_category', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_menu_category_location_id'))
+
+    for table_name in reversed(LOCATION_TABLES):
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.drop_constraint(f'fk_{table_name}_location_id', type_='foreignkey')
+            batch_op.drop_column('location_id')
+
+    op.drop_table('location')
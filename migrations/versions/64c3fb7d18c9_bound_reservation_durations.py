@@ -0,0 +1,40 @@
+"""Bound reservation durations
+
+Revision ID: 64c3fb7d18c9
+Revises: 6bb4222168b2
+Create Date: 2026-10-19 03:18:28.274611
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '64c3fb7d18c9'
+down_revision = '6bb4222168b2'
+branch_labels = None
+depends_on = None
+
+# models.MAX_DURATION_MINUTES when this revision was written
+MAX_DURATION_MINUTES = 360
+DURATION_CHECKS = {
+    'reservation': 'ck_reservation_duration_minutes',
+    'reservation_archive': 'ck_reservation_archive_duration_minutes',
+}
+
+
+def upgrade():
+    # Overlap queries look back MAX_DURATION_MINUTES from a slot, so no
+    # stored reservation may be longer. Fails if an earlier policy booked
+    # longer holds; shortening them would hide real bookings
+    for table_name, constraint_name in DURATION_CHECKS.items():
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.create_check_constraint(
+                constraint_name, f'duration_minutes BETWEEN 1 AND {MAX_DURATION_MINUTES}'
+            )
+
+
+def downgrade():
+    for table_name, constraint_name in DURATION_CHECKS.items():
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.drop_constraint(constraint_name, type_='check')
@@ -0,0 +1,113 @@
+"""Case-insensitive email indexes
+
+Revision ID: 6bb4222168b2
+Revises: a204f271fb21
+Create Date: 2026-10-19 03:08:09.478253
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6bb4222168b2'
+down_revision = 'a204f271fb21'
+branch_labels = None
+depends_on = None
+
+EMAIL_TABLES = ['customer', 'newsletter']
+CUSTOMER_REFERENCES = ['reservation', 'reservation_archive', 'waitlist_entry']
+NAMING_CONVENTION = {'uq': 'uq_%(table_name)s_%(column_0_name)s'}
+
+VISITS = """(
+    SELECT customer_id, num_of_guests, reservation_datetime FROM reservation WHERE status = 'completed'
+    UNION ALL
+    SELECT customer_id, num_of_guests, reservation_datetime FROM reservation_archive WHERE status = 'completed'
+) AS visits"""
+
+
+def old_unique(table_name):
+    if op.get_bind().dialect.name == 'postgresql':
+        return f'{table_name}_email_key'
+    return f'uq_{table_name}_email'
+
+
+def merge_duplicate_customers():
+    """
+    Fold customers whose emails differ only in case or surrounding spaces
+    into the oldest of them: their reservations and waitlist entries move
+    over, a missing phone number is filled in and the visit aggregates are
+    recomputed
+    """
+    op.execute("""
+        CREATE TEMPORARY TABLE customer_merge AS
+        SELECT customer.customer_id AS duplicate_id, duplicates.keep_id
+        FROM customer
+        JOIN (
+            SELECT lower(trim(email)) AS email_key, min(customer_id) AS keep_id
+            FROM customer
+            GROUP BY lower(trim(email))
+            HAVING count(*) > 1
+        ) AS duplicates ON lower(trim(customer.email)) = duplicates.email_key
+        WHERE customer.customer_id <> duplicates.keep_id
+    """)
+    for table_name in CUSTOMER_REFERENCES:
+        op.execute(f"""
+            UPDATE {table_name}
+            SET customer_id = (SELECT keep_id FROM customer_merge WHERE duplicate_id = {table_name}.customer_id)
+            WHERE customer_id IN (SELECT duplicate_id FROM customer_merge)
+        """)
+    op.execute("""
+        UPDATE customer
+        SET phone_number = (
+            SELECT max(duplicate.phone_number)
+            FROM customer_merge JOIN customer AS duplicate ON duplicate.customer_id = customer_merge.duplicate_id
+            WHERE customer_merge.keep_id = customer.customer_id
+        )
+        WHERE phone_number IS NULL AND customer_id IN (SELECT keep_id FROM customer_merge)
+    """)
+    op.execute('DELETE FROM customer WHERE customer_id IN (SELECT duplicate_id FROM customer_merge)')
+    op.execute(f"""
+        UPDATE customer SET
+            visit_count = (SELECT count(*) FROM {VISITS} WHERE visits.customer_id = customer.customer_id),
+            visit_guests = (SELECT coalesce(sum(visits.num_of_guests), 0) FROM {VISITS}
+                            WHERE visits.customer_id = customer.customer_id),
+            last_visit_at = (SELECT max(visits.reservation_datetime) FROM {VISITS}
+                             WHERE visits.customer_id = customer.customer_id)
+        WHERE customer_id IN (SELECT keep_id FROM customer_merge)
+    """)
+    op.execute('DROP TABLE customer_merge')
+
+
+def merge_duplicate_subscriptions():
+    """Keep one subscription per address: the oldest active one, else the oldest"""
+    op.execute("""
+        DELETE FROM newsletter
+        WHERE newsletter_id NOT IN (
+            SELECT coalesce(min(CASE WHEN is_active THEN newsletter_id END), min(newsletter_id))
+            FROM newsletter
+            GROUP BY lower(trim(email))
+        )
+    """)
+
+
+def upgrade():
+    merge_duplicate_customers()
+    merge_duplicate_subscriptions()
+
+    # Store every address normalized (see models.normalize_email), then
+    # enforce uniqueness on lower(email) so differently cased inserts that
+    # bypass the ORM still conflict, and lookups probe one index
+    for table_name in EMAIL_TABLES:
+        op.execute(f'UPDATE {table_name} SET email = lower(trim(email)) WHERE email <> lower(trim(email))')
+        with op.batch_alter_table(table_name, schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+            batch_op.drop_constraint(old_unique(table_name), type_='unique')
+        op.create_index(f'uq_{table_name}_email_lower', table_name, [sa.text('lower(email)')], unique=True)
+
+
+def downgrade():
+    # Merged customers and subscriptions are not split up again
+    for table_name in reversed(EMAIL_TABLES):
+        op.drop_index(f'uq_{table_name}_email_lower', table_name=table_name)
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.create_unique_constraint(old_unique(table_name), ['email'])
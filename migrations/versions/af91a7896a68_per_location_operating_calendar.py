@@ -0,0 +1,73 @@
+"""Per-location operating calendar
+
+Revision ID: af91a7896a68
+Revises: 64c3fb7d18c9
+Create Date: 2026-10-19 03:21:40.850742
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'af91a7896a68'
+down_revision = '64c3fb7d18c9'
+branch_labels = None
+depends_on = None
+
+NAMING_CONVENTION = {'uq': 'uq_%(table_name)s_%(column_0_name)s'}
+
+# table -> (old unique column, new unique constraint, foreign key, copied columns)
+CALENDAR_TABLES = {
+    'operating_hours': ('weekday', 'uq_operating_hours_location_weekday', 'fk_operating_hours_location_id',
+                        ['weekday', 'open_time', 'close_time', 'is_closed']),
+    'calendar_exception': ('exception_date', 'uq_calendar_exception_location_date', 'fk_calendar_exception_location_id',
+                           ['exception_date', 'is_closed', 'open_time', 'close_time', 'reason']),
+}
+
+
+def old_unique(table, column):
+    # The original constraints were unnamed; SQLite's batch mode finds them
+    # through the naming convention, PostgreSQL gave them its default name
+    if op.get_bind().dialect.name == 'postgresql':
+        return f'{table}_{column}_key'
+    return f'uq_{table}_{column}'
+
+
+def upgrade():
+    for table, (column, new_unique, foreign_key, columns) in CALENDAR_TABLES.items():
+        with op.batch_alter_table(table, schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+            batch_op.add_column(sa.Column('location_id', sa.Integer(), nullable=True))
+            batch_op.drop_constraint(old_unique(table, column), type_='unique')
+
+        # The existing calendar applied to every location: give each its own copy
+        column_list = ', '.join(columns)
+        selected = ', '.join(f'c.{name}' for name in columns)
+        op.execute(
+            f'INSERT INTO {table} (location_id, {column_list}) '
+            f'SELECT location.location_id, {selected} FROM {table} c CROSS JOIN location '
+            f'WHERE c.location_id IS NULL'
+        )
+        op.execute(f'DELETE FROM {table} WHERE location_id IS NULL')
+
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('location_id', existing_type=sa.Integer(), nullable=False)
+            batch_op.create_foreign_key(foreign_key, 'location', ['location_id'], ['location_id'])
+            batch_op.create_unique_constraint(new_unique, ['location_id', column])
+
+
+def downgrade():
+    for table, (column, new_unique, foreign_key, columns) in CALENDAR_TABLES.items():
+        # Only one calendar can survive: keep the first location's
+        op.execute(
+            f'DELETE FROM {table} WHERE location_id <> '
+            f'(SELECT MIN(location_id) FROM location)'
+        )
+
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_constraint(new_unique, type_='unique')
+            batch_op.drop_constraint(foreign_key, type_='foreignkey')
+            batch_op.drop_column('location_id')
+
+        with op.batch_alter_table(table, schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+            batch_op.create_unique_constraint(old_unique(table, column), [column])
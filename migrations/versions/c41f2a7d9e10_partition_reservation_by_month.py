@@ -0,0 +1,129 @@
+"""Partition reservation by month and add reservation_archive
+
+Revision ID: c41f2a7d9e10
+Revises: b866785d9e55
+Create Date: 2026-10-19 09:12:03.118402
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41f2a7d9e10'
+down_revision = 'b866785d9e55'
+branch_labels = None
+depends_on = None
+
+# Monthly partitions are created this far ahead of the current month;
+# archive_reservations.py keeps extending the range afterwards
+MONTHS_AHEAD = 12
+
+
+def _add_months(value, months):
+    month_index = value.year * 12 + value.month - 1 + months
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+def upgrade():
+    op.create_table('reservation_archive',
+    sa.Column('reservation_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('table_id', sa.Integer(), nullable=False),
+    sa.Column('reservation_datetime', sa.DateTime(), nullable=False),
+    sa.Column('num_of_guests', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['customer_id'], ['customer.customer_id'], ),
+    sa.ForeignKeyConstraint(['table_id'], ['table.table_id'], ),
+    sa.PrimaryKeyConstraint('reservation_id')
+    )
+    op.create_index('ix_reservation_archive_customer_id', 'reservation_archive', ['customer_id'], unique=False)
+    op.create_index('ix_reservation_archive_reservation_datetime', 'reservation_archive', ['reservation_datetime'], unique=False)
+
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # Declarative partitioning is PostgreSQL only; elsewhere just add the indexes
+        op.create_index('ix_reservation_table_datetime', 'reservation', ['table_id', 'reservation_datetime'], unique=False)
+        op.create_index('ix_reservation_customer_id', 'reservation', ['customer_id'], unique=False)
+        return
+
+    op.execute('ALTER TABLE reservation RENAME TO reservation_unpartitioned')
+    op.execute('ALTER TABLE reservation_unpartitioned RENAME CONSTRAINT reservation_pkey TO reservation_unpartitioned_pkey')
+    op.execute("""
+        CREATE TABLE reservation (
+            reservation_id INTEGER NOT NULL DEFAULT nextval('reservation_reservation_id_seq'),
+            customer_id INTEGER NOT NULL REFERENCES customer (customer_id),
+            table_id INTEGER NOT NULL REFERENCES "table" (table_id),
+            reservation_datetime TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            num_of_guests INTEGER NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE,
+            CONSTRAINT reservation_pkey PRIMARY KEY (reservation_id, reservation_datetime)
+        ) PARTITION BY RANGE (reservation_datetime)
+    """)
+    op.execute('ALTER SEQUENCE reservation_reservation_id_seq OWNED BY reservation.reservation_id')
+    op.execute('CREATE TABLE reservation_default PARTITION OF reservation DEFAULT')
+
+    oldest = bind.execute(sa.text('SELECT min(reservation_datetime) FROM reservation_unpartitioned')).scalar()
+    now = datetime.utcnow()
+    start = _add_months(oldest or now, 0)
+    end = _add_months(now, MONTHS_AHEAD + 1)
+    while start < end:
+        next_start = _add_months(start, 1)
+        op.execute(
+            f"CREATE TABLE reservation_y{start.year}m{start.month:02d} PARTITION OF reservation "
+            f"FOR VALUES FROM ('{start.isoformat(sep=' ')}') TO ('{next_start.isoformat(sep=' ')}')"
+        )
+        start = next_start
+
+    op.execute("""
+        INSERT INTO reservation (reservation_id, customer_id, table_id, reservation_datetime,
+                                 num_of_guests, status, created_at)
+        SELECT reservation_id, customer_id, table_id, reservation_datetime,
+               num_of_guests, status, created_at
+        FROM reservation_unpartitioned
+    """)
+    op.execute('DROP TABLE reservation_unpartitioned')
+
+    op.create_index('ix_reservation_table_datetime', 'reservation', ['table_id', 'reservation_datetime'], unique=False)
+    op.create_index('ix_reservation_customer_id', 'reservation', ['customer_id'], unique=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    op.drop_index('ix_reservation_customer_id', table_name='reservation')
+    op.drop_index('ix_reservation_table_datetime', table_name='reservation')
+
+    if bind.dialect.name == 'postgresql':
+        op.execute('ALTER TABLE reservation RENAME TO reservation_partitioned')
+        op.execute('ALTER TABLE reservation_partitioned RENAME CONSTRAINT reservation_pkey TO reservation_partitioned_pkey')
+        op.execute("""
+            CREATE TABLE reservation (
+                reservation_id INTEGER NOT NULL DEFAULT nextval('reservation_reservation_id_seq'),
+                customer_id INTEGER NOT NULL REFERENCES customer (customer_id),
+                table_id INTEGER NOT NULL REFERENCES "table" (table_id),
+                reservation_datetime TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+                num_of_guests INTEGER NOT NULL,
+                status VARCHAR(20) NOT NULL,
+                created_at TIMESTAMP WITHOUT TIME ZONE,
+                CONSTRAINT reservation_pkey PRIMARY KEY (reservation_id)
+            )
+        """)
+        op.execute('ALTER SEQUENCE reservation_reservation_id_seq OWNED BY reservation.reservation_id')
+        op.execute("""
+            INSERT INTO reservation (reservation_id, customer_id, table_id, reservation_datetime,
+                                     num_of_guests, status, created_at)
+            SELECT reservation_id, customer_id, table_id, reservation_datetime,
+                   num_of_guests, status, created_at
+            FROM reservation_partitioned
+        """)
+        # Dropping the parent drops every monthly partition with it
+        op.execute('DROP TABLE reservation_partitioned')
+
+    op.drop_index('ix_reservation_archive_reservation_datetime', table_name='reservation_archive')
+    op.drop_index('ix_reservation_archive_customer_id', table_name='reservation_archive')
+    op.drop_table('reservation_archive')
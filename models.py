@@ -1,33 +1,92 @@
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from sqlalchemy.orm import validates
+from datetime import datetime, timedelta
 from app import db
 
+# Longest a reservation can hold its table, whatever the duration policy
+# (services/calendar.py) was when it was booked; overlap queries look back
+# this far, so a check constraint holds every stored row to it
+MAX_DURATION_MINUTES = 360
+
+def normalize_email(email):
+    """Canonical form of an email address used for lookups and storage"""
+    return email.strip().lower()
+
+def email_matches(column, email):
+    """Case-insensitive match on an email column, answered by its unique lower(email) index"""
+    return db.func.lower(column) == normalize_email(email)
+
+class Location(db.Model):
+    __tablename__ = 'location'
+    
+    location_id = db.Column(db.Integer, primary_key=True)
+    slug = db.Column(db.String(50), nullable=False, unique=True)  # Used in ?location= on the API
+    name = db.Column(db.String(100), nullable=False)
+    address = db.Column(db.String(255), nullable=True)
+    is_active = db.Column(db.Boolean, default=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'location_id': self.location_id,
+            'slug': self.slug,
+            'name': self.name,
+            'address': self.address,
+            'is_active': self.is_active
+        }
+
 class Customer(db.Model):
     __tablename__ = 'customer'
     
     customer_id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    email = db.Column(db.String(255), nullable=False, unique=True)
+    email = db.Column(db.String(255), nullable=False)  # Stored normalized; unique on lower(email)
     phone_number = db.Column(db.String(20), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Visit aggregates over completed reservations, live and archived;
+    # maintained on reservation writes by services/customer_history.py.
+    # Server defaults so bulk loads (COPY) that skip the columns still work
+    visit_count = db.Column(db.Integer, server_default='0', nullable=False)
+    visit_guests = db.Column(db.Integer, server_default='0', nullable=False)  # Sum of num_of_guests over visits
+    last_visit_at = db.Column(db.DateTime, nullable=True)
     
     # Relationships
     reservations = db.relationship('Reservation', backref='customer', lazy=True)
     
+    @validates('email')
+    def validate_email(self, key, email):
+        return normalize_email(email) if email is not None else email
+    
+    @property
+    def average_party_size(self):
+        if not self.visit_count:
+            return None
+        return round(self.visit_guests / self.visit_count, 1)
+    
     def to_dict(self):
         return {
             'customer_id': self.customer_id,
             'name': self.name,
             'email': self.email,
             'phone_number': self.phone_number,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'visit_count': self.visit_count,
+            'last_visit_at': self.last_visit_at.isoformat() if self.last_visit_at else None,
+            'average_party_size': self.average_party_size
         }
 
+db.Index('uq_customer_email_lower', db.func.lower(Customer.email), unique=True)
+
 class Table(db.Model):
     __tablename__ = 'table'
+    __table_args__ = (
+        db.UniqueConstraint('location_id', 'table_number', name='uq_table_location_number'),
+        db.Index('ix_table_location_capacity', 'location_id', 'capacity'),
+    )
     
     table_id = db.Column(db.Integer, primary_key=True)
-    table_number = db.Column(db.Integer, nullable=False, unique=True)
+    location_id = db.Column(db.Integer, db.ForeignKey('location.location_id'), nullable=False)
+    table_number = db.Column(db.Integer, nullable=False)  # Unique within a location
     capacity = db.Column(db.Integer, nullable=False)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     
@@ -37,56 +96,225 @@ class Table(db.Model):
     def to_dict(self):
         return {
             'table_id': self.table_id,
+            'location_id': self.location_id,
             'table_number': self.table_number,
             'capacity': self.capacity,
             'is_active': self.is_active
         }
 
+class OperatingHours(db.Model):
+    __tablename__ = 'operating_hours'
+    __table_args__ = (
+        db.UniqueConstraint('location_id', 'weekday', name='uq_operating_hours_location_weekday'),
+    )
+    
+    hours_id = db.Column(db.Integer, primary_key=True)
+    location_id = db.Column(db.Integer, db.ForeignKey('location.location_id'), nullable=False)
+    weekday = db.Column(db.Integer, nullable=False)  # 0=Monday, 6=Sunday
+    open_time = db.Column(db.Time, nullable=True)
+    close_time = db.Column(db.Time, nullable=True)
+    is_closed = db.Column(db.Boolean, default=False, nullable=False)
+    
+    def to_dict(self):
+        return {
+            'location_id': self.location_id,
+            'weekday': self.weekday,
+            'open_time': self.open_time.strftime('%H:%M') if self.open_time else None,
+            'close_time': self.close_time.strftime('%H:%M') if self.close_time else None,
+            'is_closed': self.is_closed
+        }
+
+class CalendarException(db.Model):
+    __tablename__ = 'calendar_exception'
+    __table_args__ = (
+        db.UniqueConstraint('location_id', 'exception_date', name='uq_calendar_exception_location_date'),
+    )
+    
+    exception_id = db.Column(db.Integer, primary_key=True)
+    location_id = db.Column(db.Integer, db.ForeignKey('location.location_id'), nullable=False)
+    exception_date = db.Column(db.Date, nullable=False)
+    is_closed = db.Column(db.Boolean, default=True, nullable=False)  # Holiday or private event
+    open_time = db.Column(db.Time, nullable=True)  # Special hours when not closed
+    close_time = db.Column(db.Time, nullable=True)
+    reason = db.Column(db.String(200), nullable=True)
+    
+    def to_dict(self):
+        return {
+            'exception_id': self.exception_id,
+            'location_id': self.location_id,
+            'date': self.exception_date.isoformat(),
+            'is_closed': self.is_closed,
+            'open_time': self.open_time.strftime('%H:%M') if self.open_time else None,
+            'close_time': self.close_time.strftime('%H:%M') if self.close_time else None,
+            'reason': self.reason
+        }
+
 class Reservation(db.Model):
     __tablename__ = 'reservation'
+    # On PostgreSQL the table is range partitioned by month on
+    # reservation_datetime (see migrations); the primary key there is
+    # (reservation_id, reservation_datetime)
+    __table_args__ = (
+        db.Index('ix_reservation_table_datetime', 'table_id', 'reservation_datetime'),
+        db.Index('ix_reservation_customer_id', 'customer_id'),
+        db.Index('ix_reservation_datetime_id', 'reservation_datetime', 'reservation_id'),
+        db.Index('ix_reservation_location_datetime_id', 'location_id', 'reservation_datetime', 'reservation_id'),
+        db.CheckConstraint(f'duration_minutes BETWEEN 1 AND {MAX_DURATION_MINUTES}',
+                           name='ck_reservation_duration_minutes'),
+    )
     
     reservation_id = db.Column(db.Integer, primary_key=True)
     customer_id = db.Column(db.Integer, db.ForeignKey('customer.customer_id'), nullable=False)
+    # Always the table's location; stored so per-location scans need no join
+    location_id = db.Column(db.Integer, db.ForeignKey('location.location_id'), nullable=False)
     table_id = db.Column(db.Integer, db.ForeignKey('table.table_id'), nullable=False)
     reservation_datetime = db.Column(db.DateTime, nullable=False)
     num_of_guests = db.Column(db.Integer, nullable=False)
+    # Minutes the table is held, from the party size and day part (services/calendar.py)
+    duration_minutes = db.Column(db.Integer, server_default='120', nullable=False)
     status = db.Column(db.String(20), default='confirmed', nullable=False)  # confirmed, cancelled, completed
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    @property
+    def end_datetime(self):
+        return self.reservation_datetime + timedelta(minutes=self.duration_minutes)
+    
     def to_dict(self):
         return {
             'reservation_id': self.reservation_id,
             'customer_id': self.customer_id,
+            'location_id': self.location_id,
             'table_id': self.table_id,
             'table_number': self.table.table_number if self.table else None,
             'reservation_datetime': self.reservation_datetime.isoformat() if self.reservation_datetime else None,
             'num_of_guests': self.num_of_guests,
+            'duration_minutes': self.duration_minutes,
+            'end_datetime': self.end_datetime.isoformat() if self.reservation_datetime else None,
             'status': self.status,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'customer_name': self.customer.name if self.customer else None,
             'customer_email': self.customer.email if self.customer else None
         }
 
+class WaitlistEntry(db.Model):
+    __tablename__ = 'waitlist_entry'
+    __table_args__ = (
+        db.Index('ix_waitlist_entry_match', 'location_id', 'waitlist_date', 'status', 'num_of_guests',
+                 'requested_datetime'),
+    )
+    
+    waitlist_id = db.Column(db.Integer, primary_key=True)
+    customer_id = db.Column(db.Integer, db.ForeignKey('customer.customer_id'), nullable=False)
+    location_id = db.Column(db.Integer, db.ForeignKey('location.location_id'), nullable=False)
+    waitlist_date = db.Column(db.Date, nullable=False)
+    requested_datetime = db.Column(db.DateTime, nullable=False)
+    flexibility_minutes = db.Column(db.Integer, default=0, nullable=False)  # Accepts start times this far either side
+    num_of_guests = db.Column(db.Integer, nullable=False)
+    auto_book = db.Column(db.Boolean, default=True, nullable=False)  # Book straight away, or offer first
+    status = db.Column(db.String(20), default='waiting', nullable=False)  # waiting, offered, booked, expired, cancelled
+    offered_table_id = db.Column(db.Integer, db.ForeignKey('table.table_id'), nullable=True)
+    offered_datetime = db.Column(db.DateTime, nullable=True)
+    offer_expires_at = db.Column(db.DateTime, nullable=True)
+    reservation_id = db.Column(db.Integer, nullable=True)  # Set once booked
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    customer = db.relationship('Customer')
+    offered_table = db.relationship('Table')
+    
+    def to_dict(self):
+        return {
+            'waitlist_id': self.waitlist_id,
+            'customer_id': self.customer_id,
+            'location_id': self.location_id,
+            'requested_datetime': self.requested_datetime.isoformat() if self.requested_datetime else None,
+            'flexibility_minutes': self.flexibility_minutes,
+            'num_of_guests': self.num_of_guests,
+            'auto_book': self.auto_book,
+            'status': self.status,
+            'offered_table_number': self.offered_table.table_number if self.offered_table else None,
+            'offered_datetime': self.offered_datetime.isoformat() if self.offered_datetime else None,
+            'offer_expires_at': self.offer_expires_at.isoformat() if self.offer_expires_at else None,
+            'reservation_id': self.reservation_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class ReservationArchive(db.Model):
+    __tablename__ = 'reservation_archive'
+    __table_args__ = (
+        db.Index('ix_reservation_archive_location_datetime', 'location_id', 'reservation_datetime'),
+        db.CheckConstraint(f'duration_minutes BETWEEN 1 AND {MAX_DURATION_MINUTES}',
+                           name='ck_reservation_archive_duration_minutes'),
+    )
+    
+    reservation_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    customer_id = db.Column(db.Integer, db.ForeignKey('customer.customer_id'), nullable=False, index=True)
+    location_id = db.Column(db.Integer, db.ForeignKey('location.location_id'), nullable=False)
+    table_id = db.Column(db.Integer, db.ForeignKey('table.table_id'), nullable=False)
+    reservation_datetime = db.Column(db.DateTime, nullable=False, index=True)
+    num_of_guests = db.Column(db.Integer, nullable=False)
+    duration_minutes = db.Column(db.Integer, server_default='120', nullable=False)
+    status = db.Column(db.String(20), nullable=False)  # completed, cancelled
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    customer = db.relationship('Customer')
+    table = db.relationship('Table')
+    
+    def to_dict(self):
+        return {
+            'reservation_id': self.reservation_id,
+            'customer_id': self.customer_id,
+            'location_id': self.location_id,
+            'table_id': self.table_id,
+            'table_number': self.table.table_number if self.table else None,
+            'reservation_datetime': self.reservation_datetime.isoformat() if self.reservation_datetime else None,
+            'num_of_guests': self.num_of_guests,
+            'duration_minutes': self.duration_minutes,
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'customer_name': self.customer.name if self.customer else None,
+            'customer_email': self.customer.email if self.customer else None,
+            'archived': True,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None
+        }
+
 class Newsletter(db.Model):
     __tablename__ = 'newsletter'
     
     newsletter_id = db.Column(db.Integer, primary_key=True)
-    email = db.Column(db.String(255), nullable=False, unique=True)
-    date_subscribed = db.Column(db.DateTime, default=datetime.utcnow)
+    email = db.Column(db.String(255), nullable=False)  # Stored normalized; unique on lower(email)
+    # ASCII (punycode) form of the email's domain, as the domain checks see it
+    email_domain = db.Column(db.String(255), nullable=True, index=True)
+    date_subscribed = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
+    # pending until the email's domain is known to accept mail: verified or undeliverable.
+    # Rows written without the ORM (bulk loads) get the server default, verified,
+    # like the subscribers that existed before domain checks
+    verification_status = db.Column(db.String(20), default='pending', server_default='verified',
+                                    nullable=False, index=True)
+    
+    @validates('email')
+    def validate_email(self, key, email):
+        return normalize_email(email) if email is not None else email
     
     def to_dict(self):
         return {
             'newsletter_id': self.newsletter_id,
             'email': self.email,
             'date_subscribed': self.date_subscribed.isoformat() if self.date_subscribed else None,
-            'is_active': self.is_active
+            'is_active': self.is_active,
+            'verification_status': self.verification_status
         }
 
+db.Index('uq_newsletter_email_lower', db.func.lower(Newsletter.email), unique=True)
+
 class MenuCategory(db.Model):
     __tablename__ = 'menu_category'
     
     category_id = db.Column(db.Integer, primary_key=True)
+    location_id = db.Column(db.Integer, db.ForeignKey('location.location_id'), nullable=False, index=True)
     category_name = db.Column(db.String(100), nullable=False)
     display_order = db.Column(db.Integer, default=0)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
@@ -97,6 +325,7 @@ class MenuCategory(db.Model):
     def to_dict(self):
         return {
             'category_id': self.category_id,
+            'location_id': self.location_id,
             'category_name': self.category_name,
             'display_order': self.display_order,
             'is_active': self.is_active,
@@ -105,8 +334,13 @@ class MenuCategory(db.Model):
 
 class MenuItem(db.Model):
     __tablename__ = 'menu_item'
+    __table_args__ = (
+        db.Index('ix_menu_item_location_available', 'location_id', 'is_available'),
+    )
     
     item_id = db.Column(db.Integer, primary_key=True)
+    # Same as the category's location; stored so a location's menu loads without a join
+    location_id = db.Column(db.Integer, db.ForeignKey('location.location_id'), nullable=False)
     category_id = db.Column(db.Integer, db.ForeignKey('menu_category.category_id'), nullable=False)
     item_name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=True)
@@ -118,6 +352,7 @@ class MenuItem(db.Model):
     def to_dict(self):
         return {
             'item_id': self.item_id,
+            'location_id': self.location_id,
             'category_id': self.category_id,
             'item_name': self.item_name,
             'description': self.description,
@@ -127,6 +362,39 @@ class MenuItem(db.Model):
             'display_order': self.display_order
         }
 
+class BackgroundJob(db.Model):
+    __tablename__ = 'background_job'
+    __table_args__ = (
+        db.Index('ix_background_job_status_run_at', 'status', 'run_at'),
+    )
+    
+    STATUSES = ['pending', 'running', 'succeeded', 'failed']
+    
+    job_id = db.Column(db.Integer, primary_key=True)
+    task_name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default='{}')  # JSON encoded keyword arguments
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, running, succeeded, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=5, nullable=False)
+    run_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def to_dict(self):
+        return {
+            'job_id': self.job_id,
+            'task_name': self.task_name,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'run_at': self.run_at.isoformat() if self.run_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
 class Admin(db.Model):
     __tablename__ = 'admin'
     
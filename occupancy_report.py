@@ -0,0 +1,77 @@
+"""
+Occupancy report for Café Fausse
+Prints utilization by table, covers per slot, cancellation/no-show rates
+and booking lead times for a date range (the same report as
+GET /api/admin/reports/occupancy)
+
+Usage:
+    python occupancy_report.py
+    python occupancy_report.py --date-from 2025-01-01 --date-to 2025-12-31 --output report.json
+    python occupancy_report.py --location main
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta
+
+from app import app
+from services.analytics import occupancy_report
+from services.locations import location_directory
+
+
+def parse_day(value):
+    return datetime.strptime(value, '%Y-%m-%d')
+
+
+def print_summary(report):
+    rates = report['outcome_rates']
+    lead_times = report['lead_times']
+    tables = report['utilization_by_table']['tables']
+    print(f"Reservations {report['date_from'][:10]} to {report['date_to'][:10]}: {report['reservations']}")
+    print(f"Cancellation rate: {rates['cancellation_rate']}  No-show rate: {rates['no_show_rate']}")
+    if lead_times['reservations']:
+        print(f"Lead time: mean {lead_times['mean_hours']}h, median {lead_times['percentiles']['p50']}h")
+
+    print(f"\nUtilization by table ({report['utilization_by_table']['open_hours']} open hours)")
+    for table in tables:
+        print(f"  Table {table['table_number']:>3} ({table['capacity']} seats): "
+              f"{table['reservations']:>6} bookings  utilization {table['utilization']}  seat fill {table['seat_fill']}")
+
+    print("\nCovers per slot")
+    for slot in report['covers_per_slot']['slots']:
+        print(f"  {slot['time']}: {slot['covers']:>7} covers  {slot['average_covers_per_night']:>7} per night")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Print occupancy analytics')
+    parser.add_argument('--date-from', type=parse_day, help='First day, YYYY-MM-DD (default: 365 days before --date-to)')
+    parser.add_argument('--date-to', type=parse_day, help='Last day, inclusive, YYYY-MM-DD (default: today)')
+    parser.add_argument('--no-archive', action='store_true', help='Skip archived reservations')
+    parser.add_argument('--location', help='Location slug (default: every location)')
+    parser.add_argument('--output', help='Write the full report as JSON to this file')
+    args = parser.parse_args(argv)
+
+    date_to = args.date_to or datetime.combine(datetime.now().date(), datetime.min.time())
+    date_from = args.date_from or date_to - timedelta(days=365)
+
+    with app.app_context():
+        location_id = None
+        if args.location:
+            location = location_directory.by_slug(args.location)
+            if location is None:
+                sys.exit(f"Unknown location: {args.location}")
+            location_id = location['location_id']
+        report = occupancy_report(date_from, date_to + timedelta(days=1), not args.no_archive,
+                                  location_id=location_id)
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+            fh.write('\n')
+        print(f"Report written to {args.output}")
+    print_summary(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,381 @@
+from flask import Blueprint, g, request, jsonify
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from app import db
+from models import BackgroundJob, OperatingHours, CalendarException, Location
+from services.tasks import queue_stats
+from services.calendar import operating_calendar
+from services.availability_stream import notify_calendar_change
+from services.analytics import occupancy_report
+from services.replica import read_from_replica
+from services.newsletter_index import newsletter_index
+from services.locations import location_directory, use_location
+from services.profiling import profile_store, profile_token_required
+from services.circuit_breaker import circuit_exempt, database_circuit
+from services.admin_auth import admin_required
+from services.schemas import CalendarExceptionRequest, LocationRequest, OperatingHoursRequest, decode_request
+
+admin_bp = Blueprint('admin', __name__)
+
+@admin_bp.route('/admin/jobs', methods=['GET'])
+@admin_required
+def get_job_queue():
+    """
+    Get background task queue depth and outcome counts (admin endpoint)
+    Query parameters:
+    - failed: number of most recent failed jobs to include (database backend only)
+    """
+    try:
+        stats = queue_stats()
+        
+        if stats['backend'] == 'database':
+            limit = min(request.args.get('failed', 20, type=int), 200)
+            failed_jobs = BackgroundJob.query.filter_by(status='failed').order_by(
+                BackgroundJob.finished_at.desc()
+            ).limit(limit).all()
+            stats['recent_failures'] = [job.to_dict() for job in failed_jobs]
+        
+        return jsonify(stats), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+@admin_bp.route('/admin/newsletter/index', methods=['GET'])
+@admin_required
+def get_newsletter_index_stats():
+    """
+    Get size, memory use and false positive rate of this worker's newsletter
+    membership index (admin endpoint)
+    """
+    try:
+        return jsonify(newsletter_index.stats()), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+@admin_bp.route('/admin/circuit', methods=['GET'])
+@admin_required
+@circuit_exempt
+def get_circuit_status():
+    """
+    Get this worker's database circuit breaker state and counters (admin
+    endpoint): statements, failures, slow statements, trips, rejected and
+    degraded (fallback) responses, and half-open probe outcomes
+    """
+    try:
+        return jsonify(database_circuit.stats()), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+@admin_bp.route('/admin/profiles', methods=['GET'])
+@profile_token_required
+def get_recent_profiles():
+    """
+    List this worker's recent request profiles, newest first (admin endpoint,
+    requires the X-Profile-Token header)
+    Query parameters:
+    - limit: number of profiles to return (default 20)
+    - endpoint: only profiles of this view, e.g. menu.get_full_menu
+    """
+    try:
+        endpoint = request.args.get('endpoint')
+        profiles = [
+            profile for profile in profile_store.recent()
+            if not endpoint or profile['endpoint'] == endpoint
+        ][:min(request.args.get('limit', 20, type=int), 200)]
+        
+        return jsonify({
+            'profiles': [
+                {key: value for key, value in profile.items() if key not in ('summary', 'collapsed')}
+                | {'sql': {key: value for key, value in profile['sql'].items() if key != 'timings'}}
+                for profile in profiles
+            ],
+            'total_profiles': len(profiles)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+@admin_bp.route('/admin/profiles/<profile_id>', methods=['GET'])
+@profile_token_required
+def get_profile(profile_id):
+    """
+    Get one request profile with its function summary and SQL timings (admin
+    endpoint, requires the X-Profile-Token header)
+    Query parameters:
+    - format: json (default) or collapsed, the folded stacks as text for
+      flamegraph.pl or speedscope
+    """
+    try:
+        profile = profile_store.get(profile_id)
+        if not profile:
+            return jsonify({'error': 'Profile not found'}), 404
+        
+        if request.args.get('format') == 'collapsed':
+            return profile['collapsed'] + '\n', 200, {'Content-Type': 'text/plain; charset=utf-8'}
+        
+        return jsonify(profile), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+@admin_bp.route('/admin/calendar', methods=['GET'])
+@admin_required
+def get_operating_calendar():
+    """
+    Get a location's weekly operating hours and upcoming date exceptions (admin endpoint)
+    Query parameters:
+    - location: location slug (default: DEFAULT_LOCATION)
+    """
+    try:
+        error_response = use_location()
+        if error_response:
+            return error_response
+        
+        weekly = operating_calendar.weekly_hours(g.location_id)
+        exceptions = CalendarException.query.filter(
+            CalendarException.location_id == g.location_id,
+            CalendarException.exception_date >= datetime.now().date()
+        ).order_by(CalendarException.exception_date).all()
+        
+        return jsonify({
+            'location_id': g.location_id,
+            'weekly_hours': [
+                {
+                    'weekday': weekday,
+                    'open_time': hours[0].strftime('%H:%M') if hours else None,
+                    'close_time': hours[1].strftime('%H:%M') if hours else None,
+                    'is_closed': hours is None
+                }
+                for weekday, hours in sorted(weekly.items())
+            ],
+            'exceptions': [exception.to_dict() for exception in exceptions]
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+@admin_bp.route('/admin/calendar/hours/<int:weekday>', methods=['PUT'])
+@admin_required
+def update_operating_hours(weekday):
+    """
+    Set a location's opening hours for a weekday (0=Monday, 6=Sunday)
+    Expected JSON: {"open_time": "17:00", "close_time": "23:00"} or {"is_closed": true}
+    Query parameters:
+    - location: location slug (default: DEFAULT_LOCATION)
+    """
+    try:
+        error_response = use_location()
+        if error_response:
+            return error_response
+        
+        body, error = decode_request(OperatingHoursRequest)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        if weekday < 0 or weekday > 6:
+            return jsonify({'error': 'weekday must be between 0 (Monday) and 6 (Sunday)'}), 400
+        
+        is_closed = body.is_closed
+        open_time, close_time, error = parse_hours(body, required=not is_closed)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        hours = OperatingHours.query.filter_by(location_id=g.location_id, weekday=weekday).first()
+        if not hours:
+            hours = OperatingHours(location_id=g.location_id, weekday=weekday)
+            db.session.add(hours)
+        hours.open_time = open_time
+        hours.close_time = close_time
+        hours.is_closed = is_closed
+        notify_calendar_change()
+        db.session.commit()
+        operating_calendar.invalidate()
+        
+        return jsonify({
+            'message': 'Operating hours updated successfully',
+            'hours': hours.to_dict()
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+@admin_bp.route('/admin/calendar/exceptions', methods=['POST'])
+@admin_required
+def create_calendar_exception():
+    """
+    Close a location or set special hours there on a date
+    Expected JSON: {
+        "date": "2024-12-25",
+        "is_closed": true,
+        "reason": "Christmas Day"
+    }
+    or {"date": "2024-12-31", "is_closed": false, "open_time": "18:00", "close_time": "23:30", "reason": "New Year's Eve"}
+    Query parameters:
+    - location: location slug (default: DEFAULT_LOCATION)
+    """
+    try:
+        error_response = use_location()
+        if error_response:
+            return error_response
+        
+        body, error = decode_request(CalendarExceptionRequest)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        exception_date = body.date
+        is_closed = body.is_closed
+        open_time, close_time, error = parse_hours(body, required=not is_closed)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        exception = CalendarException.query.filter_by(location_id=g.location_id, exception_date=exception_date).first()
+        if not exception:
+            exception = CalendarException(location_id=g.location_id, exception_date=exception_date)
+            db.session.add(exception)
+        exception.is_closed = is_closed
+        exception.open_time = open_time
+        exception.close_time = close_time
+        exception.reason = body.reason
+        notify_calendar_change()
+        db.session.commit()
+        operating_calendar.invalidate()
+        
+        return jsonify({
+            'message': 'Calendar exception saved successfully',
+            'exception': exception.to_dict()
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+@admin_bp.route('/admin/calendar/exceptions/<date_str>', methods=['DELETE'])
+@admin_required
+def delete_calendar_exception(date_str):
+    """
+    Remove a location's exception for a date (YYYY-MM-DD), restoring its weekly hours
+    Query parameters:
+    - location: location slug (default: DEFAULT_LOCATION)
+    """
+    try:
+        error_response = use_location()
+        if error_response:
+            return error_response
+        
+        try:
+            exception_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+        
+        exception = CalendarException.query.filter_by(location_id=g.location_id, exception_date=exception_date).first()
+        if not exception:
+            return jsonify({'error': 'Calendar exception not found'}), 404
+        
+        db.session.delete(exception)
+        notify_calendar_change()
+        db.session.commit()
+        operating_calendar.invalidate()
+        
+        return jsonify({'message': 'Calendar exception removed successfully'}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+@admin_bp.route('/admin/reports/occupancy', methods=['GET'])
+@admin_required
+@read_from_replica
+def get_occupancy_report():
+    """
+    Get occupancy analytics for one location over a date range (admin endpoint)
+    Query parameters:
+    - location: location slug (default: DEFAULT_LOCATION)
+    - date_from: YYYY-MM-DD (default: 365 days before date_to)
+    - date_to: YYYY-MM-DD, inclusive (default: today)
+    - include_archive: true/false (default: true)
+    
+    Returns utilization by table, covers per slot, cancellation and no-show
+    rates, and the booking lead time distribution.
+    """
+    try:
+        error_response = use_location()
+        if error_response:
+            return error_response
+        
+        try:
+            date_to = datetime.strptime(request.args['date_to'], '%Y-%m-%d') if request.args.get('date_to') \
+                else datetime.combine(datetime.now().date(), datetime.min.time())
+            date_from = datetime.strptime(request.args['date_from'], '%Y-%m-%d') if request.args.get('date_from') \
+                else date_to - timedelta(days=365)
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+        
+        if date_from > date_to:
+            return jsonify({'error': 'date_from must not be after date_to'}), 400
+        
+        include_archive = request.args.get('include_archive', 'true').lower() != 'false'
+        report = occupancy_report(date_from, date_to + timedelta(days=1), include_archive,
+                                  location_id=g.location_id)
+        
+        return jsonify(report), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+@admin_bp.route('/admin/locations', methods=['POST'])
+@admin_required
+def create_location():
+    """
+    Add a restaurant location
+    Expected JSON: {
+        "slug": "downtown",
+        "name": "Café Fausse Downtown",
+        "address": "1234 Culinary Ave, Suite 100"
+    }
+    """
+    try:
+        body, error = decode_request(LocationRequest)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        location = Location(
+            slug=body.slug.lower(),
+            name=body.name,
+            address=body.address,
+            is_active=True
+        )
+        db.session.add(location)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({'error': 'A location with this slug already exists'}), 409
+        location_directory.invalidate()
+        
+        return jsonify({
+            'message': 'Location created successfully',
+            'location': location.to_dict()
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+def parse_hours(body, required):
+    """
+    Parse open_time/close_time (HH:MM) from a decoded request body
+    Returns (open_time, close_time, error message)
+    """
+    if not required and not body.open_time and not body.close_time:
+        return None, None, None
+    try:
+        open_time = datetime.strptime(body.open_time, '%H:%M').time()
+        close_time = datetime.strptime(body.close_time, '%H:%M').time()
+    except (TypeError, ValueError):
+        return None, None, 'open_time and close_time are required in HH:MM format'
+    if close_time <= open_time:
+        return None, None, 'close_time must be after open_time'
+    return open_time, close_time, None
@@ -0,0 +1,63 @@
+from flask import Blueprint, request, jsonify
+from models import Customer, email_matches
+from services.admin_auth import admin_required
+from services.customer_history import past_reservations, upcoming_reservations
+from services.replica import read_from_replica
+from routes.reservations import decode_cursor, encode_cursor
+
+customers_bp = Blueprint('customers', __name__)
+
+@customers_bp.route('/customers/history', methods=['GET'])
+@admin_required
+@read_from_replica
+def get_customer_history():
+    """
+    Get a returning guest's profile, visit aggregates and reservations at
+    every location (admin endpoint)
+    Query parameters:
+    - email: customer email (required)
+    - limit: past reservations per page (default 20, max 100)
+    - cursor: next_cursor from the previous page; later pages only carry
+      past reservations
+    
+    The first page lists up to MAX_UPCOMING confirmed upcoming reservations;
+    upcoming_has_more says whether there are more.
+    
+    Example: /api/customers/history?email=guest@example.com
+    """
+    try:
+        email = request.args.get('email', '').strip()
+        if not email:
+            return jsonify({'error': 'Missing required query parameter: email'}), 400
+        
+        try:
+            limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+        except ValueError:
+            return jsonify({'error': 'limit must be a valid integer'}), 400
+        
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                cursor = decode_cursor(cursor)
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+        
+        customer = Customer.query.filter(email_matches(Customer.email, email)).first()
+        if not customer:
+            return jsonify({'error': 'Customer not found'}), 404
+        
+        past, has_more = past_reservations(customer.customer_id, limit, cursor or None)
+        response = {
+            'customer': customer.to_dict(),
+            'past_reservations': [reservation.to_dict() for reservation in past],
+            'next_cursor': encode_cursor(past[-1]) if has_more else None
+        }
+        if not cursor:
+            upcoming, upcoming_has_more = upcoming_reservations(customer.customer_id)
+            response['upcoming_reservations'] = [reservation.to_dict() for reservation in upcoming]
+            response['upcoming_has_more'] = upcoming_has_more
+        
+        return jsonify(response), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
@@ -0,0 +1,21 @@
+from flask import Blueprint, jsonify
+from services.locations import location_directory
+
+locations_bp = Blueprint('locations', __name__)
+
+@locations_bp.route('/locations', methods=['GET'])
+def get_locations():
+    """
+    Get all active restaurant locations
+    Pass a location's slug as ?location=<slug> to the reservation, waitlist
+    and menu endpoints to work with that location
+    """
+    try:
+        locations = location_directory.all()
+        return jsonify({
+            'locations': locations,
+            'total_locations': len(locations)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
@@ -1,34 +1,48 @@
-from flask import Blueprint, request, jsonify
-from app import db
-from models import MenuCategory, MenuItem
+from flask import Blueprint, g, request, jsonify
+from services.locations import use_location
+from services.replica import use_replica
+from services.http_cache import cacheable, category_key, item_key
+from services.menu_cache import menu_cache, parse_fields, project
+from services.circuit_breaker import circuit_fallback
 
 menu_bp = Blueprint('menu', __name__)
+# Menu views only read, so they can be served from the read replica
+menu_bp.before_request(use_replica)
+menu_bp.before_request(use_location)
+
+def stale_menu(view, *args, **kwargs):
+    """While the database is unavailable, answer from the last menu snapshot"""
+    if menu_cache.last_known(g.location_id) is None:
+        return None
+    return view(*args, **kwargs)
 
 @menu_bp.route('/menu', methods=['GET'])
+@cacheable('MENU_CACHE_CONTROL')
+@circuit_fallback(stale_menu)
 def get_full_menu():
     """
     Get the complete menu with all categories and their items
     Returns menu organized by categories as specified in requirements
+    
+    Query parameters:
+    - fields: optional comma-separated item fields to return, e.g.
+      item_id,item_name,price,images.thumbnail
     """
     try:
-        # Get all active categories ordered by display_order
-        categories = MenuCategory.query.filter_by(is_active=True).order_by(MenuCategory.display_order).all()
+        fields, error = parse_fields(request.args.get('fields'))
+        if error:
+            return jsonify({'error': error}), 400
         
-        menu_data = []
-        for category in categories:
-            # Get all available items for this category
-            items = MenuItem.query.filter_by(
-                category_id=category.category_id,
-                is_available=True
-            ).order_by(MenuItem.display_order).all()
-            
-            category_data = {
-                'category_id': category.category_id,
-                'category_name': category.category_name,
-                'display_order': category.display_order,
-                'items': [item.to_dict() for item in items]
+        menu = menu_cache.get(g.location_id)
+        menu_data = [
+            {
+                'category_id': category['category_id'],
+                'category_name': category['category_name'],
+                'display_order': category['display_order'],
+                'items': [project(item, fields) for item in category['items']]
             }
-            menu_data.append(category_data)
+            for category in menu.categories
+        ]
         
         return jsonify({
             'menu': menu_data,
@@ -39,84 +53,110 @@ def get_full_menu():
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
 @menu_bp.route('/menu/categories', methods=['GET'])
+@cacheable('MENU_CACHE_CONTROL')
+@circuit_fallback(stale_menu)
 def get_categories():
     """
     Get all menu categories
+    
+    Query parameters:
+    - fields: optional comma-separated item fields to return
     """
     try:
-        categories = MenuCategory.query.filter_by(is_active=True).order_by(MenuCategory.display_order).all()
+        fields, error = parse_fields(request.args.get('fields'))
+        if error:
+            return jsonify({'error': error}), 400
+        
+        menu = menu_cache.get(g.location_id)
         return jsonify({
-            'categories': [cat.to_dict() for cat in categories]
+            'categories': [
+                {**category, 'items': [project(item, fields) for item in category['items']]}
+                for category in menu.categories
+            ]
         }), 200
         
     except Exception as e:
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
 @menu_bp.route('/menu/category/<int:category_id>', methods=['GET'])
+@cacheable('MENU_CACHE_CONTROL', lambda category_id: [category_key(category_id)])
+@circuit_fallback(stale_menu)
 def get_category_items(category_id):
     """
     Get all items for a specific category
+    
+    Query parameters:
+    - fields: optional comma-separated item fields to return
     """
     try:
-        category = MenuCategory.query.get(category_id)
-        if not category or not category.is_active:
-            return jsonify({'error': 'Category not found'}), 404
+        fields, error = parse_fields(request.args.get('fields'))
+        if error:
+            return jsonify({'error': error}), 400
         
-        items = MenuItem.query.filter_by(
-            category_id=category_id,
-            is_available=True
-        ).order_by(MenuItem.display_order).all()
+        category = menu_cache.get(g.location_id).categories_by_id.get(category_id)
+        if not category:
+            return jsonify({'error': 'Category not found'}), 404
         
+        # The category keeps its items list, projected like the top-level one
+        items = [project(item, fields) for item in category['items']]
         return jsonify({
-            'category': category.to_dict(),
-            'items': [item.to_dict() for item in items]
+            'category': {**category, 'items': items},
+            'items': items
         }), 200
         
     except Exception as e:
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
 @menu_bp.route('/menu/item/<int:item_id>', methods=['GET'])
+@cacheable('MENU_CACHE_CONTROL', lambda item_id: [item_key(item_id)])
+@circuit_fallback(stale_menu)
 def get_menu_item(item_id):
     """
     Get details for a specific menu item
+    
+    Query parameters:
+    - fields: optional comma-separated item fields to return
     """
     try:
-        item = MenuItem.query.get(item_id)
-        if not item or not item.is_available:
+        fields, error = parse_fields(request.args.get('fields'))
+        if error:
+            return jsonify({'error': error}), 400
+        
+        item = menu_cache.get(g.location_id).items.get(item_id)
+        if not item:
             return jsonify({'error': 'Menu item not found'}), 404
         
-        return jsonify(item.to_dict()), 200
+        return jsonify(project(item, fields)), 200
         
     except Exception as e:
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
 @menu_bp.route('/menu/search', methods=['GET'])
+@cacheable('MENU_SEARCH_CACHE_CONTROL')
+@circuit_fallback(stale_menu)
 def search_menu_items():
     """
     Search menu items by name or description
     Query parameter: q (search term)
+    Query parameter: fields (optional comma-separated item fields to return)
     """
     try:
         search_term = request.args.get('q', '').strip()
         if not search_term:
             return jsonify({'error': 'Search term is required'}), 400
         
-        # Search in item names and descriptions
-        items = MenuItem.query.filter(
-            db.and_(
-                MenuItem.is_available == True,
-                db.or_(
-                    MenuItem.item_name.ilike(f'%{search_term}%'),
-                    MenuItem.description.ilike(f'%{search_term}%')
-                )
-            )
-        ).order_by(MenuItem.item_name).all()
+        fields, error = parse_fields(request.args.get('fields'))
+        if error:
+            return jsonify({'error': error}), 400
+        
+        # Search in item names and descriptions of the cached menu
+        items = menu_cache.get(g.location_id).search(search_term)
         
         return jsonify({
             'search_term': search_term,
             'results_count': len(items),
-            'items': [item.to_dict() for item in items]
+            'items': [project(item, fields) for item in items]
         }), 200
         
     except Exception as e:
-        return jsonify({'error': f'Internal server error: {str(e)}'}), 500 
\ No newline at end of file
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500 
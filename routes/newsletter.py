@@ -1,7 +1,16 @@
 from flask import Blueprint, request, jsonify
-from email_validator import validate_email, EmailNotValidError
+from email_validator import EmailNotValidError
+from sqlalchemy.exc import IntegrityError
 from app import db
-from models import Newsletter
+from models import Newsletter, email_matches
+from services.customers import normalize_email
+from services.admin_auth import admin_required
+from services.email_verification import (PENDING, UNDELIVERABLE, VERIFIED, VERIFICATION_STATUSES,
+                                         domain_status, email_domain, request_domain_check)
+from services.newsletter_index import newsletter_index
+from services.notifications import send_newsletter_welcome
+from services.replica import read_from_replica
+from services.schemas import NewsletterRequest, decode_request
 
 newsletter_bp = Blueprint('newsletter', __name__)
 
@@ -12,36 +21,63 @@ def subscribe_newsletter():
     Expected JSON: {
         "email": "user@example.com"
     }
+    The subscription stays pending until the email's domain is confirmed
+    to accept mail in the background; the welcome email is sent then.
     """
     try:
-        data = request.get_json()
+        body, error = decode_request(NewsletterRequest)
+        if error:
+            return jsonify({'error': error}), 400
         
-        if not data or 'email' not in data:
-            return jsonify({'error': 'Email is required'}), 400
+        email = normalize_email(body.email)
         
-        email = data['email'].strip().lower()
-        
-        # Validate email format
+        # Validate email format; deliverability is checked in the background
         try:
-            validate_email(email)
+            domain = email_domain(email)
         except EmailNotValidError:
             return jsonify({'error': 'Invalid email format'}), 400
         
-        # Check if email already exists
-        existing_subscription = Newsletter.query.filter_by(email=email).first()
+        known_status = domain_status(domain)
+        if known_status == UNDELIVERABLE:
+            return jsonify({'error': 'The email domain does not accept email'}), 400
+        verification_status = VERIFIED if known_status == VERIFIED else PENDING
+        
+        # Check if email already exists; the index rules out most new emails
+        # without a query
+        existing_subscription = None
+        if newsletter_index.might_contain(email):
+            existing_subscription = Newsletter.query.filter(email_matches(Newsletter.email, email)).first()
         if existing_subscription:
             if existing_subscription.is_active:
                 return jsonify({'message': 'Email is already subscribed to the newsletter'}), 200
             else:
                 # Reactivate subscription
                 existing_subscription.is_active = True
+                existing_subscription.email_domain = domain
+                if existing_subscription.verification_status != VERIFIED:
+                    existing_subscription.verification_status = verification_status
                 db.session.commit()
+                if existing_subscription.verification_status == PENDING:
+                    request_domain_check(domain)
                 return jsonify({'message': 'Newsletter subscription reactivated successfully'}), 200
         
         # Create new subscription
-        newsletter_subscription = Newsletter(email=email)
+        newsletter_subscription = Newsletter(email=email, email_domain=domain, verification_status=verification_status)
         db.session.add(newsletter_subscription)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Subscribed concurrently or through another worker since the
+            # index last synced
+            db.session.rollback()
+            newsletter_index.add(email)
+            return jsonify({'message': 'Email is already subscribed to the newsletter'}), 200
+        newsletter_index.add(email)
+        if verification_status == VERIFIED:
+            send_newsletter_welcome.enqueue(email=email)
+        else:
+            # Welcomed by the domain check once the domain is verified
+            request_domain_check(domain)
         
         return jsonify({
             'message': 'Successfully subscribed to newsletter',
@@ -61,15 +97,16 @@ def unsubscribe_newsletter():
     }
     """
     try:
-        data = request.get_json()
-        
-        if not data or 'email' not in data:
-            return jsonify({'error': 'Email is required'}), 400
+        body, error = decode_request(NewsletterRequest)
+        if error:
+            return jsonify({'error': error}), 400
         
-        email = data['email'].strip().lower()
+        email = normalize_email(body.email)
         
         # Find subscription
-        subscription = Newsletter.query.filter_by(email=email).first()
+        subscription = None
+        if newsletter_index.might_contain(email):
+            subscription = Newsletter.query.filter(email_matches(Newsletter.email, email)).first()
         if not subscription:
             return jsonify({'error': 'Email not found in newsletter subscriptions'}), 404
         
@@ -87,12 +124,22 @@ def unsubscribe_newsletter():
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
 @newsletter_bp.route('/newsletter/subscribers', methods=['GET'])
+@admin_required
+@read_from_replica
 def get_subscribers():
     """
     Get all active newsletter subscribers (admin endpoint)
+    Query parameters:
+    - verification_status: optional, one of pending, verified, undeliverable
     """
     try:
-        subscribers = Newsletter.query.filter_by(is_active=True).all()
+        query = Newsletter.query.filter_by(is_active=True)
+        verification_status = request.args.get('verification_status')
+        if verification_status:
+            if verification_status not in VERIFICATION_STATUSES:
+                return jsonify({'error': f'verification_status must be one of: {", ".join(VERIFICATION_STATUSES)}'}), 400
+            query = query.filter_by(verification_status=verification_status)
+        subscribers = query.all()
         
         return jsonify({
             'total_subscribers': len(subscribers),
@@ -108,9 +155,13 @@ def check_subscription_status(email):
     Check if an email is subscribed to the newsletter
     """
     try:
-        email = email.strip().lower()
+        email = normalize_email(email)
+        
+        # Most footer checks are for emails that never subscribed
+        if not newsletter_index.might_contain(email):
+            return jsonify({'subscribed': False}), 200
         
-        subscription = Newsletter.query.filter_by(email=email).first()
+        subscription = Newsletter.query.filter(email_matches(Newsletter.email, email)).first()
         
         if subscription and subscription.is_active:
             return jsonify({
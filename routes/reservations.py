@@ -1,11 +1,55 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, g, request, jsonify, stream_with_context
+from email_validator import EmailNotValidError
 from datetime import datetime, timedelta
 from sqlalchemy import and_, or_
-from app import db
-from models import Reservation, Customer, Table
+from sqlalchemy.orm import joinedload
+from app import app, db
+from models import Reservation, ReservationArchive, Customer, Table, email_matches
+from services.customers import normalize_email, resolve_customer_id, remember_customer
+from services.notifications import send_reservation_confirmation
+from services.calendar import operating_calendar, reservation_duration, reservation_minutes
+from services.night_view import load_bookings, load_night_bookings
+from services.waitlist import backfill_cancelled_reservations
+from services.availability_stream import StreamLimitReached, availability_broker, snapshot_event
+from services.replica import read_from_replica, pin_to_primary
+from services.batch_booking import assign_batch_tables
+from services.email_verification import UNDELIVERABLE, domain_status, email_domain, request_domain_check
+from services.locations import use_location
+from services.circuit_breaker import circuit_fallback
+from services.admin_auth import admin_required
+from services.schemas import (AvailabilityRequest, BatchReservationRequest, ReservationRequest,
+                              StatusUpdateRequest, decode_json, decode_request)
+import base64
+import binascii
+import csv
+import io
+import json
+import queue
 import random
 
 reservations_bp = Blueprint('reservations', __name__)
+# Every view works on one location, chosen with ?location=<slug>
+reservations_bp.before_request(use_location)
+
+VALID_STATUSES = ['confirmed', 'cancelled', 'completed']
+EXPORT_BATCH_SIZE = 1000
+EXPORT_COLUMNS = ['reservation_id', 'reservation_datetime', 'table_number', 'num_of_guests', 'duration_minutes', 'status',
+                  'customer_name', 'customer_email', 'created_at']
+
+def call_us(view, *args, **kwargs):
+    """
+    Degraded availability while the database is unavailable: no slots,
+    with a message pointing guests to the phone
+    """
+    message = f"Online availability is temporarily unavailable. Please call us at {app.config['RESTAURANT_PHONE']} to book."
+    return jsonify({
+        'degraded': True,
+        'message': message,
+        'phone_number': app.config['RESTAURANT_PHONE'],
+        'available': False,
+        'available_slots': [],
+        'total_available_slots': 0
+    }), 200
 
 @reservations_bp.route('/reservations', methods=['POST'])
 def create_reservation():
@@ -20,56 +64,42 @@ def create_reservation():
     }
     """
     try:
-        data = request.get_json()
-        
-        # Validate required fields
-        required_fields = ['customer_name', 'email', 'reservation_datetime', 'num_of_guests']
-        for field in required_fields:
-            if field not in data or not data[field]:
-                return jsonify({'error': f'Missing required field: {field}'}), 400
-        
-        # Parse reservation datetime
-        try:
-            reservation_datetime = datetime.fromisoformat(data['reservation_datetime'].replace('Z', '+00:00'))
-        except ValueError:
-            return jsonify({'error': 'Invalid datetime format. Use ISO format (YYYY-MM-DDTHH:MM:SS)'}), 400
+        body, error = decode_request(ReservationRequest)
+        if error:
+            return jsonify({'error': error}), 400
         
-        # Validate reservation is in the future
-        if reservation_datetime <= datetime.utcnow():
-            return jsonify({'error': 'Reservation must be in the future'}), 400
-        
-        # Validate number of guests
-        num_guests = int(data['num_of_guests'])
-        if num_guests < 1 or num_guests > 12:  # Assuming max table capacity is 12
-            return jsonify({'error': 'Number of guests must be between 1 and 12'}), 400
+        booking, error = parse_reservation_request(body, g.location_id)
+        if error:
+            return jsonify({'error': error}), 400
+        reservation_datetime = booking['reservation_datetime']
+        num_guests = booking['num_of_guests']
         
         # Check table availability
-        available_table = find_available_table(reservation_datetime, num_guests)
+        available_table = find_available_table(reservation_datetime, num_guests, g.location_id)
         if not available_table:
             return jsonify({'error': 'No tables available for the selected time slot'}), 409
         
-        # Create or get customer
-        customer = Customer.query.filter_by(email=data['email']).first()
-        if not customer:
-            customer = Customer(
-                name=data['customer_name'],
-                email=data['email'],
-                phone_number=data.get('phone_number')
-            )
-            db.session.add(customer)
-            db.session.flush()  # Get customer_id without committing
+        # Create or get customer (single upsert, cached for returning guests)
+        email = booking['email']
+        customer_id = resolve_customer_id(booking['customer_name'], email, booking['phone_number'])
         
         # Create reservation
         reservation = Reservation(
-            customer_id=customer.customer_id,
+            customer_id=customer_id,
+            location_id=g.location_id,
             table_id=available_table.table_id,
             reservation_datetime=reservation_datetime,
             num_of_guests=num_guests,
+            duration_minutes=reservation_minutes(num_guests, reservation_datetime),
             status='confirmed'
         )
         
         db.session.add(reservation)
         db.session.commit()
+        remember_customer(email, customer_id)
+        request_domain_check(booking['email_domain'])
+        pin_to_primary()
+        send_reservation_confirmation.enqueue(reservation_id=reservation.reservation_id)
         
         return jsonify({
             'message': 'Reservation created successfully',
@@ -81,7 +111,115 @@ def create_reservation():
         db.session.rollback()
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
+@reservations_bp.route('/reservations/batch', methods=['POST'])
+def create_reservations_batch():
+    """
+    Create many reservations at once (group and event bookings)
+    Expected JSON: {
+        "mode": "all_or_nothing",
+        "reservations": [
+            {
+                "customer_name": "John Doe",
+                "email": "john@example.com",
+                "phone_number": "123-456-7890",
+                "reservation_datetime": "2024-01-15T19:00:00",
+                "num_of_guests": 4
+            }
+        ]
+    }
+    
+    mode is "all_or_nothing" (default: nothing is booked unless every
+    reservation can be) or "best_effort" (book what fits). Returns one
+    result per reservation, in request order.
+    """
+    try:
+        body, error = decode_request(BatchReservationRequest)
+        if error:
+            return jsonify({'error': error}), 400
+        mode = body.mode
+        
+        # Validate every item, then place all of them against one view per night
+        parsed = []
+        for item in body.reservations:
+            reservation, error = decode_json(item, ReservationRequest)
+            parsed.append(parse_reservation_request(reservation, g.location_id) if not error else (None, error))
+        bookings = [booking for booking, _ in parsed]
+        tables = assign_batch_tables(bookings, g.location_id)
+        
+        results = []
+        for index, ((booking, error), table) in enumerate(zip(parsed, tables)):
+            if error:
+                results.append({'index': index, 'status': 'failed', 'error': error})
+            elif not table:
+                results.append({'index': index, 'status': 'failed', 'error': 'No tables available for the selected time slot'})
+            else:
+                results.append({'index': index, 'status': 'pending'})
+        
+        failed = sum(1 for result in results if result['status'] == 'failed')
+        if failed and (mode == 'all_or_nothing' or failed == len(results)):
+            for result in results:
+                if result['status'] == 'pending':
+                    result['status'] = 'not_created'
+            return jsonify({
+                'error': 'No reservations were created',
+                'mode': mode,
+                'created': 0,
+                'failed': failed,
+                'results': results
+            }), 409
+        
+        # Create or get customers (one upsert per distinct new email)
+        customer_ids = {}
+        created = []
+        domains = set()
+        for result, booking, table in zip(results, bookings, tables):
+            if result['status'] != 'pending':
+                continue
+            email = booking['email']
+            if email not in customer_ids:
+                customer_ids[email] = resolve_customer_id(booking['customer_name'], email, booking['phone_number'])
+            reservation = Reservation(
+                customer_id=customer_ids[email],
+                location_id=g.location_id,
+                table_id=table.table_id,
+                reservation_datetime=booking['reservation_datetime'],
+                num_of_guests=booking['num_of_guests'],
+                duration_minutes=reservation_minutes(booking['num_of_guests'], booking['reservation_datetime']),
+                status='confirmed'
+            )
+            db.session.add(reservation)
+            created.append((result, reservation, table))
+            domains.add(booking['email_domain'])
+        
+        # One commit for the whole batch
+        db.session.commit()
+        for email, customer_id in customer_ids.items():
+            remember_customer(email, customer_id)
+        for domain in domains:
+            request_domain_check(domain)
+        pin_to_primary()
+        
+        for result, reservation, table in created:
+            result['status'] = 'created'
+            result['reservation'] = reservation.to_dict()
+            result['table_number'] = table.table_number
+            send_reservation_confirmation.enqueue(reservation_id=reservation.reservation_id)
+        
+        return jsonify({
+            'message': 'Reservations created successfully' if not failed else 'Some reservations could not be created',
+            'mode': mode,
+            'created': len(created),
+            'failed': failed,
+            'results': results
+        }), 201 if not failed else 207
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
 @reservations_bp.route('/reservations/check-availability', methods=['POST'])
+@read_from_replica
+@circuit_fallback(call_us)
 def check_availability():
     """
     Check table availability for a specific datetime and party size
@@ -91,21 +229,18 @@ def check_availability():
     }
     """
     try:
-        data = request.get_json()
+        body, error = decode_request(AvailabilityRequest)
+        if error:
+            return jsonify({'error': error}), 400
+        reservation_datetime = body.reservation_datetime
+        num_guests = body.num_of_guests
         
-        if not data or 'reservation_datetime' not in data or 'num_of_guests' not in data:
-            return jsonify({'error': 'Missing required fields: reservation_datetime, num_of_guests'}), 400
-        
-        # Parse datetime
-        try:
-            reservation_datetime = datetime.fromisoformat(data['reservation_datetime'].replace('Z', '+00:00'))
-        except ValueError:
-            return jsonify({'error': 'Invalid datetime format'}), 400
-        
-        num_guests = int(data['num_of_guests'])
+        if not operating_calendar.is_open_for(g.location_id, reservation_datetime,
+                                              reservation_duration(num_guests, reservation_datetime)):
+            return jsonify({'available': False, 'reason': 'closed'}), 200
         
         # Find available table
-        available_table = find_available_table(reservation_datetime, num_guests)
+        available_table = find_available_table(reservation_datetime, num_guests, g.location_id)
         
         if available_table:
             return jsonify({
@@ -120,6 +255,8 @@ def check_availability():
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
 @reservations_bp.route('/reservations/slots/available', methods=['GET'])
+@read_from_replica
+@circuit_fallback(call_us)
 def get_available_time_slots():
     """
     Get available time slots for a specific date and party size
@@ -130,70 +267,134 @@ def get_available_time_slots():
     Example: /api/reservations/available-slots?date=2024-01-15&num_of_guests=4
     """
     try:
-        # Get query parameters
-        date_str = request.args.get('date')
-        num_guests_str = request.args.get('num_of_guests')
+        date_obj, num_guests, error = parse_slot_query(request.args)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        # Slots come from the operating calendar (weekly hours + exceptions)
+        available_slots = build_available_slots(date_obj, num_guests, g.location_id)
         
-        if not date_str or not num_guests_str:
-            return jsonify({'error': 'Missing required query parameters: date, num_of_guests'}), 400
+        return jsonify({
+            'date': date_obj.isoformat(),
+            'num_of_guests': num_guests,
+            'available_slots': available_slots,
+            'total_available_slots': len(available_slots),
+            'is_open': operating_calendar.hours_for(g.location_id, date_obj) is not None,
+            'closure_reason': operating_calendar.closure_reason(g.location_id, date_obj)
+        }), 200
         
-        # Parse date
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+@reservations_bp.route('/reservations/slots/stream', methods=['GET'])
+def stream_available_time_slots():
+    """
+    Stream live availability for a date and party size as server-sent events
+    Query parameters:
+    - date: YYYY-MM-DD format (required)
+    - num_of_guests: integer (required)
+    
+    The first event ("snapshot") carries the same payload as
+    /reservations/slots/available; after that "delta" events list only the
+    slots whose table count changed ("changed") and the times that are no
+    longer bookable ("removed"). Comment lines are sent as keep-alives.
+    Answers 503 with Retry-After when this worker already holds
+    AVAILABILITY_STREAM_MAX_PER_WORKER streams; clients then poll
+    /reservations/slots/available instead.
+    
+    Example: /api/reservations/slots/stream?date=2024-01-15&num_of_guests=4
+    """
+    try:
+        date_obj, num_guests, error = parse_slot_query(request.args)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        location_id = g.location_id
         try:
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
-        except ValueError:
-            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+            subscriber, slots = availability_broker.subscribe(
+                location_id, date_obj, num_guests, lambda: build_available_slots(date_obj, num_guests, location_id),
+                limit=app.config['AVAILABILITY_STREAM_MAX_PER_WORKER']
+            )
+        except StreamLimitReached:
+            return jsonify({'error': 'Too many live availability streams, please poll /reservations/slots/available'}), \
+                503, {'Retry-After': str(app.config['AVAILABILITY_STREAM_HEARTBEAT'])}
+        snapshot = snapshot_event(location_id, date_obj, num_guests, slots)
+        heartbeat = app.config['AVAILABILITY_STREAM_HEARTBEAT']
+        
+        # The generator only reads from the subscriber queue, so no database
+        # connection or app context is held for the life of the stream
+        def generate():
+            try:
+                yield format_event('snapshot', snapshot, retry=heartbeat * 1000)
+                while True:
+                    try:
+                        event_name, payload = subscriber.get(timeout=heartbeat)
+                    except queue.Empty:
+                        yield ': keep-alive\n\n'
+                        continue
+                    yield format_event(event_name, payload)
+            finally:
+                availability_broker.unsubscribe(location_id, date_obj, num_guests, subscriber)
+        
+        return Response(generate(), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
         
-        # Validate date is not in the past
-        if date_obj < datetime.now().date():
-            return jsonify({'error': 'Date cannot be in the past'}), 400
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+@reservations_bp.route('/reservations', methods=['GET'])
+@admin_required
+def list_reservations():
+    """
+    List reservations (admin endpoint, requires the X-Admin-Token header)
+    Query parameters (all optional):
+    - date_from, date_to: YYYY-MM-DD or ISO datetime, inclusive range on reservation_datetime
+    - status: comma separated statuses (confirmed, cancelled, completed)
+    - table_number: integer
+    - email: customer email
+    - limit: page size (default 50, max 500)
+    - cursor: next_cursor from the previous page
+    - format: json (default, paginated), csv or ndjson (streams every matching row)
+    
+    Example: /api/reservations?date_from=2024-01-15&date_to=2024-01-15&status=confirmed&format=csv
+    """
+    try:
+        query, error = build_reservation_query(request.args, g.location_id)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        output_format = request.args.get('format', 'json')
+        if output_format in STREAM_FORMATS:
+            mimetype, render = STREAM_FORMATS[output_format]
+            response = Response(stream_with_context(render(query)), mimetype=mimetype)
+            response.headers['Content-Disposition'] = f'attachment; filename=reservations.{output_format}'
+            return response
+        if output_format != 'json':
+            return jsonify({'error': 'Invalid format. Must be one of: json, csv, ndjson'}), 400
         
         try:
-            num_guests = int(num_guests_str)
+            limit = min(max(int(request.args.get('limit', 50)), 1), 500)
         except ValueError:
-            return jsonify({'error': 'num_of_guests must be a valid integer'}), 400
-        
-        if num_guests < 1 or num_guests > 12:
-            return jsonify({'error': 'Number of guests must be between 1 and 12'}), 400
-        
-        # Get restaurant operating hours based on SRS requirements
-        # Monday-Saturday: 5:00PM - 11:00 PM; Sunday: 5:00 PM - 9:00 PM
-        day_of_week = date_obj.weekday()  # 0=Monday, 6=Sunday
-        
-        if day_of_week == 6:  # Sunday
-            start_hour = 17  # 5:00 PM
-            end_hour = 21    # 9:00 PM
-        else:  # Monday-Saturday
-            start_hour = 17  # 5:00 PM
-            end_hour = 23    # 11:00 PM
-        
-        # Generate 30-minute time slots
-        available_slots = []
-        slot_duration_minutes = 30
-        
-        for hour in range(start_hour, end_hour):
-            for minute in [0, 30]:
-                # Skip the last slot if it would go past closing time
-                slot_time = datetime.combine(date_obj, datetime.min.time().replace(hour=hour, minute=minute))
-                slot_end_time = slot_time + timedelta(hours=2)  # 2-hour reservation duration
-                
-                if slot_end_time.hour > end_hour:
-                    continue
-                
-                # Check if this time slot is available
-                available_table = find_available_table(slot_time, num_guests)
-                
-                if available_table:
-                    available_slots.append({
-                        'time': slot_time.strftime('%H:%M'),
-                        'datetime': slot_time.isoformat(),
-                        'available_table_count': count_available_tables(slot_time, num_guests)
-                    })
+            return jsonify({'error': 'limit must be a valid integer'}), 400
+        
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                cursor_datetime, cursor_id = decode_cursor(cursor)
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+            query = after_cursor(query, cursor_datetime, cursor_id)
+        
+        reservations = query.limit(limit + 1).all()
+        has_more = len(reservations) > limit
+        reservations = reservations[:limit]
         
         return jsonify({
-            'date': date_str,
-            'num_of_guests': num_guests,
-            'available_slots': available_slots,
-            'total_available_slots': len(available_slots)
+            'reservations': [reservation.to_dict() for reservation in reservations],
+            'count': len(reservations),
+            'next_cursor': encode_cursor(reservations[-1]) if has_more else None
         }), 200
         
     except Exception as e:
@@ -204,6 +405,9 @@ def get_reservation(reservation_id):
     """Get reservation details by ID"""
     try:
         reservation = Reservation.query.get(reservation_id)
+        if not reservation:
+            # Old completed/cancelled reservations are moved to the archive
+            reservation = ReservationArchive.query.get(reservation_id)
         if not reservation:
             return jsonify({'error': 'Reservation not found'}), 404
         
@@ -219,20 +423,22 @@ def update_reservation_status(reservation_id):
     Expected JSON: {"status": "cancelled"}
     """
     try:
-        data = request.get_json()
-        if not data or 'status' not in data:
-            return jsonify({'error': 'Missing required field: status'}), 400
-        
-        valid_statuses = ['confirmed', 'cancelled', 'completed']
-        if data['status'] not in valid_statuses:
-            return jsonify({'error': f'Invalid status. Must be one of: {valid_statuses}'}), 400
+        body, error = decode_request(StatusUpdateRequest)
+        if error:
+            return jsonify({'error': error}), 400
         
         reservation = Reservation.query.get(reservation_id)
         if not reservation:
             return jsonify({'error': 'Reservation not found'}), 404
         
-        reservation.status = data['status']
+        previous_status = reservation.status
+        reservation.status = body.status
         db.session.commit()
+        pin_to_primary()
+        
+        # Offer the freed table to the waitlist
+        if previous_status == 'confirmed' and reservation.status == 'cancelled':
+            backfill_cancelled_reservations.enqueue(reservation_ids=[reservation.reservation_id])
         
         return jsonify({
             'message': 'Reservation status updated successfully',
@@ -243,12 +449,115 @@ def update_reservation_status(reservation_id):
         db.session.rollback()
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
-def find_available_table(reservation_datetime, num_guests):
+def parse_reservation_request(body, location_id):
+    """
+    Check a decoded ReservationRequest against the email domain cache and
+    the location's operating calendar
+    Returns (booking dict, error message or None); booking holds the
+    customer_name, normalized email, email_domain, phone_number,
+    reservation_datetime and num_of_guests
+    """
+    # Validate email format; deliverability is checked in the background
+    email = normalize_email(body.email)
+    try:
+        domain = email_domain(email)
+    except EmailNotValidError:
+        return None, 'Invalid email format'
+    if domain_status(domain) == UNDELIVERABLE:
+        return None, 'The email domain does not accept email'
+    
+    # Validate reservation is in the future
+    reservation_datetime = body.reservation_datetime
+    if reservation_datetime <= datetime.utcnow():
+        return None, 'Reservation must be in the future'
+    
+    # Validate the restaurant is open for the whole reservation
+    if not operating_calendar.is_open_for(location_id, reservation_datetime,
+                                          reservation_duration(body.num_of_guests, reservation_datetime)):
+        return None, 'The restaurant is closed at the selected time'
+    
+    return {
+        'customer_name': body.customer_name,
+        'email': email,
+        'email_domain': domain,
+        'phone_number': body.phone_number,
+        'reservation_datetime': reservation_datetime,
+        'num_of_guests': body.num_of_guests
+    }, None
+
+def parse_slot_query(args):
+    """
+    Validate the date and num_of_guests query parameters of the slot
+    endpoints. Returns (date, num_guests, error message or None).
+    """
+    date_str = args.get('date')
+    num_guests_str = args.get('num_of_guests')
+    
+    if not date_str or not num_guests_str:
+        return None, None, 'Missing required query parameters: date, num_of_guests'
+    
+    # Parse date
+    try:
+        date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        return None, None, 'Invalid date format. Use YYYY-MM-DD'
+    
+    # Validate date is not in the past
+    if date_obj < datetime.now().date():
+        return None, None, 'Date cannot be in the past'
+    
+    try:
+        num_guests = int(num_guests_str)
+    except ValueError:
+        return None, None, 'num_of_guests must be a valid integer'
+    
+    if num_guests < 1 or num_guests > 12:
+        return None, None, 'Number of guests must be between 1 and 12'
+    
+    return date_obj, num_guests, None
+
+def format_event(event_name, payload, retry=None):
+    """Encode one server-sent event"""
+    lines = [f'event: {event_name}']
+    if retry is not None:
+        lines.append(f'retry: {retry}')
+    lines.append(f'data: {json.dumps(payload)}')
+    return '\n'.join(lines) + '\n\n'
+
+def build_available_slots(date_obj, num_guests, location_id):
+    """
+    Available time slots for a date and party size at a location, using the
+    precomputed slot templates of the operating calendar. The night's
+    bookings are loaded once and every slot is checked against them in
+    memory, each with the party's duration at that time.
+    """
+    tables = suitable_tables(num_guests, location_id)
+    if not tables:
+        return []
+    night = load_night_bookings(location_id, [table.table_id for table in tables], date_obj)
+    
+    available_slots = []
+    for slot_time in operating_calendar.slot_templates(location_id, date_obj):
+        duration = reservation_duration(num_guests, slot_time)
+        if not operating_calendar.is_open_for(location_id, slot_time, duration):
+            continue
+        slot_end = slot_time + duration
+        available_count = sum(1 for table in tables if night[table.table_id].is_free(slot_time, slot_end))
+        if available_count:
+            available_slots.append({
+                'time': slot_time.strftime('%H:%M'),
+                'datetime': slot_time.isoformat(),
+                'duration_minutes': int(duration.total_seconds() // 60),
+                'available_table_count': available_count
+            })
+    return available_slots
+
+def find_available_table(reservation_datetime, num_guests, location_id):
     """
-    Find an available table for the given datetime and party size
+    Find an available table at a location for the given datetime and party size
     Returns a random table from available tables that can accommodate the party
     """
-    available_tables = get_available_tables(reservation_datetime, num_guests)
+    available_tables = get_available_tables(reservation_datetime, num_guests, location_id)
     
     if not available_tables:
         return None
@@ -256,63 +565,155 @@ def find_available_table(reservation_datetime, num_guests):
     # Return a random available table (as per requirements)
     return random.choice(available_tables)
 
-def count_available_tables(reservation_datetime, num_guests):
+def count_available_tables(reservation_datetime, num_guests, location_id):
     """
-    Count the number of available tables for the given datetime and party size
+    Count the number of available tables at a location for the given datetime and party size
     """
-    available_tables = get_available_tables(reservation_datetime, num_guests)
+    available_tables = get_available_tables(reservation_datetime, num_guests, location_id)
     return len(available_tables)
 
-def get_available_tables(reservation_datetime, num_guests):
+def get_available_tables(reservation_datetime, num_guests, location_id, except_offer=None):
     """
-    Get all available tables for the given datetime and party size
-    Returns a list of available table objects
+    Get all available tables at a location for the given datetime and party size
+    Returns a list of available table objects. Tables held for waitlist
+    offers count as taken, except the one held for except_offer (a
+    waitlist_id accepting its offer).
     """
-    # Define time slot duration (assuming 2 hours per reservation)
-    slot_duration = timedelta(hours=2)
+    # The party holds its table for its own duration (party size, day part)
     slot_start = reservation_datetime
-    slot_end = reservation_datetime + slot_duration
+    slot_end = reservation_datetime + reservation_duration(num_guests, reservation_datetime)
     
-    # Find tables that can accommodate the party size
-    suitable_tables = Table.query.filter(
+    tables = suitable_tables(num_guests, location_id)
+    if not tables:
+        return []
+    
+    # One query over every candidate table for confirmed reservations (and
+    # offer holds) that could overlap the slot, checked exactly per table in memory
+    bookings = load_bookings(location_id, [table.table_id for table in tables], slot_start, slot_end,
+                             except_offer=except_offer)
+    return [table for table in tables if bookings[table.table_id].is_free(slot_start, slot_end)]
+
+def suitable_tables(num_guests, location_id):
+    """Active tables at a location that seat the party (location, capacity index)"""
+    return Table.query.filter(
         and_(
+            Table.location_id == location_id,
             Table.capacity >= num_guests,
             Table.is_active == True
         )
     ).all()
+
+def parse_date_bound(value, end_of_day):
+    """Parse a YYYY-MM-DD date (start or end of that day) or an ISO datetime"""
+    if len(value) == 10:
+        day = datetime.strptime(value, '%Y-%m-%d')
+        return day + timedelta(days=1) - timedelta(microseconds=1) if end_of_day else day
+    return datetime.fromisoformat(value)
+
+def build_reservation_query(args, location_id):
+    """
+    Build the filtered, keyset-ordered reservation query for list_reservations
+    over one location's reservations
+    Returns (query, None) or (None, error message)
+    """
+    query = Reservation.query.options(
+        joinedload(Reservation.customer),
+        joinedload(Reservation.table)
+    ).filter(Reservation.location_id == location_id)
     
-    if not suitable_tables:
-        return []
+    try:
+        if args.get('date_from'):
+            query = query.filter(Reservation.reservation_datetime >= parse_date_bound(args['date_from'], False))
+        if args.get('date_to'):
+            query = query.filter(Reservation.reservation_datetime <= parse_date_bound(args['date_to'], True))
+    except ValueError:
+        return None, 'Invalid date format. Use YYYY-MM-DD or ISO datetime'
+    
+    if args.get('status'):
+        statuses = [status.strip() for status in args['status'].split(',') if status.strip()]
+        invalid = [status for status in statuses if status not in VALID_STATUSES]
+        if invalid:
+            return None, f'Invalid status. Must be one of: {VALID_STATUSES}'
+        query = query.filter(Reservation.status.in_(statuses))
     
-    # Check which tables are available during the requested time slot
-    available_tables = []
-    for table in suitable_tables:
-        # Check for conflicting reservations
-        conflicting_reservations = Reservation.query.filter(
+    if args.get('table_number'):
+        try:
+            table_number = int(args['table_number'])
+        except ValueError:
+            return None, 'table_number must be a valid integer'
+        query = query.join(Table, Reservation.table_id == Table.table_id).filter(
+            Table.location_id == location_id,
+            Table.table_number == table_number
+        )
+    
+    if args.get('email'):
+        query = query.join(Customer, Reservation.customer_id == Customer.customer_id).filter(
+            email_matches(Customer.email, args['email'])
+        )
+    
+    return query.order_by(Reservation.reservation_datetime, Reservation.reservation_id), None
+
+def after_cursor(query, cursor_datetime, cursor_id):
+    """Restrict an ordered reservation query to rows after (cursor_datetime, cursor_id)"""
+    return query.filter(
+        or_(
+            Reservation.reservation_datetime > cursor_datetime,
             and_(
-                Reservation.table_id == table.table_id,
-                Reservation.status == 'confirmed',
-                or_(
-                    # Reservation starts during our slot
-                    and_(
-                        Reservation.reservation_datetime >= slot_start,
-                        Reservation.reservation_datetime < slot_end
-                    ),
-                    # Reservation ends during our slot
-                    and_(
-                        Reservation.reservation_datetime + slot_duration > slot_start,
-                        Reservation.reservation_datetime + slot_duration <= slot_end
-                    ),
-                    # Reservation encompasses our slot
-                    and_(
-                        Reservation.reservation_datetime <= slot_start,
-                        Reservation.reservation_datetime + slot_duration >= slot_end
-                    )
-                )
+                Reservation.reservation_datetime == cursor_datetime,
+                Reservation.reservation_id > cursor_id
             )
-        ).count()
-        
-        if conflicting_reservations == 0:
-            available_tables.append(table)
-    
-    return available_tables 
\ No newline at end of file
+        )
+    )
+
+def encode_cursor(reservation):
+    """Opaque keyset cursor for the position after reservation"""
+    raw = f'{reservation.reservation_datetime.isoformat()}|{reservation.reservation_id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError on malformed input"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        datetime_part, id_part = raw.split('|')
+        return datetime.fromisoformat(datetime_part), int(id_part)
+    except (UnicodeDecodeError, binascii.Error) as e:
+        raise ValueError(str(e))
+
+def iter_reservations(query, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Yield every reservation matching an ordered query, fetching keyset pages
+    of batch_size and detaching each page from the session afterwards so
+    memory stays constant however many rows are exported
+    """
+    page = query.limit(batch_size).all()
+    while page:
+        for reservation in page:
+            yield reservation
+        last = page[-1]
+        db.session.expunge_all()
+        if len(page) < batch_size:
+            break
+        page = after_cursor(query, last.reservation_datetime, last.reservation_id).limit(batch_size).all()
+
+def render_csv(query):
+    """Stream reservations as CSV, one line per row"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for reservation in iter_reservations(query):
+        row = reservation.to_dict()
+        writer.writerow([row[column] for column in EXPORT_COLUMNS])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+def render_ndjson(query):
+    """Stream reservations as newline delimited JSON"""
+    for reservation in iter_reservations(query):
+        yield json.dumps(reservation.to_dict()) + '\n'
+
+STREAM_FORMATS = {
+    'csv': ('text/csv', render_csv),
+    'ndjson': ('application/x-ndjson', render_ndjson),
+}
@@ -0,0 +1,183 @@
+from flask import Blueprint, g, jsonify
+from datetime import datetime
+from email_validator import EmailNotValidError
+from app import app, db
+from models import WaitlistEntry, Reservation
+from routes.reservations import find_available_table, get_available_tables
+from services.customers import normalize_email, resolve_customer_id, remember_customer
+from services.email_verification import UNDELIVERABLE, domain_status, email_domain, request_domain_check
+from services.locations import use_location
+from services.calendar import operating_calendar, reservation_duration, reservation_minutes
+from services.notifications import send_reservation_confirmation
+from services.schemas import WaitlistRequest, decode_request
+from services.waitlist import backfill_freed_tables, offered_slot
+
+waitlist_bp = Blueprint('waitlist', __name__)
+waitlist_bp.before_request(use_location)
+
+@waitlist_bp.route('/reservations/waitlist', methods=['POST'])
+def join_waitlist():
+    """
+    Join the waitlist for a fully booked time slot
+    Expected JSON: {
+        "customer_name": "John Doe",
+        "email": "john@example.com",
+        "phone_number": "123-456-7890",
+        "reservation_datetime": "2024-01-15T19:00:00",
+        "num_of_guests": 4,
+        "flexibility_minutes": 30,
+        "auto_book": true
+    }
+    flexibility_minutes (default 0) is how far either side of the requested
+    time the party would accept; with auto_book (default true) a freed
+    table is booked straight away, otherwise it is offered and held for
+    WAITLIST_OFFER_MINUTES.
+    """
+    try:
+        body, error = decode_request(WaitlistRequest)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        email = normalize_email(body.email)
+        try:
+            domain = email_domain(email)
+        except EmailNotValidError:
+            return jsonify({'error': 'Invalid email format'}), 400
+        if domain_status(domain) == UNDELIVERABLE:
+            return jsonify({'error': 'The email domain does not accept email'}), 400
+        
+        requested_datetime = body.reservation_datetime
+        if requested_datetime <= datetime.utcnow():
+            return jsonify({'error': 'Reservation must be in the future'}), 400
+        
+        num_guests = body.num_of_guests
+        flexibility = body.flexibility_minutes
+        max_flexibility = app.config['WAITLIST_MAX_FLEXIBILITY_MINUTES']
+        if flexibility > max_flexibility:
+            return jsonify({'error': f'flexibility_minutes must be between 0 and {max_flexibility}'}), 400
+        
+        if not operating_calendar.is_open_for(g.location_id, requested_datetime,
+                                              reservation_duration(num_guests, requested_datetime)):
+            return jsonify({'error': 'The restaurant is closed at the selected time'}), 400
+        
+        if find_available_table(requested_datetime, num_guests, g.location_id):
+            return jsonify({'error': 'A table is available for the selected time slot; please book it directly'}), 409
+        
+        customer_id = resolve_customer_id(body.customer_name, email, body.phone_number)
+        
+        entry = WaitlistEntry(
+            customer_id=customer_id,
+            location_id=g.location_id,
+            waitlist_date=requested_datetime.date(),
+            requested_datetime=requested_datetime,
+            flexibility_minutes=flexibility,
+            num_of_guests=num_guests,
+            auto_book=body.auto_book,
+            status='waiting'
+        )
+        db.session.add(entry)
+        db.session.commit()
+        remember_customer(email, customer_id)
+        request_domain_check(domain)
+        
+        return jsonify({
+            'message': 'Added to the waitlist successfully',
+            'waitlist_entry': entry.to_dict()
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+@waitlist_bp.route('/reservations/waitlist/<int:waitlist_id>', methods=['GET'])
+def get_waitlist_entry(waitlist_id):
+    """Get waitlist entry details by ID"""
+    try:
+        entry = WaitlistEntry.query.get(waitlist_id)
+        if not entry:
+            return jsonify({'error': 'Waitlist entry not found'}), 404
+        
+        return jsonify(entry.to_dict()), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+@waitlist_bp.route('/reservations/waitlist/<int:waitlist_id>/accept', methods=['POST'])
+def accept_waitlist_offer(waitlist_id):
+    """
+    Accept an offered table and turn it into a confirmed reservation
+    """
+    try:
+        entry = WaitlistEntry.query.get(waitlist_id)
+        if not entry:
+            return jsonify({'error': 'Waitlist entry not found'}), 404
+        
+        if entry.status != 'offered':
+            return jsonify({'error': f'Waitlist entry has no open offer (status: {entry.status})'}), 409
+        
+        if entry.offer_expires_at < datetime.utcnow():
+            entry.status = 'expired'
+            db.session.commit()
+            backfill_freed_tables([offered_slot(entry)])
+            return jsonify({'error': 'The offer has expired'}), 410
+        
+        # The offered table is held for this entry, but fall back to any fitting table just in case
+        available_tables = get_available_tables(entry.offered_datetime, entry.num_of_guests, entry.location_id,
+                                                except_offer=entry.waitlist_id)
+        table = next((t for t in available_tables if t.table_id == entry.offered_table_id), None)
+        if not table and available_tables:
+            table = available_tables[0]
+        if not table:
+            entry.status = 'expired'
+            db.session.commit()
+            return jsonify({'error': 'The offered table is no longer available'}), 409
+        
+        reservation = Reservation(
+            customer_id=entry.customer_id,
+            location_id=entry.location_id,
+            table_id=table.table_id,
+            reservation_datetime=entry.offered_datetime,
+            num_of_guests=entry.num_of_guests,
+            duration_minutes=reservation_minutes(entry.num_of_guests, entry.offered_datetime),
+            status='confirmed'
+        )
+        db.session.add(reservation)
+        db.session.flush()
+        entry.status = 'booked'
+        entry.reservation_id = reservation.reservation_id
+        db.session.commit()
+        send_reservation_confirmation.enqueue(reservation_id=reservation.reservation_id)
+        
+        return jsonify({
+            'message': 'Reservation created successfully',
+            'reservation': reservation.to_dict(),
+            'table_number': table.table_number
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+@waitlist_bp.route('/reservations/waitlist/<int:waitlist_id>', methods=['DELETE'])
+def leave_waitlist(waitlist_id):
+    """Leave the waitlist (or decline an offer, passing the table on)"""
+    try:
+        entry = WaitlistEntry.query.get(waitlist_id)
+        if not entry:
+            return jsonify({'error': 'Waitlist entry not found'}), 404
+        
+        if entry.status not in ('waiting', 'offered'):
+            return jsonify({'message': f'Waitlist entry is already {entry.status}'}), 200
+        
+        declined_offer = entry.status == 'offered'
+        entry.status = 'cancelled'
+        db.session.commit()
+        
+        if declined_offer:
+            backfill_freed_tables([offered_slot(entry)])
+        
+        return jsonify({'message': 'Removed from the waitlist successfully'}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
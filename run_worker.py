@@ -0,0 +1,35 @@
+"""
+Standalone background job worker for Café Fausse
+Runs the database job queue (TASK_BACKEND=database) in its own process, for
+deployments that set TASK_WORKER_IN_PROCESS=false on the web workers
+
+Usage:
+    TASK_BACKEND=database python run_worker.py
+"""
+
+import signal
+
+from app import app
+from services.tasks import DatabaseJobWorker
+import services.notifications  # noqa: F401 - registers the notification tasks
+
+
+def main():
+    if app.config['TASK_BACKEND'] != 'database':
+        print("run_worker.py only processes the database backend (set TASK_BACKEND=database)")
+        return
+
+    worker = DatabaseJobWorker()
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: worker.stop_event.set())
+
+    print("Background job worker started")
+    worker.start()
+    while worker.is_alive():
+        worker.join(timeout=1)
+    worker.executor.shutdown(wait=True)
+    print("Background job worker stopped")
+
+
+if __name__ == '__main__':
+    main()
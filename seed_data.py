@@ -4,7 +4,9 @@ Run this script to populate the database with initial data
 """
 
 from app import app, db
-from models import MenuCategory, MenuItem, Table, Admin
+from models import MenuCategory, MenuItem, Table, Admin, OperatingHours
+from services.calendar import DEFAULT_WEEKLY_HOURS
+from services.locations import ensure_default_location
 from datetime import datetime
 
 def init_database():
@@ -14,12 +16,20 @@ def init_database():
         db.create_all()
         print("Database tables created successfully!")
 
+def seed_locations():
+    """Create the default location (DEFAULT_LOCATION) that the other seeds fill"""
+    with app.app_context():
+        location_id = ensure_default_location()
+        print(f"Default location '{app.config['DEFAULT_LOCATION']}' has id {location_id}")
+
 def seed_menu_data():
-    """Seed the database with menu categories and items from SRS requirements"""
+    """Seed the default location with menu categories and items from SRS requirements"""
     with app.app_context():
         try:
+            location_id = ensure_default_location()
             # Check if menu data already exists
-            if MenuCategory.query.first() and MenuItem.query.first():
+            if MenuCategory.query.filter_by(location_id=location_id).first() and \
+                    MenuItem.query.filter_by(location_id=location_id).first():
                 print("Menu data already exists. Skipping menu seeding.")
                 return
             
@@ -34,6 +44,7 @@ def seed_menu_data():
             category_objects = {}
             for cat_data in categories:
                 category = MenuCategory(
+                    location_id=location_id,
                     category_name=cat_data['name'],
                     display_order=cat_data['order'],
                     is_active=True
@@ -144,6 +155,7 @@ def seed_menu_data():
             for item_data in menu_items:
                 category_obj = category_objects[item_data['category']]
                 item = MenuItem(
+                    location_id=location_id,
                     category_id=category_obj.category_id,
                     item_name=item_data['name'],
                     description=item_data['description'],
@@ -162,11 +174,12 @@ def seed_menu_data():
             print(f"Error seeding menu data: {str(e)}")
 
 def seed_tables():
-    """Create 30 tables as specified in requirements (FR-8)"""
+    """Create 30 tables at the default location as specified in requirements (FR-8)"""
     with app.app_context():
         try:
+            location_id = ensure_default_location()
             # Check if tables already exist
-            if Table.query.first():
+            if Table.query.filter_by(location_id=location_id).first():
                 print("Table data already exists. Skipping table seeding.")
                 return
             
@@ -192,6 +205,7 @@ def seed_tables():
             
             for table_data in tables_data:
                 table = Table(
+                    location_id=location_id,
                     table_number=table_data['number'],
                     capacity=table_data['capacity'],
                     is_active=True
@@ -205,6 +219,32 @@ def seed_tables():
             db.session.rollback()
             print(f"Error seeding tables: {str(e)}")
 
+def seed_operating_hours():
+    """Create the default location's weekly opening hours from the SRS (Mon-Sat 17-23, Sun 17-21)"""
+    with app.app_context():
+        try:
+            location_id = ensure_default_location()
+            # Check if hours already exist
+            if OperatingHours.query.filter_by(location_id=location_id).first():
+                print("Operating hours already exist. Skipping hours seeding.")
+                return
+            
+            for weekday, (open_time, close_time) in DEFAULT_WEEKLY_HOURS.items():
+                db.session.add(OperatingHours(
+                    location_id=location_id,
+                    weekday=weekday,
+                    open_time=open_time,
+                    close_time=close_time,
+                    is_closed=False
+                ))
+            
+            db.session.commit()
+            print(f"Successfully created operating hours for {len(DEFAULT_WEEKLY_HOURS)} weekdays!")
+            
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error seeding operating hours: {str(e)}")
+
 def seed_admin_user():
     """Create a default admin user"""
     with app.app_context():
@@ -233,10 +273,14 @@ def run_all_seeds():
     """Run all seed functions"""
     print("Starting database initialization...")
     init_database()
+    print("\nSeeding locations...")
+    seed_locations()
     print("\nSeeding menu data...")
     seed_menu_data()
     print("\nSeeding tables...")
     seed_tables()
+    print("\nSeeding operating hours...")
+    seed_operating_hours()
     print("\nSeeding admin user...")
     seed_admin_user()
     print("\nDatabase initialization complete!")
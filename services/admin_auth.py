@@ -0,0 +1,35 @@
+"""
+Admin API access
+Admin endpoints (calendar, locations, reports, job queue, circuit breaker,
+the reservation listing and export, customer history) require an
+X-Admin-Token header matching ADMIN_TOKEN. While ADMIN_TOKEN is unset they
+answer 404, so a deployment that never configured a token exposes none of
+them.
+"""
+
+import hmac
+from functools import wraps
+
+from flask import jsonify, request
+
+from app import app
+
+
+def tokens_match(supplied, expected):
+    """Constant-time comparison of a header value with a configured token"""
+    if not expected or supplied is None:
+        return False
+    # Compared as bytes: compare_digest rejects non-ASCII str
+    return hmac.compare_digest(supplied.encode('utf-8'), expected.encode('utf-8'))
+
+
+def admin_required(view):
+    """Decorator for admin views: 404 without ADMIN_TOKEN, 401 without the header"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not app.config['ADMIN_TOKEN']:
+            return jsonify({'error': 'Not found'}), 404
+        if not tokens_match(request.headers.get('X-Admin-Token'), app.config['ADMIN_TOKEN']):
+            return jsonify({'error': 'A valid X-Admin-Token header is required'}), 401
+        return view(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,277 @@
+"""
+Occupancy analytics for Café Fausse
+Reservations (live and archived) of one location, or of every location,
+are read as raw rows in batches, never as ORM objects, into NumPy column
+arrays. Every report is then computed with
+vectorized operations (bincount, searchsorted, percentile) over those
+columns:
+
+- utilization by table: booked hours (each reservation's own duration)
+  against opening hours
+- covers per slot: guests seated per start time and weekday
+- cancellation and no-show rates: a past reservation still "confirmed"
+  was never marked completed, so it counts as a no-show
+- lead times: hours between booking and arrival
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import String, case, select, type_coerce
+
+from app import db
+from models import Reservation, ReservationArchive, Table
+from services.calendar import operating_calendar
+
+STATUS_CODES = {'confirmed': 0, 'cancelled': 1, 'completed': 2}
+CONFIRMED, CANCELLED, COMPLETED = 0, 1, 2
+FETCH_BATCH_SIZE = 50000
+LEAD_TIME_BUCKETS_HOURS = [0, 2, 6, 12, 24, 48, 72, 168, 336, 720]
+LEAD_TIME_PERCENTILES = [10, 25, 50, 75, 90, 99]
+WEEKDAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+class ReservationColumns:
+    """Reservation rows held as parallel NumPy arrays"""
+
+    def __init__(self, table_id, starts, guests, minutes, status, created):
+        self.table_id = table_id
+        self.starts = starts
+        self.guests = guests
+        self.minutes = minutes
+        self.status = status
+        self.created = created
+
+    def __len__(self):
+        return len(self.table_id)
+
+    @classmethod
+    def empty(cls):
+        return cls(
+            np.empty(0, dtype=np.int64), np.empty(0, dtype='datetime64[us]'),
+            np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64),
+            np.empty(0, dtype=np.int8), np.empty(0, dtype='datetime64[us]')
+        )
+
+    @classmethod
+    def from_rows(cls, rows):
+        table_id, starts, guests, minutes, status, created = zip(*rows)
+        return cls(
+            np.array(table_id, dtype=np.int64),
+            np.array(starts, dtype='datetime64[us]'),
+            np.array(guests, dtype=np.int64),
+            np.array(minutes, dtype=np.int64),
+            np.array(status, dtype=np.int8),
+            np.array(created, dtype='datetime64[us]')
+        )
+
+    @classmethod
+    def concatenate(cls, parts):
+        if not parts:
+            return cls.empty()
+        return cls(*(
+            np.concatenate([getattr(part, name) for part in parts])
+            for name in ('table_id', 'starts', 'guests', 'minutes', 'status', 'created')
+        ))
+
+
+def raw_datetime(column):
+    """
+    SQLite stores datetimes as ISO text; fetching the text and letting
+    NumPy parse a whole batch at once avoids building a datetime per row
+    """
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return type_coerce(column, String)
+    return column
+
+
+def fetch_columns(model, start, end, batch_size, location_id=None):
+    """
+    Yield ReservationColumns batches of model rows with start <= datetime < end,
+    at location_id if given
+    """
+    # Statuses come back as small integer codes so no strings reach Python
+    status_code = case(STATUS_CODES, value=model.status, else_=-1)
+    statement = select(
+        model.table_id, raw_datetime(model.reservation_datetime), model.num_of_guests,
+        model.duration_minutes, status_code, raw_datetime(model.created_at)
+    ).where(
+        model.reservation_datetime >= start,
+        model.reservation_datetime < end
+    )
+    if location_id is not None:
+        statement = statement.where(model.location_id == location_id)
+    result = db.session.execute(statement, execution_options={'yield_per': batch_size})
+    for rows in result.partitions():
+        yield ReservationColumns.from_rows(rows)
+
+
+def load_reservation_columns(start, end, include_archive=True, batch_size=FETCH_BATCH_SIZE, location_id=None):
+    """All reservations in [start, end) (at location_id if given) as one ReservationColumns"""
+    models = [Reservation, ReservationArchive] if include_archive else [Reservation]
+    return ReservationColumns.concatenate([
+        batch for model in models for batch in fetch_columns(model, start, end, batch_size, location_id)
+    ])
+
+
+def open_hours(start, end, location_id):
+    """Total opening hours of a location's operating calendar between two dates"""
+    total = timedelta()
+    day = start.date()
+    while datetime.combine(day, datetime.min.time()) < end:
+        hours = operating_calendar.hours_for(location_id, day)
+        if hours:
+            total += hours[1] - hours[0]
+        day += timedelta(days=1)
+    return total.total_seconds() / 3600
+
+
+def rate(numerator, denominator):
+    return round(float(numerator) / float(denominator), 4) if denominator else None
+
+
+def utilization_by_table(columns, start, end, location_id=None):
+    """
+    Booked hours, covers and fill per table against its location's total
+    opening hours (reported as open_hours for a single location)
+    """
+    statement = select(Table.table_id, Table.table_number, Table.capacity, Table.location_id) \
+        .order_by(Table.table_number)
+    if location_id is not None:
+        statement = statement.where(Table.location_id == location_id)
+    tables = db.session.execute(statement).all()
+    hours_by_location = {
+        table_location_id: open_hours(start, end, table_location_id)
+        for table_location_id in {row.location_id for row in tables}
+    }
+    seated = columns.status != CANCELLED
+    size = max([row.table_id for row in tables] + [int(columns.table_id.max(initial=0))]) + 1
+    bookings = np.bincount(columns.table_id[seated], minlength=size)
+    covers = np.bincount(columns.table_id[seated], weights=columns.guests[seated], minlength=size)
+    booked_hours = np.bincount(columns.table_id[seated], weights=columns.minutes[seated], minlength=size) / 60
+
+    return {
+        'open_hours': round(open_hours(start, end, location_id), 2) if location_id is not None else None,
+        'tables': [
+            {
+                'table_id': table_id,
+                'table_number': table_number,
+                'capacity': capacity,
+                'reservations': int(bookings[table_id]),
+                'covers': int(covers[table_id]),
+                'booked_hours': round(float(booked_hours[table_id]), 2),
+                'utilization': rate(booked_hours[table_id], hours_by_location[table_location_id]),
+                'seat_fill': rate(covers[table_id], bookings[table_id] * capacity)
+            }
+            for table_id, table_number, capacity, table_location_id in tables
+        ]
+    }
+
+
+def covers_per_slot(columns):
+    """Guests seated per start time, overall and per weekday"""
+    seated = columns.status != CANCELLED
+    starts = columns.starts[seated]
+    guests = columns.guests[seated]
+    days = starts.astype('datetime64[D]')
+    minute_of_day = ((starts - days) // np.timedelta64(1, 'm')).astype(np.int64)
+    # 1970-01-01 was a Thursday, so shift by 3 to make Monday 0
+    weekday = (days.astype(np.int64) + 3) % 7
+
+    slot_minutes, slot_index = np.unique(minute_of_day, return_inverse=True)
+    covers = np.bincount(slot_index * 7 + weekday, weights=guests, minlength=len(slot_minutes) * 7)
+    covers = covers.reshape(len(slot_minutes), 7)
+    reservations = np.bincount(slot_index, minlength=len(slot_minutes))
+    nights = len(np.unique(days))
+
+    return {
+        'nights': nights,
+        'slots': [
+            {
+                'time': f'{minute // 60:02d}:{minute % 60:02d}',
+                'reservations': int(reservations[index]),
+                'covers': int(covers[index].sum()),
+                'average_covers_per_night': round(float(covers[index].sum()) / nights, 2) if nights else 0.0,
+                'covers_by_weekday': {
+                    WEEKDAY_NAMES[day]: int(covers[index, day]) for day in range(7)
+                }
+            }
+            for index, minute in enumerate(slot_minutes.tolist())
+        ]
+    }
+
+
+def outcome_rates(columns, now):
+    """Cancellation and no-show rates, overall and by weekday"""
+    past = columns.starts < np.datetime64(now, 'us')
+    cancelled = columns.status == CANCELLED
+    no_show = past & (columns.status == CONFIRMED)
+    weekday = (columns.starts.astype('datetime64[D]').astype(np.int64) + 3) % 7
+
+    totals = np.bincount(weekday, minlength=7)
+    cancellations = np.bincount(weekday[cancelled], minlength=7)
+    past_seated = np.bincount(weekday[past & ~cancelled], minlength=7)
+    no_shows = np.bincount(weekday[no_show], minlength=7)
+
+    return {
+        'reservations': len(columns),
+        'cancelled': int(cancelled.sum()),
+        'no_shows': int(no_show.sum()),
+        'cancellation_rate': rate(cancelled.sum(), len(columns)),
+        'no_show_rate': rate(no_show.sum(), (past & ~cancelled).sum()),
+        'by_weekday': {
+            WEEKDAY_NAMES[day]: {
+                'reservations': int(totals[day]),
+                'cancellation_rate': rate(cancellations[day], totals[day]),
+                'no_show_rate': rate(no_shows[day], past_seated[day])
+            }
+            for day in range(7)
+        }
+    }
+
+
+def lead_time_distribution(columns):
+    """Percentiles and a histogram of hours between booking and arrival"""
+    known = ~np.isnat(columns.created)
+    lead_hours = (columns.starts[known] - columns.created[known]) / np.timedelta64(1, 'h')
+    lead_hours = lead_hours[lead_hours >= 0]
+    if not len(lead_hours):
+        return {'reservations': 0, 'mean_hours': None, 'percentiles': {}, 'histogram': []}
+
+    edges = np.array(LEAD_TIME_BUCKETS_HOURS + [np.inf])
+    counts = np.bincount(np.searchsorted(edges, lead_hours, side='right') - 1, minlength=len(edges) - 1)
+    return {
+        'reservations': int(len(lead_hours)),
+        'mean_hours': round(float(lead_hours.mean()), 2),
+        'percentiles': {
+            f'p{pct}': round(float(value), 2)
+            for pct, value in zip(LEAD_TIME_PERCENTILES, np.percentile(lead_hours, LEAD_TIME_PERCENTILES))
+        },
+        'histogram': [
+            {
+                'from_hours': LEAD_TIME_BUCKETS_HOURS[index],
+                'to_hours': LEAD_TIME_BUCKETS_HOURS[index + 1] if index + 1 < len(LEAD_TIME_BUCKETS_HOURS) else None,
+                'reservations': int(count)
+            }
+            for index, count in enumerate(counts[:len(LEAD_TIME_BUCKETS_HOURS)])
+        ]
+    }
+
+
+def occupancy_report(start, end, include_archive=True, now=None, location_id=None):
+    """
+    All occupancy reports for reservations starting in [start, end), at
+    location_id or across every location when None
+    """
+    now = now or datetime.now()
+    columns = load_reservation_columns(start, end, include_archive, location_id=location_id)
+    return {
+        'location_id': location_id,
+        'date_from': start.isoformat(),
+        'date_to': end.isoformat(),
+        'reservations': len(columns),
+        'utilization_by_table': utilization_by_table(columns, start, end, location_id),
+        'covers_per_slot': covers_per_slot(columns),
+        'outcome_rates': outcome_rates(columns, now),
+        'lead_times': lead_time_distribution(columns)
+    }
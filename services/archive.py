@@ -0,0 +1,121 @@
+"""
+Reservation archival and partition maintenance
+Moves old completed/cancelled reservations to reservation_archive and, on
+PostgreSQL, keeps monthly partitions of reservation created ahead of time
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, insert, delete, literal, text
+
+from app import app, db
+from models import Reservation, ReservationArchive
+
+ARCHIVABLE_STATUSES = ('completed', 'cancelled')
+ARCHIVE_COLUMNS = ['reservation_id', 'customer_id', 'location_id', 'table_id', 'reservation_datetime',
+                   'num_of_guests', 'duration_minutes', 'status', 'created_at']
+
+
+def month_start(value):
+    """First instant of the month containing value"""
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(value, months):
+    """First instant of the month months after value's month"""
+    month_index = value.year * 12 + value.month - 1 + months
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(start):
+    """Name of the monthly reservation partition starting at start"""
+    return f'reservation_y{start.year}m{start.month:02d}'
+
+
+def ensure_reservation_partitions(months_ahead=None, now=None):
+    """
+    Create any missing monthly partitions from the current month until
+    months_ahead months from now (PostgreSQL only). Rows that already landed
+    in the default partition for a new month are moved into it before the
+    partition is attached. Returns the names of the created partitions.
+    """
+    if db.engine.dialect.name != 'postgresql':
+        return []
+
+    months_ahead = app.config['PARTITION_MONTHS_AHEAD'] if months_ahead is None else months_ahead
+    first = month_start(now or datetime.utcnow())
+    existing = set(db.session.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'reservation'"
+    )).scalars())
+
+    created = []
+    for offset in range(months_ahead + 1):
+        start = add_months(first, offset)
+        name = partition_name(start)
+        if name in existing:
+            continue
+        end = add_months(start, 1)
+        bounds = {'start': start, 'end': end}
+        db.session.execute(text(f'CREATE TABLE "{name}" (LIKE reservation INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'))
+        db.session.execute(text(
+            f'WITH moved AS ('
+            f'  DELETE FROM reservation_default'
+            f'  WHERE reservation_datetime >= :start AND reservation_datetime < :end'
+            f'  RETURNING *'
+            f') INSERT INTO "{name}" SELECT * FROM moved'
+        ), bounds)
+        db.session.execute(text(
+            f"ALTER TABLE reservation ATTACH PARTITION \"{name}\" "
+            f"FOR VALUES FROM ('{start.isoformat(sep=' ')}') TO ('{end.isoformat(sep=' ')}')"
+        ))
+        created.append(name)
+
+    db.session.commit()
+    return created
+
+
+def archive_reservations(older_than_days=None, batch_size=5000, now=None):
+    """
+    Move completed and cancelled reservations older than older_than_days
+    into reservation_archive in batches, committing after each batch so
+    locks stay short. Confirmed rows (upcoming bookings and no-shows) are
+    left in place. Returns the number of archived rows.
+    """
+    older_than_days = app.config['ARCHIVE_AFTER_DAYS'] if older_than_days is None else older_than_days
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=older_than_days)
+    columns = [getattr(Reservation, name) for name in ARCHIVE_COLUMNS]
+    archived = 0
+
+    while True:
+        # Bounding on reservation_datetime lets PostgreSQL prune to old partitions
+        ids = db.session.execute(
+            select(Reservation.reservation_id)
+            .where(Reservation.reservation_datetime < cutoff)
+            .where(Reservation.status.in_(ARCHIVABLE_STATUSES))
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+
+        db.session.execute(
+            insert(ReservationArchive).from_select(
+                ARCHIVE_COLUMNS + ['archived_at'],
+                select(*columns, literal(now))
+                .where(Reservation.reservation_datetime < cutoff)
+                .where(Reservation.reservation_id.in_(ids))
+            )
+        )
+        db.session.execute(
+            delete(Reservation)
+            .where(Reservation.reservation_datetime < cutoff)
+            .where(Reservation.reservation_id.in_(ids))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        archived += len(ids)
+
+    return archived
@@ -0,0 +1,327 @@
+"""
+Live availability updates for Café Fausse
+Booking pages subscribe to a location, date and party size over
+server-sent events instead of polling the slots endpoint. Every change to a
+reservation marks its location and date dirty (a calendar change marks
+everything); a dispatcher thread per worker process recomputes the slots
+once per subscribed (location, date, party size) and sends each subscriber
+only the slots that changed.
+
+Changes reach every worker process through PostgreSQL LISTEN/NOTIFY: the
+NOTIFY is sent inside the writing transaction, so it is delivered only if
+that transaction commits. On other databases changes are dispatched within
+the committing process only.
+
+Each open stream occupies one request thread of its worker for as long as
+the page is open, so a worker accepts at most
+AVAILABILITY_STREAM_MAX_PER_WORKER streams and answers further ones with
+503; the rest of its threads stay free for ordinary requests (see
+gunicorn.conf.py).
+"""
+
+import os
+import queue
+import select
+import threading
+import time
+from datetime import date
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session, object_session
+
+from app import app, db
+from models import Reservation
+from services.calendar import operating_calendar
+
+NOTIFY_SQL = text('SELECT pg_notify(:channel, :payload)')
+CALENDAR_PAYLOAD = 'calendar'
+PENDING_KEY = 'availability_changes'
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+def index_slots(slots):
+    """Map each slot's HH:MM time to its slot dict"""
+    return {slot['time']: slot for slot in slots}
+
+
+def diff_slots(previous, current):
+    """Slots that appeared or changed count, and times that disappeared"""
+    changed = [
+        slot for time_key, slot in current.items()
+        if time_key not in previous
+        or previous[time_key]['available_table_count'] != slot['available_table_count']
+    ]
+    removed = [time_key for time_key in previous if time_key not in current]
+    return sorted(changed, key=lambda slot: slot['time']), sorted(removed)
+
+
+def change_payload(location_id, day):
+    """Notification payload for a change to a location's availability on day"""
+    return f'{location_id}:{day.isoformat()}'
+
+
+def parse_change_payload(payload):
+    """(location_id, date) from change_payload; raises ValueError when malformed"""
+    location_id, _, day = payload.partition(':')
+    return int(location_id), date.fromisoformat(day)
+
+
+class StreamLimitReached(Exception):
+    """Raised by subscribe when this worker already serves its maximum number of streams"""
+
+
+class AvailabilityBroker:
+    """
+    Per-process fan-out of availability deltas. Each (location, date, party
+    size) is recomputed once per change no matter how many clients watch it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._subscribers = {}
+        self._snapshots = {}
+        self._dirty = set()
+        self._calendar_changed = False
+        self._pid = None
+        self._threads = []
+
+    def _ensure_started(self):
+        # Threads do not survive fork, so start them lazily per process
+        with self._lock:
+            if self._pid == os.getpid() and all(thread.is_alive() for thread in self._threads):
+                return
+            self._pid = os.getpid()
+            self._threads = [threading.Thread(target=self._dispatch_loop, name='fusse-availability', daemon=True)]
+            if db.engine.dialect.name == 'postgresql':
+                self._threads.append(threading.Thread(target=self._listen_loop, name='fusse-availability-listen', daemon=True))
+            for thread in self._threads:
+                thread.start()
+
+    def subscribe(self, location_id, day, num_guests, snapshot, limit=None):
+        """
+        Register a subscriber and return (queue, slots). snapshot is a
+        callable computing the current slots, used when nobody else is
+        watching the same location, date and party size yet. Raises
+        StreamLimitReached when limit subscribers are already registered.
+        """
+        self._ensure_started()
+        key = (location_id, day, num_guests)
+        subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            if limit is not None and self._subscriber_total() >= limit:
+                raise StreamLimitReached()
+            self._subscribers.setdefault(key, set()).add(subscriber)
+            current = self._snapshots.get(key)
+        if current is None:
+            try:
+                current = index_slots(snapshot())
+            except Exception:
+                self.unsubscribe(location_id, day, num_guests, subscriber)
+                raise
+            with self._lock:
+                current = self._snapshots.setdefault(key, current)
+        return subscriber, sorted(current.values(), key=lambda slot: slot['time'])
+
+    def unsubscribe(self, location_id, day, num_guests, subscriber):
+        key = (location_id, day, num_guests)
+        with self._lock:
+            subscribers = self._subscribers.get(key)
+            if subscribers is None:
+                return
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[key]
+                self._snapshots.pop(key, None)
+
+    def mark_dirty(self, payloads):
+        """Queue change payloads (see change_payload) or CALENDAR_PAYLOAD for recomputation"""
+        with self._lock:
+            if not self._subscribers:
+                return
+            for payload in payloads:
+                if payload == CALENDAR_PAYLOAD:
+                    self._calendar_changed = True
+                else:
+                    try:
+                        self._dirty.add(parse_change_payload(payload))
+                    except ValueError:
+                        app.logger.warning(f'Ignoring malformed availability notification: {payload!r}')
+            self._wakeup.notify()
+
+    def _subscriber_total(self):
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def subscriber_count(self):
+        with self._lock:
+            return self._subscriber_total()
+
+    def _dispatch_loop(self):
+        while True:
+            with self._lock:
+                while not self._dirty and not self._calendar_changed:
+                    self._wakeup.wait()
+                calendar_changed = self._calendar_changed
+                keys = [
+                    key for key in self._subscribers
+                    if calendar_changed or key[:2] in self._dirty
+                ]
+                self._dirty = set()
+                self._calendar_changed = False
+
+            if calendar_changed:
+                operating_calendar.invalidate()
+            try:
+                self._dispatch(keys)
+            except Exception as e:
+                app.logger.error(f'Could not dispatch availability changes: {e}')
+
+    def _dispatch(self, keys):
+        # Imported here because routes.reservations publishes through this module
+        from routes.reservations import build_available_slots
+
+        if not keys:
+            return
+        with app.app_context():
+            try:
+                for key in keys:
+                    location_id, day, num_guests = key
+                    current = index_slots(build_available_slots(day, num_guests, location_id))
+                    with self._lock:
+                        previous = self._snapshots.get(key)
+                        subscribers = list(self._subscribers.get(key, ()))
+                        if previous is None or not subscribers:
+                            continue
+                        self._snapshots[key] = current
+                    changed, removed = diff_slots(previous, current)
+                    if not changed and not removed:
+                        continue
+                    delta = {
+                        'location_id': location_id,
+                        'date': day.isoformat(),
+                        'num_of_guests': num_guests,
+                        'changed': changed,
+                        'removed': removed
+                    }
+                    for subscriber in subscribers:
+                        self._deliver(subscriber, ('delta', delta), key, current)
+            finally:
+                db.session.remove()
+
+    def _deliver(self, subscriber, message, key, current):
+        try:
+            subscriber.put_nowait(message)
+        except queue.Full:
+            # A client that stopped reading gets one full snapshot instead of a backlog
+            while True:
+                try:
+                    subscriber.get_nowait()
+                except queue.Empty:
+                    break
+            subscriber.put_nowait(('snapshot', snapshot_event(*key, current.values())))
+
+    def _listen_loop(self):
+        channel = app.config['AVAILABILITY_CHANNEL']
+        delay = 1
+        while True:
+            connection = None
+            try:
+                # A dedicated connection outside the pool, held for LISTEN
+                raw = db.engine.raw_connection()
+                raw.detach()
+                connection = raw.driver_connection
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{channel}"')
+                delay = 1
+                # Anything missed while reconnecting is covered by a full recompute
+                self.mark_dirty([CALENDAR_PAYLOAD])
+                while True:
+                    if select.select([connection], [], [], 60)[0]:
+                        connection.poll()
+                        payloads = {notify.payload for notify in connection.notifies}
+                        connection.notifies.clear()
+                        if payloads:
+                            self.mark_dirty(payloads)
+            except Exception as e:
+                app.logger.warning(f'Availability listener disconnected, retrying in {delay}s: {e}')
+                time.sleep(delay)
+                delay = min(delay * 2, 60)
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+
+def snapshot_event(location_id, day, num_guests, slots):
+    """Payload of the full snapshot sent when a stream opens or resyncs"""
+    ordered = sorted(slots, key=lambda slot: slot['time'])
+    return {
+        'location_id': location_id,
+        'date': day.isoformat(),
+        'num_of_guests': num_guests,
+        'available_slots': ordered,
+        'total_available_slots': len(ordered),
+        'is_open': operating_calendar.hours_for(location_id, day) is not None,
+        'closure_reason': operating_calendar.closure_reason(location_id, day)
+    }
+
+
+def publish(connection, session, payloads):
+    """
+    Announce availability changes from inside a transaction. On PostgreSQL
+    the NOTIFY is transactional; elsewhere the payloads wait in the session
+    until it commits.
+    """
+    if connection.dialect.name == 'postgresql':
+        for payload in payloads:
+            connection.execute(NOTIFY_SQL, {'channel': app.config['AVAILABILITY_CHANNEL'], 'payload': payload})
+    elif session is not None:
+        session.info.setdefault(PENDING_KEY, set()).update(payloads)
+
+
+def notify_calendar_change():
+    """Recompute every live stream once the current transaction commits"""
+    publish(db.session.connection(), db.session(), [CALENDAR_PAYLOAD])
+
+
+def reservation_dates(target, include_previous):
+    """Change payloads of the location dates whose availability a reservation change affects"""
+    dates = {change_payload(target.location_id, target.reservation_datetime.date())}
+    if include_previous:
+        for previous in inspect(target).attrs.reservation_datetime.history.deleted:
+            if previous is not None:
+                dates.add(change_payload(target.location_id, previous.date()))
+    return dates
+
+
+@event.listens_for(Reservation, 'after_insert')
+@event.listens_for(Reservation, 'after_delete')
+def reservation_added_or_removed(mapper, connection, target):
+    publish(connection, object_session(target), reservation_dates(target, False))
+
+
+@event.listens_for(Reservation, 'after_update')
+def reservation_updated(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[name].history.has_changes()
+               for name in ('status', 'reservation_datetime', 'table_id')):
+        return
+    publish(connection, object_session(target), reservation_dates(target, True))
+
+
+@event.listens_for(Session, 'after_commit')
+def dispatch_committed_changes(session):
+    payloads = session.info.pop(PENDING_KEY, None)
+    if payloads:
+        availability_broker.mark_dirty(payloads)
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_rolled_back_changes(session):
+    session.info.pop(PENDING_KEY, None)
+
+
+availability_broker = AvailabilityBroker()
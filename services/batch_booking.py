@@ -0,0 +1,75 @@
+"""
+Table assignment for batch bookings
+Event planners send many reservations at once. All of them are placed
+against one in-memory view per night (services/night_view.py): one
+query for the active tables and one per night for existing bookings,
+however many reservations the batch holds. Each placement is added to the
+view straight away, so reservations within the batch never collide.
+
+Among the free tables of the smallest capacity that seats a party, the
+one whose free stretch the booking fills most tightly wins, so short gaps
+between existing bookings get used and long free stretches stay whole for
+later seatings.
+"""
+
+from collections import defaultdict
+
+from models import Table
+from services.calendar import operating_calendar, reservation_duration
+from services.night_view import load_night_bookings
+
+
+def assign_batch_tables(bookings, location_id):
+    """
+    Pick a table at location_id for each parsed booking (None entries are skipped).
+    Returns a list aligned with bookings holding a Table, or None where
+    nothing fits.
+
+    Larger parties are placed first since fewer tables fit them, and each
+    party gets the smallest free table that seats it so big tables stay
+    available for the rest of the batch, breaking ties by the tightest gap.
+    """
+    assignments = [None] * len(bookings)
+    if not any(bookings):
+        return assignments
+
+    tables = Table.query.filter(
+        Table.location_id == location_id,
+        Table.is_active == True
+    ).order_by(Table.capacity, Table.table_number).all()
+    by_day = defaultdict(list)
+    for index, booking in enumerate(bookings):
+        if booking:
+            by_day[booking['reservation_datetime'].date()].append(index)
+
+    for day, indexes in by_day.items():
+        night = load_night_bookings(location_id, [table.table_id for table in tables], day)
+        hours = operating_calendar.hours_for(location_id, day)
+        indexes.sort(key=lambda index: (-bookings[index]['num_of_guests'],
+                                        bookings[index]['reservation_datetime'], index))
+        for index in indexes:
+            start = bookings[index]['reservation_datetime']
+            end = start + reservation_duration(bookings[index]['num_of_guests'], start)
+            candidates = []
+            for table in tables:
+                if table.capacity < bookings[index]['num_of_guests']:
+                    continue
+                if candidates and table.capacity > candidates[0][1].capacity:
+                    break
+                gap = night[table.table_id].gap(start, end)
+                if gap is not None:
+                    candidates.append((slack(gap, start, end, hours), table))
+            if candidates:
+                table = min(candidates, key=lambda candidate: candidate[0])[1]
+                night[table.table_id].add(start, end)
+                assignments[index] = table
+    return assignments
+
+
+def slack(gap, start, end, hours):
+    """Free time a booking over [start, end) leaves either side of it in gap, within opening hours"""
+    free_from, free_until = gap
+    if hours:
+        free_from = max(free_from or hours[0], hours[0])
+        free_until = min(free_until or hours[1], hours[1])
+    return (start - (free_from or start)) + ((free_until or end) - end)
@@ -0,0 +1,217 @@
+"""
+Operating calendar for Café Fausse
+Weekly opening hours plus date exceptions (holidays, private events) per
+location, with the 30-minute reservation slots of each location and day
+precomputed and cached in memory. The slot endpoint, reservation
+validation and availability checks all read from here. A location without
+weekly hours of its own keeps DEFAULT_WEEKLY_HOURS.
+
+It also sets how long each reservation holds its table: a duration by
+party size (RESERVATION_DURATIONS, e.g. "2:90,4:120,8:150,12:180" for up
+to 2 guests 90 minutes, up to 4 guests 120 minutes, ...) adjusted by day
+part (RESERVATION_DAY_PARTS, e.g. "17:00=-15,18:30=0" for early seatings
+15 minutes shorter from 17:00 and full length from 18:30). The duration is
+stored on each reservation, so changing the policy only affects new ones.
+Overlap queries therefore look back the fixed MAX_DURATION_MINUTES
+(models.py) rather than the current policy's longest booking, and a
+policy allowing more than that is rejected at startup.
+
+The cache is invalidated locally whenever hours change through the admin
+endpoints and expires after CALENDAR_CACHE_TTL seconds so other worker
+processes pick up changes too.
+"""
+
+import threading
+import time as monotonic_time
+from datetime import datetime, time, timedelta
+
+from app import app
+from models import MAX_DURATION_MINUTES, OperatingHours, CalendarException
+
+# Monday-Saturday: 5:00 PM - 11:00 PM; Sunday: 5:00 PM - 9:00 PM (SRS)
+DEFAULT_WEEKLY_HOURS = {
+    weekday: (time(17, 0), time(21, 0) if weekday == 6 else time(23, 0))
+    for weekday in range(7)
+}
+SLOT_INTERVAL = timedelta(minutes=30)
+MAX_CACHED_DAYS = 400
+
+
+def parse_party_durations(value):
+    """'2:90,4:120' -> [(2, 90), (4, 120)], sorted by party size"""
+    durations = []
+    for part in filter(None, value.split(',')):
+        guests, minutes = part.split(':')
+        durations.append((int(guests), int(minutes)))
+    if not durations:
+        raise ValueError('RESERVATION_DURATIONS needs at least one party size')
+    return sorted(durations)
+
+
+def parse_day_parts(value):
+    """'17:00=-15,18:30=0' -> [(time(17, 0), -15), (time(18, 30), 0)], sorted by start"""
+    day_parts = []
+    for part in filter(None, value.split(',')):
+        start, minutes = part.split('=')
+        day_parts.append((time.fromisoformat(start), int(minutes)))
+    return sorted(day_parts)
+
+
+PARTY_DURATIONS = parse_party_durations(app.config['RESERVATION_DURATIONS'])
+DAY_PARTS = parse_day_parts(app.config['RESERVATION_DAY_PARTS'])
+# Slots are offered while the shortest booking still ends by closing time
+_party_minutes = [minutes for _, minutes in PARTY_DURATIONS]
+_day_part_minutes = [0] + [minutes for _, minutes in DAY_PARTS]
+MIN_RESERVATION_DURATION = max(SLOT_INTERVAL, timedelta(minutes=min(_party_minutes) + min(_day_part_minutes)))
+if max(_party_minutes) + max(_day_part_minutes) > MAX_DURATION_MINUTES:
+    raise ValueError(f'RESERVATION_DURATIONS and RESERVATION_DAY_PARTS allow reservations longer than '
+                     f'{MAX_DURATION_MINUTES} minutes')
+# Longest any stored reservation can be, under this policy or an earlier one
+MAX_RESERVATION_DURATION = timedelta(minutes=MAX_DURATION_MINUTES)
+
+
+def reservation_minutes(num_guests, start):
+    """Minutes a party of num_guests starting at start holds its table"""
+    minutes = next((m for guests, m in PARTY_DURATIONS if num_guests <= guests), PARTY_DURATIONS[-1][1])
+    adjustment = 0
+    for day_part_start, day_part_minutes in DAY_PARTS:
+        if start.time() < day_part_start:
+            break
+        adjustment = day_part_minutes
+    return max(int(SLOT_INTERVAL.total_seconds() // 60), minutes + adjustment)
+
+
+def reservation_duration(num_guests, start):
+    return timedelta(minutes=reservation_minutes(num_guests, start))
+
+
+def opening_datetimes(day, hours):
+    """(opening, closing) datetimes on day from (open_time, close_time), or None when closed"""
+    if not hours or not hours[0] or not hours[1]:
+        return None
+    return datetime.combine(day, hours[0]), datetime.combine(day, hours[1])
+
+
+class OperatingCalendar:
+    """In-memory view of every location's opening hours with per-day slot templates"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._weekly = {}
+        self._exceptions = {}
+        self._templates = {}
+
+    def _ensure_loaded(self):
+        ttl = app.config['CALENDAR_CACHE_TTL']
+        if self._loaded_at is not None and monotonic_time.monotonic() - self._loaded_at < ttl:
+            return
+        with self._lock:
+            if self._loaded_at is not None and monotonic_time.monotonic() - self._loaded_at < ttl:
+                return
+            weekly = {}
+            for hours in OperatingHours.query.all():
+                weekly.setdefault(hours.location_id, dict(DEFAULT_WEEKLY_HOURS))[hours.weekday] = \
+                    None if hours.is_closed else (hours.open_time, hours.close_time)
+            exceptions = {
+                (exception.location_id, exception.exception_date): (
+                    None if exception.is_closed else (exception.open_time, exception.close_time),
+                    exception.reason
+                )
+                for exception in CalendarException.query.filter(
+                    CalendarException.exception_date >= datetime.now().date() - timedelta(days=1)
+                ).all()
+            }
+            self._weekly = weekly
+            self._exceptions = exceptions
+            self._templates = {}
+            self._loaded_at = monotonic_time.monotonic()
+
+    def invalidate(self):
+        """Drop cached hours and slot templates; the next lookup reloads them"""
+        with self._lock:
+            self._loaded_at = None
+            self._templates = {}
+
+    def hours_for(self, location_id, day):
+        """(opening datetime, closing datetime) at a location on a date, or None when closed"""
+        self._ensure_loaded()
+        if (location_id, day) in self._exceptions:
+            hours = self._exceptions[(location_id, day)][0]
+        else:
+            hours = self._weekly.get(location_id, DEFAULT_WEEKLY_HOURS).get(day.weekday())
+        return opening_datetimes(day, hours)
+
+    def hours_between(self, location_id, first_day, last_day):
+        """
+        hours_for every date in [first_day, last_day], as {date: hours}. The
+        cache only keeps exceptions from yesterday on, so this reads the
+        range's exceptions itself and covers past dates too (e.g. for
+        generated history).
+        """
+        self._ensure_loaded()
+        exceptions = {
+            exception.exception_date: None if exception.is_closed else (exception.open_time, exception.close_time)
+            for exception in CalendarException.query.filter(
+                CalendarException.location_id == location_id,
+                CalendarException.exception_date.between(first_day, last_day)
+            ).all()
+        }
+        weekly = self._weekly.get(location_id, DEFAULT_WEEKLY_HOURS)
+        hours_by_day = {}
+        day = first_day
+        while day <= last_day:
+            hours = exceptions[day] if day in exceptions else weekly.get(day.weekday())
+            hours_by_day[day] = opening_datetimes(day, hours)
+            day += timedelta(days=1)
+        return hours_by_day
+
+    def closure_reason(self, location_id, day):
+        """Reason recorded for a location's date exception, if any"""
+        self._ensure_loaded()
+        exception = self._exceptions.get((location_id, day))
+        return exception[1] if exception else None
+
+    def slot_templates(self, location_id, day):
+        """
+        Start datetimes of every bookable slot at a location on day: every
+        SLOT_INTERVAL from opening such that the shortest booking ends by
+        closing time. Longer bookings near closing are filtered with
+        is_open_for. Computed once per location and day and cached.
+        """
+        self._ensure_loaded()
+        templates = self._templates.get((location_id, day))
+        if templates is not None:
+            return templates
+
+        slots = []
+        hours = self.hours_for(location_id, day)
+        if hours:
+            opening, closing = hours
+            slot = opening
+            while slot + MIN_RESERVATION_DURATION <= closing:
+                slots.append(slot)
+                slot += SLOT_INTERVAL
+        templates = tuple(slots)
+
+        with self._lock:
+            if len(self._templates) >= MAX_CACHED_DAYS:
+                self._templates.clear()
+            self._templates[(location_id, day)] = templates
+        return templates
+
+    def is_open_for(self, location_id, start, duration):
+        """True if a booking from start lasting duration fits within the location's opening hours"""
+        hours = self.hours_for(location_id, start.date())
+        if not hours:
+            return False
+        opening, closing = hours
+        return opening <= start and start + duration <= closing
+
+    def weekly_hours(self, location_id):
+        """A location's effective weekly hours, keyed by weekday"""
+        self._ensure_loaded()
+        return dict(self._weekly.get(location_id, DEFAULT_WEEKLY_HOURS))
+
+
+operating_calendar = OperatingCalendar()
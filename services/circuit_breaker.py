@@ -0,0 +1,220 @@
+"""
+Circuit breaker for the primary database
+Every statement on the primary engine is recorded. Connection and
+operational errors, and statements slower than CIRCUIT_SLOW_QUERY_MS,
+count as failures. When at least CIRCUIT_FAILURE_THRESHOLD of the
+statements in the last CIRCUIT_WINDOW_SECONDS failed, making up at least
+CIRCUIT_FAILURE_RATE of them, the circuit opens:
+
+- Requests fail fast with 503 and Retry-After instead of queueing for a
+  connection, so a slow database cannot tie up every worker.
+- Views decorated with circuit_fallback answer in degraded form instead:
+  the menu from its last snapshot, availability with a "call us" message.
+  The location directory keeps serving its last load too.
+- After CIRCUIT_OPEN_SECONDS the circuit is half-open: one request runs a
+  SELECT 1 probe, closing the circuit if it succeeds and re-opening it if
+  not, while every other request keeps failing fast.
+
+State is per worker process. Views marked circuit_exempt (health checks,
+the breaker's own metrics) are never rejected.
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from functools import wraps
+
+from flask import jsonify, request
+from sqlalchemy import event, exc, text
+
+from app import app, db
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+MAX_WINDOW_EVENTS = 10000
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of querying while the circuit is open"""
+
+
+class CircuitBreaker:
+    """Error and latency based circuit breaker with half-open probing"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+        self._events = deque(maxlen=MAX_WINDOW_EVENTS)
+        self.state = CLOSED
+        self.opened_at = None
+        self.last_error = None
+        self.counters = {
+            'statements': 0, 'failures': 0, 'slow_statements': 0, 'trips': 0,
+            'rejected': 0, 'fallbacks': 0, 'probes_succeeded': 0, 'probes_failed': 0
+        }
+
+    def _prune(self, now):
+        horizon = now - app.config['CIRCUIT_WINDOW_SECONDS']
+        while self._events and self._events[0][0] < horizon:
+            self._events.popleft()
+
+    def record(self, failed, error=None):
+        """Record one statement outcome; may trip the circuit"""
+        now = time.monotonic()
+        with self._lock:
+            self.counters['statements'] += 1
+            self._events.append((now, failed))
+            if not failed:
+                return
+            self.counters['failures'] += 1
+            self.last_error = error
+            if self.state != CLOSED:
+                return
+            self._prune(now)
+            failures = sum(1 for _, outcome in self._events if outcome)
+            if failures >= app.config['CIRCUIT_FAILURE_THRESHOLD'] and \
+                    failures >= len(self._events) * app.config['CIRCUIT_FAILURE_RATE']:
+                self._trip(now)
+
+    def _trip(self, now):
+        self.state = OPEN
+        self.opened_at = now
+        self.counters['trips'] += 1
+        app.logger.error(f'Database circuit opened: {self.last_error}')
+
+    def allow(self):
+        """True when the database may be used by this request"""
+        if self.state == CLOSED:
+            return True
+        if time.monotonic() - self.opened_at < app.config['CIRCUIT_OPEN_SECONDS']:
+            return False
+        # Half-open: one request probes while the others keep failing fast
+        if not self._probe_lock.acquire(blocking=False):
+            return False
+        try:
+            self.state = HALF_OPEN
+            return self._probe()
+        finally:
+            self._probe_lock.release()
+
+    def _probe(self):
+        try:
+            with app.app_context(), db.engine.connect() as connection:
+                connection.execute(text('SELECT 1'))
+        except Exception as e:
+            with self._lock:
+                self.counters['probes_failed'] += 1
+                self.last_error = str(e)
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+            return False
+        with self._lock:
+            self.counters['probes_succeeded'] += 1
+            self._events.clear()
+            self.state = CLOSED
+            self.opened_at = None
+        app.logger.info('Database circuit closed')
+        return True
+
+    def count(self, counter):
+        with self._lock:
+            self.counters[counter] += 1
+
+    def retry_after(self):
+        if self.opened_at is None:
+            return 1
+        remaining = app.config['CIRCUIT_OPEN_SECONDS'] - (time.monotonic() - self.opened_at)
+        return max(1, int(round(remaining)))
+
+    def stats(self):
+        with self._lock:
+            self._prune(time.monotonic())
+            return {
+                'state': self.state,
+                'open_for_seconds': round(time.monotonic() - self.opened_at, 1) if self.opened_at else None,
+                'window': {
+                    'seconds': app.config['CIRCUIT_WINDOW_SECONDS'],
+                    'statements': len(self._events),
+                    'failures': sum(1 for _, failed in self._events if failed)
+                },
+                'last_error': self.last_error,
+                'checked_at': datetime.now().isoformat(),
+                **self.counters
+            }
+
+
+database_circuit = CircuitBreaker()
+
+
+def circuit_exempt(view):
+    """Decorator for views that never touch the database"""
+    view.circuit_exempt = True
+    return view
+
+
+def circuit_fallback(fallback):
+    """
+    Decorator for views that can answer in degraded form while the circuit
+    is open. fallback(view, *args, **kwargs) returns that response, or None
+    when it has nothing to serve (the request then fails fast).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if database_circuit.allow():
+                return view(*args, **kwargs)
+            response = fallback(view, *args, **kwargs)
+            if response is None:
+                return circuit_open_response()
+            database_circuit.count('fallbacks')
+            return response
+        wrapper.circuit_exempt = True
+        return wrapper
+    return decorator
+
+
+def circuit_open_response():
+    database_circuit.count('rejected')
+    response = jsonify({'error': 'Service temporarily unavailable, please try again shortly'})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(database_circuit.retry_after())
+    return response
+
+
+@app.before_request
+def fail_fast_when_open():
+    if database_circuit.allow():
+        return
+    view = app.view_functions.get(request.endpoint)
+    if view is None or getattr(view, 'circuit_exempt', False):
+        return
+    return circuit_open_response()
+
+
+def is_database_failure(error):
+    """Connection and server-side failures, not errors in the request itself"""
+    return isinstance(error, (exc.OperationalError, exc.InterfaceError, exc.TimeoutError))
+
+
+with app.app_context():
+    primary_engine = db.engine
+
+
+@event.listens_for(primary_engine, 'before_cursor_execute')
+def start_circuit_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info['circuit_started'] = time.perf_counter()
+
+
+@event.listens_for(primary_engine, 'after_cursor_execute')
+def record_statement(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info.pop('circuit_started', time.perf_counter())) * 1000
+    slow = elapsed_ms > app.config['CIRCUIT_SLOW_QUERY_MS']
+    if slow:
+        database_circuit.count('slow_statements')
+    database_circuit.record(slow, f'Statement took {elapsed_ms:.0f} ms' if slow else None)
+
+
+@event.listens_for(primary_engine, 'handle_error')
+def record_statement_error(context):
+    if context.is_disconnect or is_database_failure(context.sqlalchemy_exception):
+        database_circuit.record(True, str(context.original_exception))
@@ -0,0 +1,181 @@
+"""
+Customer reservation history
+A visit is a completed reservation, whether still live or archived. Each
+customer row carries its visit aggregates (visit_count, visit_guests for
+the average party size, last_visit_at) so a profile is one primary key
+lookup however long the guest's history is:
+
+- Reservation mapper events adjust them with a single UPDATE ... SET
+  visit_count = visit_count + 1 in the same flush as the reservation
+  write, so they commit or roll back with it and concurrent writes for the
+  same guest can't lose an increment.
+- Taking a visit back (a completed reservation reopened, edited or
+  deleted) decrements the counts and re-reads last_visit_at for that one
+  customer, since a maximum can't be decremented.
+- Archiving moves rows without changing their status and leaves the
+  aggregates alone. Writes that bypass the ORM (generate_data.py's bulk
+  load) call refresh_customer_stats afterwards.
+
+The history itself lists the guest's upcoming confirmed reservations (the
+first MAX_UPCOMING, with a has_more flag), then the past ones newest
+first across the live and archive tables, in keyset pages with table and
+customer loaded in the same query.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import and_, event, func, inspect, or_, select, union_all, update
+from sqlalchemy.orm import joinedload
+
+from models import Customer, Reservation, ReservationArchive
+
+VISIT_STATUS = 'completed'
+MAX_UPCOMING = 50
+
+customer_table = Customer.__table__
+
+
+def completed_visits():
+    """customer_id, num_of_guests, reservation_datetime of every visit, live and archived"""
+    return union_all(
+        select(Reservation.customer_id, Reservation.num_of_guests, Reservation.reservation_datetime)
+        .where(Reservation.status == VISIT_STATUS),
+        select(ReservationArchive.customer_id, ReservationArchive.num_of_guests,
+               ReservationArchive.reservation_datetime)
+        .where(ReservationArchive.status == VISIT_STATUS)
+    ).subquery('visits')
+
+
+def last_visit_subquery():
+    visits = completed_visits()
+    return select(func.max(visits.c.reservation_datetime)).where(
+        visits.c.customer_id == customer_table.c.customer_id
+    ).scalar_subquery()
+
+
+def refresh_customer_stats(connection, customer_ids=None):
+    """
+    Recompute the visit aggregates from the reservation tables, for every
+    customer or just customer_ids. Returns the number of customers updated.
+    """
+    visits = completed_visits()
+    own_visits = visits.c.customer_id == customer_table.c.customer_id
+    stmt = update(customer_table).values(
+        visit_count=select(func.count()).select_from(visits).where(own_visits).scalar_subquery(),
+        visit_guests=select(func.coalesce(func.sum(visits.c.num_of_guests), 0)).where(own_visits).scalar_subquery(),
+        last_visit_at=select(func.max(visits.c.reservation_datetime)).where(own_visits).scalar_subquery()
+    )
+    if customer_ids is not None:
+        stmt = stmt.where(customer_table.c.customer_id.in_(customer_ids))
+    return connection.execute(stmt).rowcount
+
+
+def add_visit(connection, customer_id, num_of_guests, reservation_datetime):
+    connection.execute(update(customer_table).where(
+        customer_table.c.customer_id == customer_id
+    ).values(
+        visit_count=customer_table.c.visit_count + 1,
+        visit_guests=customer_table.c.visit_guests + num_of_guests,
+        last_visit_at=func.coalesce(
+            func.max(customer_table.c.last_visit_at, reservation_datetime)
+            if connection.dialect.name == 'sqlite'
+            else func.greatest(customer_table.c.last_visit_at, reservation_datetime),
+            reservation_datetime
+        )
+    ))
+
+
+def remove_visit(connection, customer_id, num_of_guests):
+    connection.execute(update(customer_table).where(
+        customer_table.c.customer_id == customer_id
+    ).values(
+        visit_count=customer_table.c.visit_count - 1,
+        visit_guests=customer_table.c.visit_guests - num_of_guests,
+        last_visit_at=last_visit_subquery()
+    ))
+
+
+def previous_value(state, name):
+    """An attribute's value before this flush"""
+    history = state.attrs[name].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.object, name)
+
+
+@event.listens_for(Reservation, 'after_insert')
+def reservation_inserted(mapper, connection, target):
+    if target.status == VISIT_STATUS:
+        add_visit(connection, target.customer_id, target.num_of_guests, target.reservation_datetime)
+
+
+@event.listens_for(Reservation, 'after_update')
+def reservation_updated(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[name].history.has_changes()
+               for name in ('status', 'customer_id', 'num_of_guests', 'reservation_datetime')):
+        return
+    if previous_value(state, 'status') == VISIT_STATUS:
+        remove_visit(connection, previous_value(state, 'customer_id'), previous_value(state, 'num_of_guests'))
+    if target.status == VISIT_STATUS:
+        add_visit(connection, target.customer_id, target.num_of_guests, target.reservation_datetime)
+
+
+@event.listens_for(Reservation, 'after_delete')
+def reservation_deleted(mapper, connection, target):
+    if target.status == VISIT_STATUS:
+        remove_visit(connection, target.customer_id, target.num_of_guests)
+
+
+def upcoming_reservations(customer_id, now=None):
+    """
+    The customer's confirmed reservations from now on, soonest first, at
+    every location. Returns (reservations, has_more); at most MAX_UPCOMING
+    are returned.
+    """
+    now = now or datetime.utcnow()
+    upcoming = Reservation.query.options(
+        joinedload(Reservation.table),
+        joinedload(Reservation.customer)
+    ).filter(
+        Reservation.customer_id == customer_id,
+        Reservation.status == 'confirmed',
+        Reservation.reservation_datetime >= now
+    ).order_by(Reservation.reservation_datetime, Reservation.reservation_id).limit(MAX_UPCOMING + 1).all()
+    return upcoming[:MAX_UPCOMING], len(upcoming) > MAX_UPCOMING
+
+
+def before_cursor(model, cursor):
+    """Rows of model strictly before (cursor_datetime, cursor_id) in newest-first order"""
+    cursor_datetime, cursor_id = cursor
+    return or_(
+        model.reservation_datetime < cursor_datetime,
+        and_(model.reservation_datetime == cursor_datetime, model.reservation_id < cursor_id)
+    )
+
+
+def past_reservations(customer_id, limit, cursor=None, now=None):
+    """
+    One page of the customer's past reservations, newest first, merged from
+    the live and archive tables. Each table is read with the same keyset
+    filter and limit, so a page costs two index range scans however deep it
+    is. Returns (reservations, has_more).
+    """
+    now = now or datetime.utcnow()
+    page = []
+    for model in (Reservation, ReservationArchive):
+        query = model.query.options(
+            joinedload(model.table),
+            joinedload(model.customer)
+        ).filter(
+            model.customer_id == customer_id,
+            model.reservation_datetime < now
+        )
+        if cursor is not None:
+            query = query.filter(before_cursor(model, cursor))
+        page.extend(query.order_by(
+            model.reservation_datetime.desc(), model.reservation_id.desc()
+        ).limit(limit + 1).all())
+
+    page.sort(key=lambda reservation: (reservation.reservation_datetime, reservation.reservation_id), reverse=True)
+    return page[:limit], len(page) > limit
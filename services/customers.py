@@ -0,0 +1,104 @@
+"""
+Customer resolution for reservations
+Maps a guest's email to a customer_id with a single upsert, fronted by a
+bounded in-process LRU cache for returning guests
+"""
+
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app import app, db
+# normalize_email lives with the models it normalizes; re-exported for the views
+from models import Customer, email_matches, normalize_email
+
+
+class LRUCache:
+    """Small thread-safe LRU mapping with a fixed maximum size"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            return self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+customer_id_cache = LRUCache(app.config['CUSTOMER_CACHE_SIZE'])
+
+UPSERT_DIALECTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def resolve_customer_id(name, email, phone_number=None):
+    """
+    Return the customer_id for an email, creating the customer if needed.
+    Cached emails are answered without touching the database; otherwise a
+    single INSERT ... ON CONFLICT (lower(email)) DO UPDATE ... RETURNING
+    customer_id runs in the current transaction, which is safe against
+    concurrent bookings for the same new guest, whatever the case of the
+    address. Existing customers keep their stored name and phone number.
+
+    Call remember_customer() once the transaction has committed so a rolled
+    back insert never ends up in the cache.
+    """
+    # Core inserts skip the model's email validator, so normalize here
+    email = normalize_email(email)
+    customer_id = customer_id_cache.get(email)
+    if customer_id is not None:
+        return customer_id
+
+    insert = UPSERT_DIALECTS.get(db.session.get_bind().dialect.name)
+    if insert is None:
+        return _get_or_create_customer_id(name, email, phone_number)
+
+    stmt = insert(Customer).values(name=name, email=email, phone_number=phone_number)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[func.lower(Customer.email)],
+        set_={'email': stmt.excluded.email}
+    ).returning(Customer.customer_id)
+    return db.session.execute(stmt).scalar_one()
+
+
+def _get_or_create_customer_id(name, email, phone_number):
+    """Fallback for databases without INSERT ... ON CONFLICT support"""
+    customer = Customer.query.filter(email_matches(Customer.email, email)).first()
+    if not customer:
+        customer = Customer(name=name, email=email, phone_number=phone_number)
+        db.session.add(customer)
+        db.session.flush()
+    return customer.customer_id
+
+
+def remember_customer(email, customer_id):
+    """Cache a committed email -> customer_id mapping"""
+    customer_id_cache.put(email, customer_id)
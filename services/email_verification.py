@@ -0,0 +1,176 @@
+"""
+Email address validation for subscriptions and reservations
+Requests only check an address's syntax (no network). Whether its domain
+accepts mail (MX, or A/AAAA fallback) is resolved by a background task and
+cached per domain, so the DNS lookup never sits on the request path and
+one lookup serves every address at that domain, whichever endpoint it
+came from.
+
+- Newsletter subscriptions start "pending" and become "verified" (and get
+  their welcome email) or "undeliverable" once their domain is resolved;
+  addresses at a domain already known to be deliverable are verified
+  immediately, and known-undeliverable domains are rejected up front.
+- Lookups that time out or find no nameservers are neither cached nor
+  decided; the task fails and is retried with the task queue's backoff.
+- EMAIL_RESOLVER=stub swaps DNS for a local resolver that accepts every
+  domain except those listed in EMAIL_STUB_UNDELIVERABLE (and reserved
+  test TLDs), for development and tests.
+"""
+
+import threading
+import time
+
+from email_validator import EmailUndeliverableError, validate_email
+from email_validator.deliverability import validate_email_deliverability
+
+from app import app, db
+from models import Newsletter
+from services.notifications import send_newsletter_welcome
+from services.tasks import task
+
+PENDING = 'pending'
+VERIFIED = 'verified'
+UNDELIVERABLE = 'undeliverable'
+VERIFICATION_STATUSES = [PENDING, VERIFIED, UNDELIVERABLE]
+
+MAX_CACHED_DOMAINS = 50000
+# A queued check is not queued again for the same domain within this window
+CHECK_IN_FLIGHT_SECONDS = 300
+STUB_UNDELIVERABLE_TLDS = ('.invalid', '.test', '.example')
+
+
+def email_domain(email):
+    """
+    Check an address's syntax without any network access and return its
+    ASCII domain. Raises EmailNotValidError for malformed addresses.
+    """
+    return validate_email(email, check_deliverability=False).ascii_domain
+
+
+def dns_resolver(domain):
+    """True if domain accepts mail, False if not, None when DNS gave no answer"""
+    try:
+        info = validate_email_deliverability(domain, domain, timeout=app.config['EMAIL_DNS_TIMEOUT'])
+    except EmailUndeliverableError:
+        return False
+    return None if 'unknown-deliverability' in info else True
+
+
+class StubResolver:
+    """Offline resolver: every domain accepts mail unless listed as undeliverable"""
+
+    def __init__(self, undeliverable=()):
+        self.undeliverable = {domain.strip().lower() for domain in undeliverable if domain.strip()}
+
+    def __call__(self, domain):
+        return domain not in self.undeliverable and not domain.endswith(STUB_UNDELIVERABLE_TLDS)
+
+
+def get_resolver():
+    if app.config['EMAIL_RESOLVER'] == 'stub':
+        return StubResolver(app.config['EMAIL_STUB_UNDELIVERABLE'])
+    return dns_resolver
+
+
+class DomainCache:
+    """Thread-safe per-domain deliverability results with separate TTLs for good and bad answers"""
+
+    def __init__(self, maxsize=MAX_CACHED_DOMAINS):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._results = {}
+        self._in_flight = {}
+
+    def get(self, domain):
+        with self._lock:
+            cached = self._results.get(domain)
+            if cached is None:
+                return None
+            status, expires_at = cached
+            if expires_at <= time.monotonic():
+                del self._results[domain]
+                return None
+            return status
+
+    def put(self, domain, status):
+        ttl = app.config['EMAIL_DOMAIN_CACHE_TTL'] if status == VERIFIED else app.config['EMAIL_DOMAIN_NEGATIVE_TTL']
+        with self._lock:
+            self._results.pop(domain, None)
+            self._results[domain] = (status, time.monotonic() + ttl)
+            self._in_flight.pop(domain, None)
+            while len(self._results) > self.maxsize:
+                # Dicts keep insertion order, so this drops the oldest answer
+                del self._results[next(iter(self._results))]
+
+    def claim_check(self, domain):
+        """True if the caller should queue a check for domain (none is in flight)"""
+        now = time.monotonic()
+        with self._lock:
+            if self._in_flight.get(domain, 0) > now:
+                return False
+            self._in_flight[domain] = now + CHECK_IN_FLIGHT_SECONDS
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+            self._in_flight.clear()
+
+    def stats(self):
+        with self._lock:
+            statuses = [status for status, _ in self._results.values()]
+            return {
+                'domains': len(statuses),
+                'verified': statuses.count(VERIFIED),
+                'undeliverable': statuses.count(UNDELIVERABLE),
+                'checks_in_flight': len(self._in_flight)
+            }
+
+
+domain_cache = DomainCache()
+
+
+def domain_status(domain):
+    """VERIFIED or UNDELIVERABLE if the domain's deliverability is cached, else None"""
+    return domain_cache.get(domain)
+
+
+def request_domain_check(domain):
+    """
+    Queue a background deliverability check for domain unless its result
+    is cached or a check is already queued. Call after committing, since
+    the check updates pending subscriptions.
+    """
+    if domain_cache.get(domain) is None and domain_cache.claim_check(domain):
+        verify_email_domain.enqueue(domain=domain)
+
+
+@task()
+def verify_email_domain(domain):
+    """Resolve a domain's deliverability, cache it and settle pending subscriptions"""
+    status = domain_cache.get(domain)
+    if status is None:
+        deliverable = get_resolver()(domain)
+        if deliverable is None:
+            raise RuntimeError(f'Deliverability of {domain} could not be determined')
+        status = VERIFIED if deliverable else UNDELIVERABLE
+        domain_cache.put(domain, status)
+    apply_domain_status(domain, status)
+
+
+def apply_domain_status(domain, status):
+    """Move pending subscriptions at domain to status, welcoming newly verified subscribers"""
+    # Emails are stored as typed (possibly a Unicode domain); email_domain
+    # holds the ASCII form that domain is given in
+    subscriptions = Newsletter.query.filter(
+        Newsletter.verification_status == PENDING,
+        Newsletter.email_domain == domain
+    ).all()
+    for subscription in subscriptions:
+        subscription.verification_status = status
+    db.session.commit()
+
+    if status == VERIFIED:
+        for subscription in subscriptions:
+            if subscription.is_active:
+                send_newsletter_welcome.enqueue(email=subscription.email)
@@ -0,0 +1,142 @@
+"""
+HTTP caching for public endpoints
+Adds Cache-Control (including stale-while-revalidate / stale-if-error),
+Surrogate-Key and ETag headers to successful responses of public views, so
+browsers and the CDN can serve the menu without reaching Flask, and 304s
+answer revalidations.
+
+When menu rows change, the menu_changed signal is sent after the commit
+with the surrogate keys to purge. If CDN_PURGE_URL is set, a background
+task posts those keys to the CDN.
+"""
+
+import json
+import urllib.request
+from functools import wraps
+
+from blinker import Namespace
+from flask import current_app, g, make_response, request
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app import app
+from models import MenuCategory, MenuItem
+from services.tasks import task
+
+MENU_KEY = 'menu'
+LOCATION_KEY_PREFIX = 'menu-location-'
+PENDING_KEY = 'menu_surrogate_keys'
+
+signals = Namespace()
+# Sent with surrogate_keys=[...] after a commit that changed menu rows
+menu_changed = signals.signal('menu-changed')
+
+
+def location_menu_key(location_id):
+    return f'{LOCATION_KEY_PREFIX}{location_id}'
+
+
+def location_ids(surrogate_keys):
+    """Locations whose menu key is among surrogate_keys"""
+    return [int(key[len(LOCATION_KEY_PREFIX):]) for key in surrogate_keys if key.startswith(LOCATION_KEY_PREFIX)]
+
+
+def category_key(category_id):
+    return f'menu-category-{category_id}'
+
+
+def item_key(item_id):
+    return f'menu-item-{item_id}'
+
+
+def cacheable(policy_config_key, surrogate_keys=None):
+    """
+    Decorator for public GET views. policy_config_key names the config
+    entry holding the Cache-Control value; surrogate_keys is a callable
+    receiving the view's kwargs and returning extra keys for the response
+    (the menu key, and the request location's menu key, are always
+    included).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+            response.headers['Cache-Control'] = current_app.config[policy_config_key]
+            keys = [MENU_KEY] + (list(surrogate_keys(**kwargs)) if surrogate_keys else [])
+            if g.get('location_id') is not None:
+                keys.append(location_menu_key(g.location_id))
+            response.headers[current_app.config['SURROGATE_KEY_HEADER']] = ' '.join(keys)
+            # Compressed and uncompressed copies must be cached separately;
+            # flask_cors adds Origin itself when it echoes a specific origin
+            response.vary.add('Accept-Encoding')
+            response.add_etag()
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
+
+
+def record_menu_change(target, keys):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(PENDING_KEY, set()).update(keys)
+
+
+@event.listens_for(MenuItem, 'after_insert')
+@event.listens_for(MenuItem, 'after_update')
+@event.listens_for(MenuItem, 'after_delete')
+def menu_item_changed(mapper, connection, target):
+    keys = {MENU_KEY, item_key(target.item_id), category_key(target.category_id),
+            location_menu_key(target.location_id)}
+    # An item moved between categories (or locations) also leaves its old ones
+    state = inspect(target)
+    keys.update(category_key(old) for old in state.attrs.category_id.history.deleted if old)
+    keys.update(location_menu_key(old) for old in state.attrs.location_id.history.deleted if old)
+    record_menu_change(target, keys)
+
+
+@event.listens_for(MenuCategory, 'after_insert')
+@event.listens_for(MenuCategory, 'after_update')
+@event.listens_for(MenuCategory, 'after_delete')
+def menu_category_changed(mapper, connection, target):
+    record_menu_change(target, {MENU_KEY, category_key(target.category_id), location_menu_key(target.location_id)})
+
+
+@event.listens_for(Session, 'after_commit')
+def send_menu_changed(session):
+    keys = session.info.pop(PENDING_KEY, None)
+    if keys:
+        menu_changed.send(app, surrogate_keys=sorted(keys))
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_menu_changes(session):
+    session.info.pop(PENDING_KEY, None)
+
+
+@menu_changed.connect
+def schedule_cdn_purge(sender, surrogate_keys):
+    if app.config['CDN_PURGE_URL']:
+        purge_surrogate_keys.enqueue(surrogate_keys=surrogate_keys)
+
+
+@task()
+def purge_surrogate_keys(surrogate_keys):
+    """Ask the CDN to drop every cached response tagged with these keys"""
+    headers = {
+        'Content-Type': 'application/json',
+        'Surrogate-Key': ' '.join(surrogate_keys)
+    }
+    if app.config['CDN_PURGE_TOKEN']:
+        headers['Authorization'] = f"Bearer {app.config['CDN_PURGE_TOKEN']}"
+    purge_request = urllib.request.Request(
+        app.config['CDN_PURGE_URL'],
+        data=json.dumps({'surrogate_keys': surrogate_keys}).encode(),
+        headers=headers,
+        method='POST'
+    )
+    with urllib.request.urlopen(purge_request, timeout=10) as response:
+        if response.status >= 300:
+            raise RuntimeError(f'CDN purge failed with HTTP {response.status}')
@@ -0,0 +1,99 @@
+"""
+Restaurant locations
+Tables, reservations, waitlist entries and menus belong to one location
+each, so one deployment serves every restaurant. Requests choose theirs
+with the location query parameter (a location slug) and fall back to
+DEFAULT_LOCATION, so single-site clients keep working unchanged.
+
+The slug -> location map is cached in memory and reloaded after
+LOCATION_CACHE_TTL seconds. Views read the resolved location from
+g.location_id and pass it down, so every scan is bounded to that
+location's rows through the location-leading indexes.
+"""
+
+import threading
+import time
+
+from flask import g, jsonify, request
+
+from app import app, db
+from models import Location
+from services.circuit_breaker import database_circuit
+
+
+class LocationDirectory:
+    """In-memory slug and id lookup of active locations"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._by_slug = {}
+        self._by_id = {}
+
+    def _ensure_loaded(self):
+        ttl = app.config['LOCATION_CACHE_TTL']
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < ttl:
+            return
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < ttl:
+                return
+            # Keep serving the last load while the database is unavailable
+            if self._loaded_at is not None and not database_circuit.allow():
+                return
+            locations = [location.to_dict() for location in Location.query.filter_by(is_active=True).all()]
+            self._by_slug = {location['slug']: location for location in locations}
+            self._by_id = {location['location_id']: location for location in locations}
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def by_slug(self, slug):
+        self._ensure_loaded()
+        return self._by_slug.get(slug)
+
+    def by_id(self, location_id):
+        self._ensure_loaded()
+        return self._by_id.get(location_id)
+
+    def all(self):
+        self._ensure_loaded()
+        return sorted(self._by_id.values(), key=lambda location: location['location_id'])
+
+
+location_directory = LocationDirectory()
+
+
+def use_location():
+    """
+    Resolve the request's location into g.location / g.location_id.
+    Usable directly as a blueprint before_request hook; unknown slugs get a
+    404 response.
+    """
+    slug = request.args.get('location') or app.config['DEFAULT_LOCATION']
+    location = location_directory.by_slug(slug)
+    if location is None:
+        return jsonify({'error': f'Location not found: {slug}'}), 404
+    g.location = location
+    g.location_id = location['location_id']
+
+
+def current_location_id():
+    """Location of the current request (after use_location has run)"""
+    return g.location_id
+
+
+def ensure_default_location(name='Café Fausse'):
+    """
+    location_id of DEFAULT_LOCATION, creating it if missing. Used by the
+    seed and data generation scripts.
+    """
+    slug = app.config['DEFAULT_LOCATION']
+    location = Location.query.filter_by(slug=slug).first()
+    if not location:
+        location = Location(slug=slug, name=name, is_active=True)
+        db.session.add(location)
+        db.session.commit()
+        location_directory.invalidate()
+    return location.location_id
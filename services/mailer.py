@@ -0,0 +1,78 @@
+"""
+Outgoing email for Café Fausse
+MAIL_BACKEND selects how messages are delivered:
+- smtp:   send through MAIL_SERVER with smtplib
+- outbox: keep messages in memory (local-only stand-in for development and tests)
+"""
+
+import smtplib
+import threading
+from email.message import EmailMessage
+
+from app import app
+
+
+class SMTPMailer:
+    """Deliver messages through an SMTP server"""
+
+    def __init__(self, server, port, username=None, password=None, use_tls=False, timeout=10):
+        self.server = server
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+
+    def send(self, message):
+        with smtplib.SMTP(self.server, self.port, timeout=self.timeout) as smtp:
+            if self.use_tls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            smtp.send_message(message)
+
+
+class OutboxMailer:
+    """Collect messages in memory instead of sending them"""
+
+    def __init__(self):
+        self.outbox = []
+        self._lock = threading.Lock()
+
+    def send(self, message):
+        with self._lock:
+            self.outbox.append(message)
+
+    def clear(self):
+        with self._lock:
+            self.outbox.clear()
+
+
+_mailer = None
+
+
+def get_mailer():
+    """Return the configured mailer (created once per process)"""
+    global _mailer
+    if _mailer is None:
+        if app.config['MAIL_BACKEND'] == 'smtp':
+            _mailer = SMTPMailer(
+                app.config['MAIL_SERVER'],
+                app.config['MAIL_PORT'],
+                app.config['MAIL_USERNAME'],
+                app.config['MAIL_PASSWORD'],
+                app.config['MAIL_USE_TLS']
+            )
+        else:
+            _mailer = OutboxMailer()
+    return _mailer
+
+
+def send_email(to, subject, body):
+    """Build and send a plain text email from MAIL_DEFAULT_SENDER"""
+    message = EmailMessage()
+    message['From'] = app.config['MAIL_DEFAULT_SENDER']
+    message['To'] = to
+    message['Subject'] = subject
+    message.set_content(body)
+    get_mailer().send(message)
@@ -0,0 +1,159 @@
+"""
+In-memory menu snapshots
+One snapshot per location: the whole public menu (active categories, available items and each item's
+image variant manifest) is built with two queries and kept in memory.
+Menu views answer from the snapshot, optionally projecting items down to
+the fields a list view needs.
+
+Building the snapshot also computes each item's image manifest, so that
+work happens once per menu change rather than per request. A location's
+snapshot is dropped locally as soon as a change to its menu commits (the
+menu_changed signal) and expires after MENU_CACHE_TTL seconds so other
+worker processes pick up changes too.
+"""
+
+import threading
+import time
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import app
+from models import MenuCategory, MenuItem
+from services.circuit_breaker import database_circuit
+from services.http_cache import location_ids, menu_changed
+from services.menu_images import IMAGE_VARIANTS, image_variants
+
+ITEM_FIELDS = ['item_id', 'location_id', 'category_id', 'item_name', 'description', 'price', 'image_url',
+               'is_available', 'display_order', 'images']
+
+
+class MenuSnapshot:
+    """Immutable view of the public menu"""
+
+    def __init__(self, categories, items):
+        self.items = {item['item_id']: item for item in items}
+        self.categories = categories
+        self.categories_by_id = {category['category_id']: category for category in categories}
+        for item in items:
+            if item['category_id'] in self.categories_by_id:
+                self.categories_by_id[item['category_id']]['items'].append(item)
+
+    def search(self, term):
+        """Case-insensitive substring match on names and descriptions, ordered by name"""
+        term = term.lower()
+        return sorted(
+            (item for item in self.items.values()
+             if term in item['item_name'].lower() or term in (item['description'] or '').lower()),
+            key=lambda item: item['item_name']
+        )
+
+
+class MenuCache:
+    """Lazily built, thread-safe holder of each location's current MenuSnapshot"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshots = {}
+
+    def _fresh(self, location_id):
+        cached = self._snapshots.get(location_id)
+        if cached is not None and time.monotonic() - cached[1] < app.config['MENU_CACHE_TTL']:
+            return cached[0]
+        return None
+
+    def get(self, location_id):
+        snapshot = self._fresh(location_id)
+        if snapshot is not None:
+            return snapshot
+        # While the database is unavailable any snapshot beats none
+        if not database_circuit.allow() and self.last_known(location_id) is not None:
+            return self.last_known(location_id)
+        with self._lock:
+            snapshot = self._fresh(location_id)
+            if snapshot is None:
+                try:
+                    snapshot = build_snapshot(location_id)
+                except SQLAlchemyError:
+                    if self.last_known(location_id) is None:
+                        raise
+                    return self.last_known(location_id)
+                self._snapshots[location_id] = (snapshot, time.monotonic())
+            return snapshot
+
+    def last_known(self, location_id):
+        """The location's most recent snapshot however old, or None"""
+        cached = self._snapshots.get(location_id)
+        return cached[0] if cached is not None else None
+
+    def invalidate(self, location_ids=None):
+        """Drop the snapshots of location_ids (all locations when None)"""
+        with self._lock:
+            if location_ids is None:
+                self._snapshots.clear()
+            for location_id in location_ids or ():
+                self._snapshots.pop(location_id, None)
+
+
+def build_snapshot(location_id):
+    categories = MenuCategory.query.filter_by(location_id=location_id, is_active=True).order_by(
+        MenuCategory.display_order
+    ).all()
+    items = MenuItem.query.filter_by(location_id=location_id, is_available=True).order_by(
+        MenuItem.display_order
+    ).all()
+    item_dicts = []
+    for item in items:
+        item_dict = item.to_dict()
+        item_dict['images'] = image_variants(item.image_url)
+        item_dicts.append(item_dict)
+    # Same shape as MenuCategory.to_dict(), without its per-category item query
+    category_dicts = [
+        {
+            'category_id': category.category_id,
+            'location_id': category.location_id,
+            'category_name': category.category_name,
+            'display_order': category.display_order,
+            'is_active': category.is_active,
+            'items': []
+        }
+        for category in categories
+    ]
+    return MenuSnapshot(category_dicts, item_dicts)
+
+
+def parse_fields(value):
+    """
+    Parse a fields= projection such as "item_id,item_name,price,images.thumbnail".
+    Returns (fields list or None for everything, error message or None).
+    """
+    if not value:
+        return None, None
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    allowed = set(ITEM_FIELDS) | {f'images.{variant}' for variant in IMAGE_VARIANTS}
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        return None, f'Unknown fields: {", ".join(unknown)}. Allowed: {", ".join(sorted(allowed))}'
+    return fields, None
+
+
+def project(item, fields):
+    """Copy of an item dict reduced to the requested fields"""
+    if fields is None:
+        return item
+    projected = {}
+    for field in fields:
+        if field.startswith('images.'):
+            images = projected.setdefault('images', {})
+            if item['images'] is not None:
+                images[field.split('.', 1)[1]] = item['images'][field.split('.', 1)[1]]
+        else:
+            projected[field] = item[field]
+    return projected
+
+
+menu_cache = MenuCache()
+
+
+@menu_changed.connect
+def invalidate_menu_cache(sender, surrogate_keys):
+    menu_cache.invalidate(location_ids(surrogate_keys))
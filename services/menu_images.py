@@ -0,0 +1,49 @@
+"""
+Responsive image variants for menu items
+MenuItem.image_url holds one full-size Cloudinary URL. Cloudinary resizes
+and converts on delivery when transformation parameters are inserted after
+/upload/ and the extension names the target format, so every size/format
+variant can be derived from the stored URL without another request.
+"""
+
+import re
+
+# name: (width, height, crop mode); None height keeps the aspect ratio
+IMAGE_VARIANTS = {
+    'thumbnail': (160, 160, 'c_fill'),
+    'card': (480, 320, 'c_fill'),
+    'full': (1200, None, 'c_limit'),
+}
+IMAGE_FORMATS = ['avif', 'webp']
+
+CLOUDINARY_UPLOAD = re.compile(r'^(https://res\.cloudinary\.com/[^/]+/image/upload/)(.+?)(\.[A-Za-z0-9]+)?$')
+
+
+def image_variants(image_url):
+    """
+    Manifest of {variant: {width, height, avif, webp, default}} for an image
+    URL. default keeps the original format. URLs that are not Cloudinary
+    uploads cannot be transformed, so each variant points at the original
+    with unknown dimensions.
+    """
+    if not image_url:
+        return None
+
+    match = CLOUDINARY_UPLOAD.match(image_url)
+    manifest = {}
+    for name, (width, height, crop) in IMAGE_VARIANTS.items():
+        if not match:
+            manifest[name] = {'width': None, 'height': None, 'default': image_url}
+            continue
+
+        variant = {'width': width, 'height': height}
+
+        prefix, path, extension = match.groups()
+        transformation = ','.join(
+            [f'w_{width}'] + ([f'h_{height}'] if height else []) + [crop, 'q_auto']
+        )
+        for image_format in IMAGE_FORMATS:
+            variant[image_format] = f'{prefix}{transformation}/{path}.{image_format}'
+        variant['default'] = f'{prefix}{transformation}/{path}{extension or ""}'
+        manifest[name] = variant
+    return manifest
@@ -0,0 +1,234 @@
+"""
+In-process membership index for newsletter emails
+A Bloom filter over every email in the newsletter table (active or not),
+so the footer's subscription check and the subscribe endpoint can answer
+"never subscribed" without a database round trip. A positive answer may
+be a false positive, and only the row says whether the subscription is
+active, so positives always fall back to the database.
+
+- The filter is built per worker process in a background thread by
+  streaming emails in batches; until it is ready every lookup goes to the
+  database.
+- Rows are never deleted (unsubscribing only clears is_active), so the
+  filter only ever grows: this process adds emails as it inserts them and
+  picks up rows inserted by other workers every NEWSLETTER_INDEX_SYNC_SECONDS.
+- newsletter_id alone can't find new rows: on PostgreSQL a transaction
+  holding a lower id can commit after a higher one was seen. Each sync
+  therefore also re-reads rows subscribed within
+  NEWSLETTER_INDEX_SYNC_OVERLAP_SECONDS before the previous sync started.
+- At the default 1% false positive rate a filter sized for a million
+  emails takes about 1.2 MB.
+"""
+
+import hashlib
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import func, or_, select
+
+from app import app, db
+from models import Newsletter
+
+WARM_BATCH_SIZE = 10000
+MIN_CAPACITY = 100000
+UINT64_MASK = (1 << 64) - 1
+
+
+def email_digest(email):
+    return hashlib.blake2b(email.encode(), digest_size=16).digest()
+
+
+def email_hashes(emails):
+    """Two independent 64-bit hashes per email, as uint64 arrays"""
+    digests = b''.join(email_digest(email) for email in emails)
+    pairs = np.frombuffer(digests, dtype='<u8').reshape(-1, 2)
+    # An odd second hash keeps the probe sequence from collapsing onto one bit
+    return pairs[:, 0], pairs[:, 1] | np.uint64(1)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over a NumPy bit array"""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+        self._view = memoryview(self.bits)
+        self.count = 0
+
+    def _positions(self, h1, h2):
+        steps = np.arange(self.num_hashes, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            return (h1[:, None] + steps[None, :] * h2[:, None]) % np.uint64(self.num_bits)
+
+    def add_many(self, emails):
+        if not emails:
+            return
+        positions = self._positions(*email_hashes(emails)).ravel()
+        np.bitwise_or.at(self.bits, positions >> np.uint64(3),
+                         (np.uint8(1) << (positions & np.uint64(7)).astype(np.uint8)))
+        self.count += len(emails)
+
+    def __contains__(self, email):
+        # Single lookups in plain integers, mirroring _positions' uint64 wraparound
+        digest = email_digest(email)
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        view = self._view
+        for step in range(self.num_hashes):
+            position = ((h1 + step * h2) & UINT64_MASK) % self.num_bits
+            if not view[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def expected_error_rate(self):
+        """False positive rate for the number of emails added so far"""
+        if not self.count:
+            return 0.0
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+    def stats(self):
+        return {
+            'emails_added': self.count,
+            'capacity': self.capacity,
+            'bits': self.num_bits,
+            'hash_functions': self.num_hashes,
+            'memory_bytes': int(self.bits.nbytes),
+            'target_error_rate': self.error_rate,
+            'expected_error_rate': round(self.expected_error_rate(), 6)
+        }
+
+
+class NewsletterIndex:
+    """Per-process Bloom filter of newsletter emails with database fallback"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._filter = None
+        self._max_id = 0
+        self._rescan_from = None
+        self._synced_at = 0.0
+        self._pid = None
+        self._warming = False
+
+    def ensure_warm(self):
+        """Start building the filter for this process in the background if needed"""
+        if self._pid == os.getpid() and (self._filter is not None or self._warming):
+            return
+        with self._lock:
+            if self._pid == os.getpid() and (self._filter is not None or self._warming):
+                return
+            # A filter inherited through fork is still valid, but a parent's
+            # warm-up thread is not, so only rebuild when nothing usable exists
+            self._pid = os.getpid()
+            self._warming = False
+            if self._filter is None:
+                self._start_warming()
+
+    def _start_warming(self):
+        self._warming = True
+        threading.Thread(target=self._warm, name='fusse-newsletter-index', daemon=True).start()
+
+    def warm(self):
+        """Build the filter synchronously (e.g. before forking workers)"""
+        with self._lock:
+            self._pid = os.getpid()
+            self._warming = True
+        self._warm()
+
+    def _overlap_start(self, started):
+        return started - timedelta(seconds=app.config['NEWSLETTER_INDEX_SYNC_OVERLAP_SECONDS'])
+
+    def _warm(self):
+        try:
+            started = datetime.utcnow()
+            with app.app_context():
+                total, max_id = db.session.execute(
+                    select(func.count(Newsletter.newsletter_id), func.max(Newsletter.newsletter_id))
+                ).one()
+                bloom = BloomFilter(
+                    max(MIN_CAPACITY, (total or 0) * 2),
+                    app.config['NEWSLETTER_INDEX_ERROR_RATE']
+                )
+                # Stream plain strings in batches; no ORM objects are built
+                result = db.session.execute(
+                    select(Newsletter.email).where(Newsletter.newsletter_id <= (max_id or 0)),
+                    execution_options={'yield_per': WARM_BATCH_SIZE}
+                )
+                for rows in result.partitions():
+                    bloom.add_many([email for (email,) in rows])
+                db.session.remove()
+            with self._lock:
+                self._filter = bloom
+                self._max_id = max_id or 0
+                self._rescan_from = self._overlap_start(started)
+                self._synced_at = time.monotonic()
+            app.logger.info(f'Newsletter index ready with {bloom.count} emails ({bloom.bits.nbytes} bytes)')
+        except Exception as e:
+            app.logger.error(f'Could not build newsletter index: {e}')
+        finally:
+            self._warming = False
+
+    def _sync(self, bloom):
+        """Add rows committed by other workers since the last sync"""
+        if time.monotonic() - self._synced_at < app.config['NEWSLETTER_INDEX_SYNC_SECONDS']:
+            return
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            started = datetime.utcnow()
+            rows = db.session.execute(
+                select(Newsletter.newsletter_id, Newsletter.email).where(or_(
+                    Newsletter.newsletter_id > self._max_id,
+                    Newsletter.date_subscribed >= self._rescan_from
+                ))
+            ).all()
+            if rows:
+                # The overlap re-reads emails already added; skip those so
+                # count keeps tracking distinct emails
+                bloom.add_many([email for _, email in rows if email not in bloom])
+                self._max_id = max(self._max_id, max(newsletter_id for newsletter_id, _ in rows))
+            self._rescan_from = self._overlap_start(started)
+            self._synced_at = time.monotonic()
+            if bloom.count > bloom.capacity:
+                # Past capacity the error rate climbs; rebuild with room to
+                # grow while the current filter keeps serving lookups
+                with self._lock:
+                    if not self._warming:
+                        self._start_warming()
+        finally:
+            self._sync_lock.release()
+
+    def might_contain(self, email):
+        """
+        False when email has definitely never been in the newsletter table;
+        True when it may have been (or the index is not ready yet)
+        """
+        self.ensure_warm()
+        bloom = self._filter
+        if bloom is None:
+            return True
+        self._sync(bloom)
+        return email in bloom
+
+    def add(self, email):
+        """Record an email this process has just inserted"""
+        bloom = self._filter
+        if bloom is not None:
+            bloom.add_many([email])
+
+    def stats(self):
+        bloom = self._filter
+        if bloom is None:
+            return {'ready': False, 'warming': self._warming}
+        return {'ready': True, 'max_newsletter_id': self._max_id, **bloom.stats()}
+
+
+newsletter_index = NewsletterIndex()
@@ -0,0 +1,108 @@
+"""
+In-memory view of one night's bookings
+Loads every confirmed reservation (and every table held for a waitlist
+offer) overlapping a night with one query, as a sorted interval list per
+table, so many candidate bookings can be checked and placed without
+further queries. Used for availability, waitlist backfill and batch
+booking.
+
+Reservations last different times (services/calendar.py), so each table
+keeps its bookings as (start, end) intervals sorted by start, plus the
+running maximum of the ends. A new booking [start, end) is free when the
+last booking starting before end has finished by start, which is one
+bisect however many bookings the table has.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from app import db
+from models import Reservation, WaitlistEntry
+from services.calendar import MAX_RESERVATION_DURATION, reservation_duration
+
+
+class TableSchedule:
+    """One table's bookings as start-sorted intervals"""
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.reach = []  # reach[i] = latest end among the first i + 1 bookings
+
+    def __len__(self):
+        return len(self.starts)
+
+    def add(self, start, end):
+        index = bisect_right(self.starts, start)
+        self.starts.insert(index, start)
+        self.ends.insert(index, end)
+        self.reach.insert(index, end)
+        for position in range(max(index, 1), len(self.reach)):
+            self.reach[position] = max(self.ends[position], self.reach[position - 1])
+
+    def is_free(self, start, end):
+        """True if no booking overlaps [start, end)"""
+        index = bisect_left(self.starts, end)
+        return index == 0 or self.reach[index - 1] <= start
+
+    def gap(self, start, end):
+        """
+        (free_from, free_until) of the free stretch holding [start, end),
+        with None for an open end, or None when [start, end) is not free
+        """
+        if not self.is_free(start, end):
+            return None
+        index = bisect_left(self.starts, end)
+        return (self.reach[index - 1] if index else None,
+                self.starts[index] if index < len(self.starts) else None)
+
+
+def load_bookings(location_id, table_ids, window_start, window_end, include_held=True, except_offer=None):
+    """
+    TableSchedules per table (all at location_id) for bookings overlapping
+    [window_start, window_end): confirmed reservations and, with
+    include_held, tables held for unexpired waitlist offers other than the
+    entry except_offer (a waitlist_id). The bound on reservation_datetime
+    stays on the bare column so the (table_id, reservation_datetime) index
+    and partition pruning apply.
+    """
+    rows = db.session.query(
+        Reservation.table_id, Reservation.reservation_datetime, Reservation.duration_minutes
+    ).filter(
+        Reservation.status == 'confirmed',
+        Reservation.table_id.in_(table_ids),
+        Reservation.reservation_datetime > window_start - MAX_RESERVATION_DURATION,
+        Reservation.reservation_datetime < window_end
+    ).all()
+
+    bookings = defaultdict(TableSchedule)
+    for table_id, start, minutes in rows:
+        end = start + timedelta(minutes=minutes)
+        if end > window_start:
+            bookings[table_id].add(start, end)
+
+    if include_held:
+        held = db.session.query(
+            WaitlistEntry.offered_table_id, WaitlistEntry.offered_datetime, WaitlistEntry.num_of_guests
+        ).filter(
+            WaitlistEntry.location_id == location_id,
+            WaitlistEntry.waitlist_date.between(window_start.date(), window_end.date()),
+            WaitlistEntry.status == 'offered',
+            # Lapsed offers stop holding their table before expiry has run
+            WaitlistEntry.offer_expires_at > datetime.utcnow(),
+            WaitlistEntry.offered_table_id.in_(table_ids)
+        )
+        if except_offer is not None:
+            held = held.filter(WaitlistEntry.waitlist_id != except_offer)
+        for table_id, start, num_guests in held.all():
+            end = start + reservation_duration(num_guests, start)
+            if start < window_end and end > window_start:
+                bookings[table_id].add(start, end)
+    return bookings
+
+
+def load_night_bookings(location_id, table_ids, day, include_held=True):
+    """TableSchedules per table (all at location_id) for the night of day"""
+    night_start = datetime.combine(day, datetime.min.time())
+    return load_bookings(location_id, table_ids, night_start, night_start + timedelta(days=1), include_held)
@@ -0,0 +1,57 @@
+"""
+Guest notification tasks
+Run in the background after the request that triggered them has committed
+"""
+
+from app import db
+from models import Reservation, WaitlistEntry
+from services.mailer import send_email
+from services.tasks import task
+
+
+@task()
+def send_reservation_confirmation(reservation_id):
+    """Email the guest a confirmation of their reservation"""
+    reservation = db.session.get(Reservation, reservation_id)
+    if not reservation or reservation.status != 'confirmed':
+        return
+
+    when = reservation.reservation_datetime.strftime('%A %d %B %Y at %H:%M')
+    send_email(
+        reservation.customer.email,
+        'Your Café Fausse reservation',
+        f"Dear {reservation.customer.name},\n\n"
+        f"Your table for {reservation.num_of_guests} on {when} is confirmed "
+        f"(table {reservation.table.table_number}, reservation #{reservation.reservation_id}).\n\n"
+        f"We look forward to seeing you.\nCafé Fausse"
+    )
+
+
+@task()
+def send_waitlist_offer(waitlist_id):
+    """Tell a waitlisted guest a table has opened up and how long it is held"""
+    entry = db.session.get(WaitlistEntry, waitlist_id)
+    if not entry or entry.status != 'offered':
+        return
+
+    when = entry.offered_datetime.strftime('%A %d %B %Y at %H:%M')
+    expires = entry.offer_expires_at.strftime('%H:%M')
+    send_email(
+        entry.customer.email,
+        'A table has opened up at Café Fausse',
+        f"Dear {entry.customer.name},\n\n"
+        f"A table for {entry.num_of_guests} is now available on {when}. "
+        f"We are holding it for you until {expires} UTC; accept the offer for "
+        f"waitlist entry #{entry.waitlist_id} to confirm your reservation.\n\nCafé Fausse"
+    )
+
+
+@task()
+def send_newsletter_welcome(email):
+    """Welcome a new newsletter subscriber"""
+    send_email(
+        email,
+        'Welcome to the Café Fausse newsletter',
+        "Thank you for subscribing. You will be the first to hear about new dishes, "
+        "seasonal menus and special events.\n\nCafé Fausse"
+    )
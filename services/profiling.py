@@ -0,0 +1,308 @@
+"""
+On-demand request profiling
+A request is profiled when it carries an X-Profile-Token header matching
+PROFILE_TOKEN, or at random with probability PROFILE_SAMPLE_RATE. With
+neither set the before_request hook returns after one config lookup, and
+the SQL timing listeners after one check of g.
+
+- sample (default): a background thread records the request thread's
+  stack every PROFILE_SAMPLE_INTERVAL seconds. Overhead is low and fixed,
+  and the samples give collapsed stacks for flamegraph.pl or speedscope.
+- trace: cProfile additionally records every call in the request thread,
+  for exact call counts and times at a noticeable slowdown, so only when
+  asked for (X-Profile-Mode: trace). The summary comes from cProfile; the
+  collapsed stacks still come from the sampler.
+
+Each profile keeps the collapsed stacks, a summary of the hottest
+functions and the timing of every SQL statement. The last PROFILE_HISTORY
+profiles of this worker are kept in memory for the admin endpoints, and
+the response carries an X-Profile-Id header. Profiles hold request paths
+(query strings included) and SQL text, so those endpoints also require
+the X-Profile-Token header and answer 404 while PROFILE_TOKEN is unset.
+"""
+
+import cProfile
+import itertools
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from functools import wraps
+
+from flask import g, has_request_context, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import app
+from services.admin_auth import tokens_match
+
+PROFILE_MODES = ['sample', 'trace']
+TOP_FUNCTIONS = 25
+MAX_SQL_STATEMENTS = 200
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def function_label(name, filename, lineno):
+    """function (file:line), with paths relative to the project or site-packages"""
+    if filename.startswith(ROOT):
+        filename = os.path.relpath(filename, ROOT)
+    elif 'site-packages' in filename:
+        filename = filename.split('site-packages' + os.sep, 1)[1]
+    return f'{name} ({filename}:{lineno})'
+
+
+def collapse(frame):
+    """The stack ending at frame as one root-first, semicolon-separated line"""
+    labels = []
+    while frame is not None:
+        code = frame.f_code
+        labels.append(function_label(code.co_name, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class StackSampler:
+    """Samples one thread's stack from a background thread"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='fusse-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+
+    def summary(self):
+        """Hottest functions by samples on top of the stack (self) and anywhere in it (total)"""
+        own = Counter()
+        total = Counter()
+        for stack, count in self.stacks.items():
+            labels = stack.split(';')
+            own[labels[-1]] += count
+            for label in set(labels):
+                total[label] += count
+        samples = sum(self.stacks.values())
+        return {
+            'samples': samples,
+            'interval_ms': self.interval * 1000,
+            'functions': [
+                {
+                    'function': label,
+                    'self_samples': own[label],
+                    'total_samples': count,
+                    'self_percent': round(own[label] * 100.0 / samples, 1)
+                }
+                for label, count in sorted(total.items(), key=lambda pair: (-own[pair[0]], -pair[1]))[:TOP_FUNCTIONS]
+            ]
+        }
+
+
+class CallTracer:
+    """Deterministic profile of the current thread with cProfile"""
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.stats = None
+
+    def start(self):
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+        self.stats = pstats.Stats(self.profiler).stats
+
+    @staticmethod
+    def label(function):
+        filename, lineno, name = function
+        # Built-ins are recorded as ('~', 0, '<built-in method ...>')
+        return name if filename == '~' else function_label(name, filename, lineno)
+
+    def summary(self):
+        rows = sorted(self.stats.items(), key=lambda pair: -pair[1][2])[:TOP_FUNCTIONS]
+        return {
+            'calls': sum(entry[1] for entry in self.stats.values()),
+            'functions': [
+                {
+                    'function': self.label(function),
+                    'calls': primitive_calls,
+                    'self_ms': round(self_time * 1000, 3),
+                    'total_ms': round(cumulative * 1000, 3)
+                }
+                for function, (primitive_calls, _, self_time, cumulative, _) in rows
+            ]
+        }
+
+
+class ProfileStore:
+    """The most recent profiles of this worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._profiles = deque()
+
+    def next_id(self):
+        return f'{os.getpid()}-{next(self._ids)}'
+
+    def add(self, profile):
+        with self._lock:
+            self._profiles.append(profile)
+            while len(self._profiles) > app.config['PROFILE_HISTORY']:
+                self._profiles.popleft()
+
+    def recent(self, limit=None):
+        with self._lock:
+            profiles = list(reversed(self._profiles))
+        return profiles[:limit] if limit else profiles
+
+    def get(self, profile_id):
+        with self._lock:
+            return next((profile for profile in self._profiles if profile['profile_id'] == profile_id), None)
+
+
+profile_store = ProfileStore()
+
+
+class RequestProfile:
+    """Profiler and SQL timings for one request"""
+
+    def __init__(self, mode, trigger):
+        self.profile_id = profile_store.next_id()
+        self.mode = mode
+        self.trigger = trigger
+        self.sql = []
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self._statement_started = None
+        self.sampler = StackSampler(threading.get_ident(), app.config['PROFILE_SAMPLE_INTERVAL'])
+        self.tracer = CallTracer() if mode == 'trace' else None
+        if self.tracer is not None:
+            self.tracer.start()
+        self.started_at = datetime.now()
+        self._started = time.perf_counter()
+        self.sampler.start()
+
+    def stop(self):
+        self.sampler.stop()
+        if self.tracer is not None:
+            self.tracer.stop()
+
+    def finish(self, response):
+        self.stop()
+        duration_ms = (time.perf_counter() - self._started) * 1000
+        profile = {
+            'profile_id': self.profile_id,
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'status_code': response.status_code if response is not None else 500,
+            'mode': self.mode,
+            'trigger': self.trigger,
+            'started_at': self.started_at.isoformat(),
+            'duration_ms': round(duration_ms, 3),
+            'summary': (self.tracer or self.sampler).summary(),
+            'sql': {
+                'statements': self.sql_count,
+                'total_ms': round(self.sql_ms, 3),
+                'percent_of_request': round(self.sql_ms * 100.0 / duration_ms, 1) if duration_ms else None,
+                'timings': self.sql
+            },
+            'samples': sum(self.sampler.stacks.values()),
+            'collapsed': '\n'.join(f'{stack} {count}' for stack, count in self.sampler.stacks.most_common())
+        }
+        profile_store.add(profile)
+        return profile
+
+
+def has_profile_token():
+    """True when the request's X-Profile-Token header matches PROFILE_TOKEN"""
+    return tokens_match(request.headers.get('X-Profile-Token'), app.config['PROFILE_TOKEN'])
+
+
+def profile_token_required(view):
+    """Decorator for views exposing profiles: 404 without PROFILE_TOKEN, 401 without the header"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not app.config['PROFILE_TOKEN']:
+            return jsonify({'error': 'Not found'}), 404
+        if not has_profile_token():
+            return jsonify({'error': 'A valid X-Profile-Token header is required'}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def profile_trigger():
+    """'token' or 'sampled' when this request should be profiled, else None"""
+    if has_profile_token():
+        return 'token'
+    rate = app.config['PROFILE_SAMPLE_RATE']
+    if rate and random.random() < rate:
+        return 'sampled'
+    return None
+
+
+@app.before_request
+def start_profile():
+    if not app.config['PROFILE_TOKEN'] and not app.config['PROFILE_SAMPLE_RATE']:
+        return
+    trigger = profile_trigger()
+    if trigger is None:
+        return
+    mode = request.headers.get('X-Profile-Mode', 'sample') if trigger == 'token' else 'sample'
+    try:
+        g.profile = RequestProfile(mode if mode in PROFILE_MODES else 'sample', trigger)
+    except ValueError:
+        # Only one cProfile can be active per interpreter; fall back to sampling
+        g.profile = RequestProfile('sample', trigger)
+
+
+@app.after_request
+def finish_profile(response):
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profile.finish(response)
+        response.headers['X-Profile-Id'] = profile.profile_id
+    return response
+
+
+@app.teardown_request
+def discard_profile(exc):
+    # Requests that raised never reach after_request; stop their profiler
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profile.stop()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'profile' in g:
+        g.profile._statement_started = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def record_statement_timing(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context() or 'profile' not in g or g.profile._statement_started is None:
+        return
+    profile = g.profile
+    elapsed_ms = (time.perf_counter() - profile._statement_started) * 1000
+    profile._statement_started = None
+    profile.sql_count += 1
+    profile.sql_ms += elapsed_ms
+    if len(profile.sql) < MAX_SQL_STATEMENTS:
+        profile.sql.append({'statement': ' '.join(statement.split()), 'ms': round(elapsed_ms, 3)})
@@ -0,0 +1,186 @@
+"""
+Read replica routing for Café Fausse
+When REPLICA_DATABASE_URL is set, views marked read-only (the menu
+blueprint, availability checks, subscriber listing) run their queries on
+the replica instead of the primary. Writes and flushes always use the
+primary.
+
+- Read-your-writes: after a client books, its reads stay on the primary
+  for REPLICA_STICKY_SECONDS, so it never sees a replica that has not
+  caught up with its own reservation yet. The deadline is sent both as a
+  cookie (same-origin clients) and as an X-Primary-Until response header
+  that cross-origin frontends echo back on later requests, since their
+  uncredentialed requests carry no cookies.
+- Failover: the replica is health checked at most every
+  REPLICA_HEALTH_INTERVAL seconds (and on PostgreSQL must be within
+  REPLICA_MAX_LAG_SECONDS of the primary). Connection errors mark it
+  unhealthy immediately, and reads fall back to the primary until the
+  next successful check.
+
+This module is imported by app.py before the database is set up, so it
+must not import app.
+"""
+
+import threading
+import time
+from functools import wraps
+
+from flask import after_this_request, current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+
+REPLICA_BIND = 'replica'
+PRIMARY_COOKIE = 'fusse_primary_until'
+PRIMARY_HEADER = 'X-Primary-Until'
+
+POSTGRES_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReplicaHealth:
+    """Cached health of the replica engine, re-checked at most every interval"""
+
+    def __init__(self):
+        self._check_lock = threading.Lock()
+        self._healthy = True
+        self._checked_at = None
+        self.last_error = None
+        self.lag_seconds = None
+
+    def mark_unhealthy(self, error):
+        # Plain assignments, so this is safe from inside a running check too
+        self._healthy = False
+        self._checked_at = time.monotonic()
+        self.last_error = str(error)
+
+    def is_healthy(self, engine):
+        interval = current_app.config['REPLICA_HEALTH_INTERVAL']
+        if self._checked_at is not None and time.monotonic() - self._checked_at < interval:
+            return self._healthy
+        # One request re-checks while the others keep using the last result
+        if not self._check_lock.acquire(blocking=False):
+            return self._healthy
+        try:
+            self._healthy, self.lag_seconds, self.last_error = self._check(engine)
+            self._checked_at = time.monotonic()
+            return self._healthy
+        finally:
+            self._check_lock.release()
+
+    def _check(self, engine):
+        try:
+            with engine.connect() as connection:
+                if engine.dialect.name == 'postgresql':
+                    lag = float(connection.execute(POSTGRES_LAG_SQL).scalar())
+                else:
+                    connection.execute(text('SELECT 1'))
+                    lag = 0.0
+        except Exception as e:
+            current_app.logger.warning(f'Read replica unavailable, reading from primary: {e}')
+            return False, None, str(e)
+
+        max_lag = current_app.config['REPLICA_MAX_LAG_SECONDS']
+        if lag > max_lag:
+            current_app.logger.warning(f'Read replica is {lag:.1f}s behind, reading from primary')
+            return False, lag, f'Replication lag {lag:.1f}s exceeds {max_lag}s'
+        return True, lag, None
+
+    def status(self):
+        return {
+            'healthy': self._healthy,
+            'lag_seconds': self.lag_seconds,
+            'last_error': self.last_error
+        }
+
+
+replica_health = ReplicaHealth()
+
+
+def replica_engine(engines):
+    """The replica engine if one is configured, healthy and wanted for this request"""
+    engine = engines.get(REPLICA_BIND)
+    if engine is None or not has_request_context() or not g.get('read_from_replica'):
+        return None
+    if g.get('read_from_primary'):
+        return None
+    if not replica_health.is_healthy(engine):
+        return None
+    return engine
+
+
+class RoutingSession(Session):
+    """Session that sends the queries of read-only views to the read replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing:
+            engine = replica_engine(self._db.engines)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def use_replica():
+    """
+    Route this request's reads to the replica, unless the client wrote
+    recently. Usable directly as a blueprint before_request hook.
+    """
+    g.read_from_replica = True
+    pinned_until = max(parse_deadline(request.cookies.get(PRIMARY_COOKIE)),
+                       parse_deadline(request.headers.get(PRIMARY_HEADER)))
+    now = time.time()
+    # A deadline further out than any pin_to_primary could have set is forged
+    g.read_from_primary = now < pinned_until <= now + current_app.config['REPLICA_STICKY_SECONDS']
+
+
+def parse_deadline(value):
+    """Epoch seconds from a cookie or header value, 0 when absent or malformed"""
+    try:
+        return float(value or 0)
+    except ValueError:
+        return 0
+
+
+def read_from_replica(view):
+    """Decorator for read-only views whose queries may run on the replica"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        use_replica()
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def pin_to_primary():
+    """
+    Keep this client's reads on the primary for REPLICA_STICKY_SECONDS so
+    it sees its own writes. Call after committing.
+    """
+    sticky_seconds = current_app.config['REPLICA_STICKY_SECONDS']
+    if REPLICA_BIND not in current_app.config.get('SQLALCHEMY_BINDS', {}) or sticky_seconds <= 0:
+        return
+
+    @after_this_request
+    def set_deadline(response):
+        pinned_until = str(time.time() + sticky_seconds)
+        response.set_cookie(
+            PRIMARY_COOKIE, pinned_until,
+            max_age=sticky_seconds, httponly=True, samesite='Lax'
+        )
+        response.headers[PRIMARY_HEADER] = pinned_until
+        return response
+
+
+def watch_replica(engines):
+    """Mark the replica unhealthy as soon as one of its connections fails"""
+    engine = engines.get(REPLICA_BIND)
+    if engine is None:
+        return
+
+    @event.listens_for(engine, 'handle_error')
+    def replica_error(context):
+        if context.is_disconnect or context.connection is None:
+            replica_health.mark_unhealthy(context.original_exception)
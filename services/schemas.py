@@ -0,0 +1,111 @@
+"""
+Request body schemas
+Write endpoints decode their JSON body straight from the request bytes
+into these msgspec Structs: parsing, type and range checks happen in one
+pass in C, with no intermediate dict, and every malformed body (including
+non-object JSON or invalid JSON) gets a 400 naming the offending field,
+e.g. "Expected `int` <= 12 - at `$.num_of_guests`". Checks that need the
+database or the calendar (email deliverability, opening hours, table
+availability) stay in the views.
+
+Decoding is lax about scalar types (strict=False), so "4" is accepted for
+an integer and "true" for a boolean, as the hand-written parsing did.
+Datetimes are ISO 8601 (YYYY-MM-DDTHH:MM:SS); ones with a UTC offset are
+converted to naive UTC like every stored datetime.
+"""
+
+from datetime import date, datetime, timezone
+from typing import Annotated, Literal, Optional
+
+import msgspec
+from flask import request
+
+MAX_BATCH_RESERVATIONS = 100
+
+GuestCount = Annotated[int, msgspec.Meta(ge=1, le=12)]
+Name = Annotated[str, msgspec.Meta(min_length=1, max_length=100)]
+Email = Annotated[str, msgspec.Meta(min_length=1, max_length=255)]
+PhoneNumber = Annotated[str, msgspec.Meta(max_length=20)]
+ClockTime = Annotated[str, msgspec.Meta(pattern=r'^\d{2}:\d{2}$')]
+Slug = Annotated[str, msgspec.Meta(min_length=1, max_length=50, pattern=r'^[A-Za-z0-9-]+$')]
+
+
+def naive_utc(value):
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+class ReservationRequest(msgspec.Struct):
+    customer_name: Name
+    email: Email
+    reservation_datetime: datetime
+    num_of_guests: GuestCount
+    phone_number: Optional[PhoneNumber] = None
+
+    def __post_init__(self):
+        self.reservation_datetime = naive_utc(self.reservation_datetime)
+
+
+class BatchReservationRequest(msgspec.Struct):
+    # Items stay raw so each one is validated on its own and a bad item
+    # only fails itself (see create_reservations_batch)
+    reservations: Annotated[list[msgspec.Raw], msgspec.Meta(min_length=1, max_length=MAX_BATCH_RESERVATIONS)]
+    mode: Literal['all_or_nothing', 'best_effort'] = 'all_or_nothing'
+
+
+class WaitlistRequest(ReservationRequest):
+    flexibility_minutes: Annotated[int, msgspec.Meta(ge=0)] = 0
+    auto_book: bool = True
+
+
+class AvailabilityRequest(msgspec.Struct):
+    reservation_datetime: datetime
+    num_of_guests: GuestCount
+
+    def __post_init__(self):
+        self.reservation_datetime = naive_utc(self.reservation_datetime)
+
+
+class StatusUpdateRequest(msgspec.Struct):
+    status: Literal['confirmed', 'cancelled', 'completed']
+
+
+class NewsletterRequest(msgspec.Struct):
+    email: Email
+
+
+class OperatingHoursRequest(msgspec.Struct):
+    is_closed: bool = False
+    open_time: Optional[ClockTime] = None
+    close_time: Optional[ClockTime] = None
+
+
+class CalendarExceptionRequest(msgspec.Struct):
+    date: date
+    is_closed: bool = True
+    open_time: Optional[ClockTime] = None
+    close_time: Optional[ClockTime] = None
+    reason: Optional[Annotated[str, msgspec.Meta(max_length=200)]] = None
+
+
+class LocationRequest(msgspec.Struct):
+    slug: Slug
+    name: Name
+    address: Optional[Annotated[str, msgspec.Meta(max_length=255)]] = None
+
+
+def decode_json(data, schema):
+    """
+    Decode JSON bytes into schema
+    Returns (struct, error message or None)
+    """
+    try:
+        return msgspec.json.decode(data, type=schema, strict=False), None
+    except msgspec.ValidationError as e:
+        return None, str(e)
+    except msgspec.DecodeError:
+        return None, 'Request body must be valid JSON'
+
+
+def decode_request(schema):
+    """Decode the current request's body into schema; see decode_json"""
+    return decode_json(request.get_data(), schema)
@@ -0,0 +1,325 @@
+"""
+Background tasks for post-commit side effects
+Request handlers enqueue work (confirmation emails, welcome mails, ...)
+after committing, and the work runs outside the request on a thread pool
+inside the worker process.
+
+Backends (TASK_BACKEND):
+- thread:   in-memory queue on a thread pool; fast, lost on restart
+- database: durable background_job table polled by a worker thread (or by
+            run_worker.py in a separate process)
+- sync:     run inline in the caller; meant for tests and scripts
+
+Failed tasks are retried with exponential backoff up to TASK_MAX_ATTEMPTS.
+enqueue_at schedules a task for later (e.g. expiring a waitlist offer);
+the sync backend runs it straight away.
+"""
+
+import json
+import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, or_, and_
+
+from app import app, db
+from models import BackgroundJob
+
+TASKS = {}
+
+
+class Task:
+    """A registered background task; call enqueue(**kwargs) to schedule it"""
+
+    def __init__(self, func, name, max_attempts=None):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+
+    def __call__(self, **kwargs):
+        return self.func(**kwargs)
+
+    def enqueue(self, **kwargs):
+        return enqueue(self.name, **kwargs)
+
+    def enqueue_at(self, run_at, **kwargs):
+        return enqueue_at(self.name, run_at, **kwargs)
+
+
+def task(name=None, max_attempts=None):
+    """Register a function as a background task. Arguments must be JSON serializable."""
+    def decorator(func):
+        registered = Task(func, name or func.__name__, max_attempts)
+        TASKS[registered.name] = registered
+        return registered
+    return decorator
+
+
+def retry_delay(attempt):
+    """Seconds to wait before retry number attempt (1-based), with jitter"""
+    base = app.config['TASK_RETRY_BASE_SECONDS'] * (2 ** (attempt - 1))
+    return min(base, app.config['TASK_RETRY_MAX_SECONDS']) * random.uniform(0.8, 1.2)
+
+
+def run_task(name, payload):
+    """Execute a task inside an application context"""
+    with app.app_context():
+        try:
+            TASKS[name].func(**payload)
+        except Exception:
+            db.session.rollback()
+            raise
+
+
+class ThreadQueue:
+    """In-memory task queue on a thread pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self.counts = {'queued': 0, 'running': 0, 'retrying': 0, 'succeeded': 0, 'failed': 0}
+
+    def _get_executor(self):
+        # Thread pools do not survive fork, so create one per process lazily
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(
+                    max_workers=app.config['TASK_WORKERS'],
+                    thread_name_prefix='fusse-task'
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def _bump(self, key, delta):
+        with self._lock:
+            self.counts[key] += delta
+
+    def submit(self, name, payload, attempt=1):
+        self._bump('queued', 1)
+        self._get_executor().submit(self._execute, name, payload, attempt)
+
+    def submit_later(self, name, payload, delay):
+        self._bump('queued', 1)
+        timer = threading.Timer(delay, lambda: self._get_executor().submit(self._execute, name, payload, 1))
+        timer.daemon = True
+        timer.start()
+
+    def _retry(self, name, payload, attempt):
+        self._bump('retrying', -1)
+        self.submit(name, payload, attempt)
+
+    def _execute(self, name, payload, attempt):
+        self._bump('queued', -1)
+        self._bump('running', 1)
+        try:
+            run_task(name, payload)
+            self._bump('succeeded', 1)
+        except Exception as e:
+            max_attempts = TASKS[name].max_attempts or app.config['TASK_MAX_ATTEMPTS']
+            if attempt < max_attempts:
+                delay = retry_delay(attempt)
+                app.logger.warning(f'Task {name} failed (attempt {attempt}), retrying in {delay:.1f}s: {e}')
+                self._bump('retrying', 1)
+                timer = threading.Timer(delay, self._retry, (name, payload, attempt + 1))
+                timer.daemon = True
+                timer.start()
+            else:
+                app.logger.error(f'Task {name} failed permanently after {attempt} attempts: {e}')
+                self._bump('failed', 1)
+        finally:
+            self._bump('running', -1)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counts)
+
+
+class DatabaseJobWorker(threading.Thread):
+    """Polls background_job for due jobs and runs them on a thread pool"""
+
+    def __init__(self):
+        super().__init__(name='fusse-job-poller', daemon=True)
+        self.executor = ThreadPoolExecutor(
+            max_workers=app.config['TASK_WORKERS'],
+            thread_name_prefix='fusse-job'
+        )
+        self.stop_event = threading.Event()
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            claimed = []
+            try:
+                with app.app_context():
+                    claimed = claim_jobs(app.config['TASK_WORKERS'] - self._active)
+            except Exception as e:
+                app.logger.error(f'Could not claim background jobs: {e}')
+
+            for job in claimed:
+                with self._lock:
+                    self._active += 1
+                self.executor.submit(self._execute, job)
+
+            if not claimed:
+                self.stop_event.wait(app.config['TASK_POLL_INTERVAL'])
+
+    def _execute(self, job):
+        try:
+            execute_job(*job)
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def stop(self):
+        self.stop_event.set()
+        self.executor.shutdown(wait=True)
+
+
+def claim_jobs(limit):
+    """
+    Mark up to limit due jobs as running and return them as
+    (job_id, task_name, payload, attempts, max_attempts) tuples. Jobs left
+    running longer than TASK_VISIBILITY_TIMEOUT (e.g. by a killed worker)
+    become claimable again, unless they have used up their attempts: those
+    are marked failed instead.
+    """
+    if limit <= 0:
+        return []
+
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=app.config['TASK_VISIBILITY_TIMEOUT'])
+    query = BackgroundJob.query.filter(
+        or_(
+            and_(BackgroundJob.status == 'pending', BackgroundJob.run_at <= now),
+            and_(BackgroundJob.status == 'running', BackgroundJob.locked_at < stale)
+        )
+    ).order_by(BackgroundJob.run_at).limit(limit)
+    if db.session.get_bind().dialect.name == 'postgresql':
+        query = query.with_for_update(skip_locked=True)
+
+    jobs = query.all()
+    claimed = []
+    for job in jobs:
+        if job.status == 'running' and job.attempts >= job.max_attempts:
+            app.logger.error(f'Job {job.job_id} ({job.task_name}) timed out on its last attempt ({job.attempts})')
+            job.status = 'failed'
+            job.finished_at = now
+            job.last_error = 'Worker did not finish the job within TASK_VISIBILITY_TIMEOUT'
+            continue
+        job.status = 'running'
+        job.locked_at = now
+        job.attempts += 1
+        claimed.append((job.job_id, job.task_name, job.payload, job.attempts, job.max_attempts))
+    db.session.commit()
+    return claimed
+
+
+def execute_job(job_id, task_name, payload, attempts, max_attempts):
+    """Run one claimed job and record its outcome"""
+    error = None
+    try:
+        run_task(task_name, json.loads(payload))
+    except Exception as e:
+        error = e
+
+    with app.app_context():
+        job = BackgroundJob.query.get(job_id)
+        if error is None:
+            job.status = 'succeeded'
+            job.finished_at = datetime.utcnow()
+            job.last_error = None
+        elif attempts < max_attempts:
+            delay = retry_delay(attempts)
+            app.logger.warning(f'Job {job_id} ({task_name}) failed (attempt {attempts}), retrying in {delay:.1f}s: {error}')
+            job.status = 'pending'
+            job.run_at = datetime.utcnow() + timedelta(seconds=delay)
+            job.last_error = str(error)
+        else:
+            app.logger.error(f'Job {job_id} ({task_name}) failed permanently after {attempts} attempts: {error}')
+            job.status = 'failed'
+            job.finished_at = datetime.utcnow()
+            job.last_error = str(error)
+        db.session.commit()
+
+
+thread_queue = ThreadQueue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def start_worker():
+    """
+    Start the database job poller for this process (idempotent, fork-aware).
+    Called when a worker starts (gunicorn's post_worker_init, app.py's
+    __main__) so jobs left by a previous process or scheduled with
+    enqueue_at run without waiting for this process to enqueue something.
+    """
+    global _worker
+    if app.config['TASK_BACKEND'] != 'database' or not app.config['TASK_WORKER_IN_PROCESS']:
+        return None
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive() or _worker.pid != os.getpid():
+            _worker = DatabaseJobWorker()
+            _worker.pid = os.getpid()
+            _worker.start()
+        return _worker
+
+
+def enqueue(name, **kwargs):
+    """
+    Schedule task name with kwargs. Call after the request's commit so
+    tasks never see uncommitted (or rolled back) data.
+    """
+    enqueue_at(name, None, **kwargs)
+
+
+def enqueue_at(name, run_at, **kwargs):
+    """Like enqueue, but not before run_at (naive UTC datetime, None for now)"""
+    if name not in TASKS:
+        raise KeyError(f'Unknown task: {name}')
+
+    backend = app.config['TASK_BACKEND']
+    now = datetime.utcnow()
+    if backend == 'sync':
+        run_task(name, kwargs)
+    elif backend == 'database':
+        job = BackgroundJob(
+            task_name=name,
+            payload=json.dumps(kwargs),
+            max_attempts=TASKS[name].max_attempts or app.config['TASK_MAX_ATTEMPTS'],
+            run_at=max(run_at, now) if run_at else now
+        )
+        db.session.add(job)
+        db.session.commit()
+        start_worker()
+    elif run_at and run_at > now:
+        thread_queue.submit_later(name, kwargs, (run_at - now).total_seconds())
+    else:
+        thread_queue.submit(name, kwargs)
+
+
+def queue_stats():
+    """Queue depth and outcome counts for the configured backend"""
+    backend = app.config['TASK_BACKEND']
+    stats = {'backend': backend}
+    if backend == 'database':
+        counts = dict(db.session.query(BackgroundJob.status, func.count()).group_by(BackgroundJob.status).all())
+        oldest_pending = db.session.query(func.min(BackgroundJob.run_at)).filter(
+            BackgroundJob.status == 'pending'
+        ).scalar()
+        stats['counts'] = {status: counts.get(status, 0) for status in BackgroundJob.STATUSES}
+        stats['depth'] = counts.get('pending', 0) + counts.get('running', 0)
+        stats['oldest_pending_seconds'] = (
+            round((datetime.utcnow() - oldest_pending).total_seconds(), 1) if oldest_pending else None
+        )
+    elif backend == 'thread':
+        counts = thread_queue.stats()
+        stats['counts'] = counts
+        stats['depth'] = counts['queued'] + counts['running'] + counts['retrying']
+    else:
+        stats['depth'] = 0
+    return stats
@@ -0,0 +1,194 @@
+"""
+Waitlist matching for Café Fausse
+When confirmed reservations are cancelled, the freed tables are offered to
+(or booked straight away for) the best waitlisted parties that fit.
+
+Matching works in bulk per night: one indexed query fetches only the
+waiting entries for that date whose party size and requested time could
+fit any freed table, they are ranked once (largest party first, then
+first come first served), and table occupancy for the night is held in
+sorted interval lists (services/night_view.py) so each fit check is a
+bisect.
+
+An offer holds its table against every booking path until it expires.
+Each offer schedules an expiry task for its deadline, which passes the
+table on to the next party; availability checks ignore lapsed offers even
+before that task has run.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from app import app, db
+from models import WaitlistEntry, Reservation, Table
+from services.calendar import (MAX_RESERVATION_DURATION, operating_calendar, reservation_duration,
+                               reservation_minutes)
+from services.night_view import load_night_bookings
+from services.notifications import send_reservation_confirmation, send_waitlist_offer
+from services.tasks import task
+
+
+def priority(entry):
+    """Sort key: larger parties fill freed tables better, then earliest to join"""
+    return (-entry.num_of_guests, entry.created_at or datetime.min, entry.waitlist_id)
+
+
+def candidate_starts(entry, freed_start, freed_end):
+    """
+    Start times worth trying for entry on a table freed over
+    [freed_start, freed_end): the freed slot itself if it is within the
+    entry's flexibility, and the requested time when the cancelled booking
+    was what blocked it
+    """
+    flexibility = timedelta(minutes=entry.flexibility_minutes)
+    requested = entry.requested_datetime
+    candidates = []
+    if abs(freed_start - requested) <= flexibility:
+        candidates.append(freed_start)
+    if (requested != freed_start and requested < freed_end
+            and requested + reservation_duration(entry.num_of_guests, requested) > freed_start):
+        candidates.append(requested)
+    return candidates
+
+
+def fits(schedule, entry, start):
+    """True if entry's party can sit at the table from start for its whole duration"""
+    duration = reservation_duration(entry.num_of_guests, start)
+    return (operating_calendar.is_open_for(entry.location_id, start, duration)
+            and schedule.is_free(start, start + duration))
+
+
+def backfill_freed_tables(freed):
+    """
+    Match freed (table, start datetime, end datetime) triples against the
+    waitlist of each table's location, booking or offering each freed table
+    to at most one party. Commits and returns the list of matched
+    WaitlistEntry objects.
+    """
+    max_flexibility = timedelta(minutes=app.config['WAITLIST_MAX_FLEXIBILITY_MINUTES'])
+    now = datetime.utcnow()
+    by_night = defaultdict(list)
+    for table, start, end in freed:
+        if start > now:
+            by_night[(table.location_id, start.date())].append((table, start, end))
+
+    matched = []
+    for (location_id, day), slots in by_night.items():
+        earliest = min(start for _, start, _ in slots)
+        latest = max(end for _, _, end in slots)
+        entries = WaitlistEntry.query.filter(
+            WaitlistEntry.location_id == location_id,
+            WaitlistEntry.waitlist_date == day,
+            WaitlistEntry.status == 'waiting',
+            WaitlistEntry.num_of_guests <= max(table.capacity for table, _, _ in slots),
+            WaitlistEntry.requested_datetime > earliest - MAX_RESERVATION_DURATION - max_flexibility,
+            WaitlistEntry.requested_datetime < latest + max_flexibility
+        ).all()
+        if not entries:
+            continue
+
+        queue = sorted(entries, key=priority)
+        bookings = load_night_bookings(location_id, [table.table_id for table, _, _ in slots], day)
+        taken = set()
+
+        # Small tables first so large freed tables stay available for large parties
+        for table, freed_start, freed_end in sorted(slots, key=lambda slot: slot[0].capacity):
+            for entry in queue:
+                if entry.waitlist_id in taken or entry.num_of_guests > table.capacity:
+                    continue
+                start = next((
+                    candidate for candidate in candidate_starts(entry, freed_start, freed_end)
+                    if candidate > now and fits(bookings[table.table_id], entry, candidate)
+                ), None)
+                if start is None:
+                    continue
+
+                bookings[table.table_id].add(start, start + reservation_duration(entry.num_of_guests, start))
+                taken.add(entry.waitlist_id)
+                assign_table(entry, table, start, now)
+                matched.append(entry)
+                break
+
+    db.session.commit()
+
+    for entry in matched:
+        if entry.status == 'booked':
+            send_reservation_confirmation.enqueue(reservation_id=entry.reservation_id)
+        else:
+            send_waitlist_offer.enqueue(waitlist_id=entry.waitlist_id)
+            expire_waitlist_offers.enqueue_at(entry.offer_expires_at + timedelta(seconds=1))
+    return matched
+
+
+def assign_table(entry, table, start, now):
+    """Book the table for an auto-book entry, otherwise hold an offer for it"""
+    if entry.auto_book:
+        reservation = Reservation(
+            customer_id=entry.customer_id,
+            location_id=table.location_id,
+            table_id=table.table_id,
+            reservation_datetime=start,
+            num_of_guests=entry.num_of_guests,
+            duration_minutes=reservation_minutes(entry.num_of_guests, start),
+            status='confirmed'
+        )
+        db.session.add(reservation)
+        db.session.flush()
+        entry.status = 'booked'
+        entry.reservation_id = reservation.reservation_id
+    else:
+        entry.status = 'offered'
+        entry.offered_table_id = table.table_id
+        entry.offered_datetime = start
+        entry.offer_expires_at = now + timedelta(minutes=app.config['WAITLIST_OFFER_MINUTES'])
+
+
+def offered_slot(entry):
+    """(table, start, end) an offer holds, for passing it on"""
+    start = entry.offered_datetime
+    return entry.offered_table, start, start + reservation_duration(entry.num_of_guests, start)
+
+
+def expire_stale_offers():
+    """Expire unanswered offers and pass their tables on to the next parties"""
+    now = datetime.utcnow()
+    stale = WaitlistEntry.query.filter(
+        WaitlistEntry.status == 'offered',
+        WaitlistEntry.offer_expires_at < now
+    ).all()
+    if not stale:
+        return []
+
+    freed = []
+    for entry in stale:
+        entry.status = 'expired'
+        if entry.offered_table:
+            freed.append(offered_slot(entry))
+    db.session.commit()
+    return backfill_freed_tables(freed)
+
+
+@task()
+def expire_waitlist_offers():
+    """Scheduled for each offer's deadline; expires whatever offers are due by then"""
+    expire_stale_offers()
+
+
+@task()
+def backfill_cancelled_reservations(reservation_ids):
+    """Offer the tables of cancelled reservations to the waitlist"""
+    expire_stale_offers()
+    reservations = Reservation.query.filter(
+        Reservation.reservation_id.in_(reservation_ids),
+        Reservation.status == 'cancelled'
+    ).all()
+    tables = {table.table_id: table for table in Table.query.filter(
+        Table.table_id.in_([reservation.table_id for reservation in reservations]),
+        Table.is_active == True
+    ).all()}
+    backfill_freed_tables([
+        (tables[reservation.table_id], reservation.reservation_datetime, reservation.end_datetime)
+        for reservation in reservations
+        if reservation.table_id in tables
+    ])
+
@@ -0,0 +1,158 @@
+"""
+Worker warm-up
+Loads the in-process caches before a worker takes traffic, so the first
+requests after a deploy or scale-out don't all miss at once:
+
+- the location directory and the operating calendar, with slot templates
+  for the next WARMUP_DAYS days
+- every active location's menu snapshot
+- the newsletter membership index
+- each location's active tables and the confirmed reservations of the
+  next WARMUP_DAYS nights. These have no in-process cache; loading them
+  once opens a pooled connection, fills SQLAlchemy's compiled statement
+  cache and pulls the hot table and index pages into the database's
+  buffer cache.
+
+Under gunicorn (see gunicorn.conf.py) the master warms up once before
+forking when preload_app is on, so workers inherit the caches, and every
+worker warms up again in post_worker_init, before it accepts its first
+connection. Elsewhere GET /health/ready starts warm-up in the background.
+/health/ready answers 503 until this process has finished warming up.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from app import app, db
+from models import Table
+from services.calendar import operating_calendar
+from services.locations import location_directory
+from services.menu_cache import menu_cache
+from services.newsletter_index import newsletter_index
+from services.night_view import load_night_bookings
+
+
+class WarmupState:
+    """Progress of this process's warm-up"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pid = None
+        self.running = False
+        self.finished_at = None
+        self.steps = {}
+        self.errors = {}
+
+    @property
+    def ready(self):
+        # A state copied into a forked worker describes the parent, not it
+        return self.pid == os.getpid() and self.finished_at is not None
+
+    def to_dict(self):
+        return {
+            'ready': self.ready,
+            'running': self.running and self.pid == os.getpid(),
+            'finished_at': self.finished_at.isoformat() if self.ready else None,
+            'steps_ms': dict(self.steps) if self.ready else {},
+            'errors': dict(self.errors) if self.ready else {}
+        }
+
+
+warmup_state = WarmupState()
+
+
+def warm_locations():
+    location_directory.all()
+
+
+def warm_calendar():
+    today = datetime.now().date()
+    for location in location_directory.all():
+        for offset in range(app.config['WARMUP_DAYS']):
+            operating_calendar.slot_templates(location['location_id'], today + timedelta(days=offset))
+
+
+def warm_menu():
+    for location in location_directory.all():
+        menu_cache.get(location['location_id'])
+
+
+def warm_newsletter_index():
+    if not newsletter_index.stats()['ready']:
+        newsletter_index.warm()
+
+
+def warm_bookings():
+    today = datetime.now().date()
+    for location in location_directory.all():
+        location_id = location['location_id']
+        table_ids = [table_id for (table_id,) in db.session.query(Table.table_id).filter(
+            Table.location_id == location_id, Table.is_active == True
+        ).all()]
+        if not table_ids:
+            continue
+        for offset in range(app.config['WARMUP_DAYS']):
+            load_night_bookings(location_id, table_ids, today + timedelta(days=offset))
+
+
+WARMUP_STEPS = [
+    ('locations', warm_locations),
+    ('calendar', warm_calendar),
+    ('menu', warm_menu),
+    ('newsletter_index', warm_newsletter_index),
+    ('bookings', warm_bookings)
+]
+
+
+def warm_up():
+    """
+    Run every warm-up step in this process (blocking). A failing step is
+    logged and recorded but does not keep the worker out of service; the
+    cache it was loading simply fills on demand.
+    """
+    with warmup_state._lock:
+        if warmup_state.ready or (warmup_state.running and warmup_state.pid == os.getpid()):
+            return warmup_state.to_dict()
+        warmup_state.pid = os.getpid()
+        warmup_state.running = True
+        warmup_state.finished_at = None
+        warmup_state.steps = {}
+        warmup_state.errors = {}
+
+    try:
+        with app.app_context():
+            for name, step in WARMUP_STEPS:
+                started = time.perf_counter()
+                try:
+                    step()
+                except Exception as e:
+                    db.session.rollback()
+                    warmup_state.errors[name] = str(e)
+                    app.logger.error(f'Warm-up step {name} failed: {e}')
+                warmup_state.steps[name] = round((time.perf_counter() - started) * 1000, 1)
+            db.session.remove()
+    finally:
+        warmup_state.finished_at = datetime.now()
+        warmup_state.running = False
+    app.logger.info(f'Warm-up finished in {sum(warmup_state.steps.values()):.0f} ms')
+    return warmup_state.to_dict()
+
+
+def start_warm_up():
+    """Warm up in a background thread unless this process already has or is"""
+    if warmup_state.ready or (warmup_state.running and warmup_state.pid == os.getpid()):
+        return
+    threading.Thread(target=warm_up, name='fusse-warmup', daemon=True).start()
+
+
+def release_connections(close=True):
+    """
+    Drop pooled database connections. The gunicorn master calls this after
+    warming up; forked workers call it with close=False so they never use,
+    or close, sockets inherited from the master.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=close)